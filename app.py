@@ -7,16 +7,28 @@ Extrai TODOS os arquivos .pkg do PlayStation 4 mantendo a estrutura completa
 
 import os
 import sys
-import struct
-import json
-from pathlib import Path
 from datetime import datetime
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox, scrolledtext
 import threading
-import zlib
+
+from pkg_core import PkgReader, PkgExtractor, PkgError
+from pkg_cache import IndexCache
+from pkg_events import EventChannel
+
+# Tkinter só é importado quando a interface é aberta: a linha de comando funciona sem Tk
+tk = ttk = filedialog = messagebox = scrolledtext = None
+
+
+def load_tk():
+    """Importa o Tkinter para os nomes do módulo usados pela interface"""
+    global tk, ttk, filedialog, messagebox, scrolledtext
+    import tkinter as tk
+    from tkinter import ttk, filedialog, messagebox, scrolledtext
+
 
 class PS4PKGExtractor:
+    # Intervalo de atualização da interface durante a extração (~6x por segundo)
+    POLL_INTERVAL_MS = 150
+    
     def __init__(self, root):
         self.root = root
         self.root.title("Extrator de PKG PS4 - Completo")
@@ -27,6 +39,8 @@ class PS4PKGExtractor:
         self.pkg_file = None
         self.output_dir = None
         self.extracting = False
+        self.index_cache = IndexCache()
+        self.events = None
         
         # Cores tema PS4
         self.bg_color = "#1a1d29"
@@ -126,6 +140,29 @@ class PS4PKGExtractor:
             )
             rb.pack(anchor=tk.W)
         
+        # Modo de recuperação (para PKGs com tabela danificada)
+        self.recovery_var = tk.StringVar(value="")
+        
+        recovery_modes = [
+            ("Tabela do header (normal)", ""),
+            ("Recuperação: varrer tabelas possíveis", "scan"),
+            ("Recuperação: procurar arquivos por assinatura", "carve")
+        ]
+        
+        for i, (text, value) in enumerate(recovery_modes):
+            rb = tk.Radiobutton(
+                format_frame,
+                text=text,
+                variable=self.recovery_var,
+                value=value,
+                bg=self.bg_color,
+                fg=self.fg_color,
+                selectcolor="#2a2d39",
+                activebackground=self.bg_color,
+                activeforeground=self.fg_color
+            )
+            rb.pack(anchor=tk.W, pady=(5 if i == 0 else 0, 0))
+        
         # Frame de diretório de saída
         output_frame = ttk.LabelFrame(main_frame, text="Diretório de Saída", padding="10")
         output_frame.grid(row=3, column=0, pady=(0, 10), sticky=(tk.W, tk.E))
@@ -150,6 +187,48 @@ class PS4PKGExtractor:
         )
         btn_output.pack(fill=tk.X)
         
+        # Retomar extração interrompida (pula arquivos já completos)
+        self.resume_var = tk.BooleanVar(value=False)
+        cb_resume = tk.Checkbutton(
+            output_frame,
+            text="Retomar extração anterior",
+            variable=self.resume_var,
+            bg=self.bg_color,
+            fg=self.fg_color,
+            selectcolor="#2a2d39",
+            activebackground=self.bg_color,
+            activeforeground=self.fg_color
+        )
+        cb_resume.pack(anchor=tk.W, pady=(5, 0))
+        
+        # Hashes calculados durante a cópia (gravados no extraction_info.json)
+        self.hash_var = tk.BooleanVar(value=False)
+        cb_hash = tk.Checkbutton(
+            output_frame,
+            text="Calcular SHA-256 e CRC32",
+            variable=self.hash_var,
+            bg=self.bg_color,
+            fg=self.fg_color,
+            selectcolor="#2a2d39",
+            activebackground=self.bg_color,
+            activeforeground=self.fg_color
+        )
+        cb_hash.pack(anchor=tk.W)
+        
+        # Arquivos do jogo de dentro da imagem PFS (em app/), sem gravar a imagem
+        self.pfs_var = tk.BooleanVar(value=False)
+        cb_pfs = tk.Checkbutton(
+            output_frame,
+            text="Extrair arquivos da imagem PFS",
+            variable=self.pfs_var,
+            bg=self.bg_color,
+            fg=self.fg_color,
+            selectcolor="#2a2d39",
+            activebackground=self.bg_color,
+            activeforeground=self.fg_color
+        )
+        cb_pfs.pack(anchor=tk.W)
+        
         # Frame de informações do PKG
         info_frame = ttk.LabelFrame(main_frame, text="Informações do PKG", padding="10")
         info_frame.grid(row=1, column=1, rowspan=3, padx=(10, 0), pady=(0, 10), sticky=(tk.W, tk.E, tk.N, tk.S))
@@ -233,7 +312,13 @@ class PS4PKGExtractor:
         self.add_log("Sistema iniciado. Pronto para extrair PKG completo!", "info")
         
     def add_log(self, message, log_type="info"):
-        """Adiciona mensagem ao log"""
+        """Adiciona mensagem ao log (apenas na thread principal)"""
+        self._write_log([(message, log_type)])
+        
+    def _write_log(self, lines):
+        """Insere um lote de mensagens no log com uma única chamada ao Tk"""
+        if not lines:
+            return
         timestamp = datetime.now().strftime("%H:%M:%S")
         
         color_map = {
@@ -243,16 +328,19 @@ class PS4PKGExtractor:
             "warning": "#ffaa00"
         }
         
+        chunks = []
+        for message, log_type in lines:
+            chunks.extend((f"[{timestamp}] ", "timestamp", f"{message}\n", log_type))
+        
         self.log_text.config(state='normal')
-        self.log_text.insert(tk.END, f"[{timestamp}] ", "timestamp")
-        self.log_text.insert(tk.END, f"{message}\n", log_type)
+        self.log_text.insert(tk.END, *chunks)
         
         self.log_text.tag_config("timestamp", foreground="#888888")
-        self.log_text.tag_config(log_type, foreground=color_map.get(log_type, "#ffffff"))
+        for log_type in {log_type for _, log_type in lines}:
+            self.log_text.tag_config(log_type, foreground=color_map.get(log_type, "#ffffff"))
         
         self.log_text.see(tk.END)
         self.log_text.config(state='disabled')
-        self.root.update()
         
     def update_info(self, info_dict):
         """Atualiza painel de informações"""
@@ -293,42 +381,33 @@ class PS4PKGExtractor:
     def analyze_pkg(self, filename):
         """Analisa o arquivo PKG"""
         try:
-            with open(filename, 'rb') as f:
-                # Ler header do PKG
-                header = f.read(0x1000)  # Ler 4KB do header
-                
-                if len(header) < 32:
-                    self.add_log("Arquivo PKG inválido ou corrompido", "error")
-                    return
+            with PkgReader(filename, cache=self.index_cache) as reader:
+                header = reader.header
                 
-                # Parse header
-                magic = struct.unpack('>I', header[0:4])[0]
-                pkg_type = struct.unpack('>I', header[4:8])[0]
-                pkg_revision = struct.unpack('>I', header[8:12])[0]
-                header_size = struct.unpack('>H', header[12:14])[0]
-                item_count = struct.unpack('>H', header[14:16])[0]
-                pkg_size = struct.unpack('>Q', header[16:24])[0]
-                data_offset = struct.unpack('>Q', header[24:32])[0]
-                data_size = struct.unpack('>Q', header[32:40])[0]
-                
-                file_size = os.path.getsize(filename)
+                # Já indexa a tabela para a extração não precisar reler
+                try:
+                    reader.entries()
+                except PkgError:
+                    pass
                 
                 info = {
                     "Nome do Arquivo": os.path.basename(filename),
-                    "Tamanho Total": f"{file_size / (1024*1024):.2f} MB",
-                    "Magic": f"0x{magic:08X}",
-                    "Tipo": "PS4 PKG" if magic == 0x7F434E54 else "PKG Desconhecido",
-                    "Revisão": f"{pkg_revision}",
-                    "Tamanho Header": f"{header_size} bytes",
-                    "Itens no PKG": f"{item_count}",
-                    "Offset de Dados": f"0x{data_offset:X}",
-                    "Tamanho Dados": f"{data_size / (1024*1024):.2f} MB",
-                    "Status": "✓ Válido" if magic == 0x7F434E54 else "✗ Inválido"
+                    "Tamanho Total": f"{reader.file_size / (1024*1024):.2f} MB",
+                    "Magic": f"0x{header.magic:08X}",
+                    "Tipo": "PS4 PKG" if header.is_valid else "PKG Desconhecido",
+                    "Revisão": f"{header.pkg_revision}",
+                    "Tamanho Header": f"{header.header_size} bytes",
+                    "Itens no PKG": f"{header.entry_count}",
+                    "Offset de Dados": f"0x{header.body_offset:X}",
+                    "Tamanho Dados": f"{header.body_size / (1024*1024):.2f} MB",
+                    "Status": "✓ Válido" if header.is_valid else "✗ Inválido"
                 }
                 
                 self.update_info(info)
-                self.add_log(f"PKG analisado: {item_count} itens encontrados", "success")
+                self.add_log(f"PKG analisado: {header.entry_count} itens encontrados", "success")
                 
+        except PkgError as e:
+            self.add_log(str(e), "error")
         except Exception as e:
             self.add_log(f"Erro ao analisar PKG: {str(e)}", "error")
             
@@ -342,354 +421,86 @@ class PS4PKGExtractor:
             messagebox.showwarning("Aviso", "Uma extração já está em andamento!")
             return
         
+        self.extracting = True
+        self.btn_extract.config(state='disabled')
+        
+        # A thread só publica eventos; a interface é atualizada por _poll_events
+        self.events = EventChannel()
+        options = {
+            "pkg_file": self.pkg_file,
+            "output_dir": self.output_dir,
+            "format_filter": self.format_var.get(),
+            "recovery": self.recovery_var.get(),
+            "resume": self.resume_var.get(),
+            "hashes": ("sha256", "crc32") if self.hash_var.get() else (),
+            "pfs": self.pfs_var.get(),
+        }
+        
         # Executar em thread separada
-        thread = threading.Thread(target=self._extract_pkg_thread)
+        thread = threading.Thread(target=self._extract_pkg_thread, args=(self.events, options))
         thread.daemon = True
         thread.start()
+        self.root.after(self.POLL_INTERVAL_MS, self._poll_events)
         
-    def _extract_pkg_thread(self):
-        """Thread de extração completa"""
-        self.extracting = True
-        self.btn_extract.config(state='disabled')
-        
+    def _extract_pkg_thread(self, events, options):
+        """Thread de extração completa (não acessa widgets)"""
         try:
-            # Diretório de saída
-            output_base = self.output_dir if self.output_dir else os.getcwd()
-            pkg_name = os.path.splitext(os.path.basename(self.pkg_file))[0]
-            extract_dir = os.path.join(output_base, f"{pkg_name}_extracted")
-            
-            os.makedirs(extract_dir, exist_ok=True)
-            self.add_log(f"Iniciando extração completa...", "info")
-            self.add_log(f"Destino: {extract_dir}", "info")
-            
-            file_size = os.path.getsize(self.pkg_file)
-            self.add_log(f"Tamanho do PKG: {file_size/(1024*1024):.2f} MB", "info")
-            
-            with open(self.pkg_file, 'rb') as f:
-                # Ler apenas o header (não o arquivo todo!)
-                f.seek(0)
-                header_data = f.read(0x1000)
-                
-                # Parse header PKG PS4
-                magic = struct.unpack('>I', header_data[0:4])[0]
-                
-                if magic != 0x7F434E54:
-                    raise Exception("PKG inválido: Magic number incorreto")
-                
-                # Ler informações do header
-                table_offset = struct.unpack('>I', header_data[0x18:0x1C])[0]
-                entry_count_header = struct.unpack('>I', header_data[0x10:0x14])[0]
-                
-                self.add_log(f"Offset da tabela (header): 0x{table_offset:X}", "info")
-                self.add_log(f"Entradas no header: {entry_count_header}", "info")
-                
-                # Lista de offsets possíveis para tabelas de entrada
-                possible_table_offsets = [
-                    table_offset,
-                    0x2A80,
-                    0x3000,
-                    0x4000,
-                    0x1000,
-                    0x2000
-                ]
-                
-                all_entries = []
-                formats = self.format_var.get().split()
-                
-                # Escanear cada offset possível (sem carregar arquivo inteiro)
-                for base_offset in possible_table_offsets:
-                    if base_offset >= file_size:
-                        continue
-                    
-                    self.add_log(f"Escaneando tabela em 0x{base_offset:X}...", "info")
-                    
-                    # Ler apenas a região da tabela (não o arquivo inteiro!)
-                    max_entries_to_scan = 500
-                    table_size = max_entries_to_scan * 32
-                    
-                    f.seek(base_offset)
-                    table_data = f.read(table_size)
-                    
-                    # Processar entradas da tabela
-                    for idx in range(max_entries_to_scan):
-                        entry_start = idx * 32
-                        if entry_start + 32 > len(table_data):
-                            break
-                        
-                        entry_bytes = table_data[entry_start:entry_start+32]
-                        
-                        try:
-                            entry_id = struct.unpack('>I', entry_bytes[0:4])[0]
-                            entry_offset = struct.unpack('>I', entry_bytes[16:20])[0]
-                            entry_size = struct.unpack('>I', entry_bytes[20:24])[0]
-                            
-                            # Validações
-                            if entry_size == 0 or entry_size > 2*1024*1024*1024:
-                                continue
-                            
-                            if entry_offset == 0 or entry_offset >= file_size:
-                                continue
-                            
-                            # Evitar duplicatas
-                            if any(e['id'] == entry_id and e['offset'] == entry_offset for e in all_entries):
-                                continue
-                            
-                            # Entrada válida
-                            all_entries.append({
-                                'id': entry_id,
-                                'offset': entry_offset,
-                                'size': entry_size
-                            })
-                            
-                        except:
-                            continue
-                
-                self.add_log(f"✓ {len(all_entries)} entradas únicas encontradas!", "success")
-                
-                if len(all_entries) == 0:
-                    self.add_log("Nenhuma entrada válida encontrada!", "error")
-                    raise Exception("Não foi possível localizar entradas no PKG")
-                
-                self.progress['maximum'] = len(all_entries)
-                extracted_files = []
-                
-                # Extrair cada arquivo (streaming, sem carregar tudo na memória)
-                for i, entry in enumerate(all_entries):
-                    try:
-                        entry_id = entry['id']
-                        entry_offset = entry['offset']
-                        entry_size = entry['size']
-                        
-                        # Mapeamento de IDs conhecidos
-                        file_map = {
-                            0x1: ("eboot.bin", ""),
-                            0x1000: ("param.sfo", "sce_sys"),
-                            0x1001: ("nptitle.dat", "sce_sys"),
-                            0x1002: ("npbind.dat", "sce_sys"),
-                            0x1003: ("selfinfo.dat", "sce_sys"),
-                            0x1004: ("imageinfo.dat", "sce_sys"),
-                            0x1005: ("target-deltainfo.dat", "sce_sys"),
-                            0x1006: ("origin-deltainfo.dat", "sce_sys"),
-                            0x1007: ("psreserved.dat", "sce_sys"),
-                            0x1200: ("icon0.png", "sce_sys"),
-                            0x1220: ("pic0.png", "sce_sys"),
-                            0x1240: ("pic1.png", "sce_sys"),
-                            0x1260: ("snd0.at9", "sce_sys"),
-                            0x1280: ("changeinfo.xml", "sce_sys"),
-                            0x1300: ("trophy_conf", "sce_sys"),
-                            0x400: ("license.dat", "sce_sys"),
-                            0x401: ("license.info", "sce_sys"),
-                        }
-                        
-                        # Determinar nome do arquivo
-                        if entry_id in file_map:
-                            filename, subdir = file_map[entry_id]
-                        elif entry_id >= 0x200 and entry_id < 0x260:
-                            filename = f"module_{entry_id:04X}.prx"
-                            subdir = "sce_module"
-                        elif entry_id >= 0x1000 and entry_id < 0x1400:
-                            filename = f"resource_{entry_id:04X}.dat"
-                            subdir = "sce_sys"
-                        elif entry_id >= 0x400 and entry_id < 0x500:
-                            filename = f"playgo_{entry_id:04X}.dat"
-                            subdir = "app"
-                        else:
-                            filename = f"file_{entry_id:04X}.bin"
-                            subdir = "data"
-                        
-                        # Detectar tipo pelo conteúdo (ler apenas header)
-                        f.seek(entry_offset)
-                        header_sample = f.read(min(16, entry_size))
-                        
-                        if header_sample.startswith(b'\x7FELF'):
-                            if '.bin' in filename or '.dat' in filename:
-                                filename = filename.rsplit('.', 1)[0] + '.elf'
-                        elif header_sample.startswith(b'\x00PSF'):
-                            if '.sfo' not in filename and '.dat' in filename:
-                                filename = filename.replace('.dat', '.sfo')
-                        elif header_sample.startswith(b'\x89PNG'):
-                            if '.png' not in filename:
-                                filename = filename.rsplit('.', 1)[0] + '.png'
-                        elif header_sample.startswith(b'<?xml'):
-                            if '.xml' not in filename:
-                                filename = filename.rsplit('.', 1)[0] + '.xml'
-                        
-                        # Verificar filtro
-                        if not self._matches_filter(filename, formats):
-                            self.progress['value'] = i + 1
-                            continue
-                        
-                        # Criar diretórios
-                        if subdir:
-                            file_dir = os.path.join(extract_dir, subdir)
-                            os.makedirs(file_dir, exist_ok=True)
-                            file_path = os.path.join(file_dir, filename)
-                            display_path = f"{subdir}/{filename}"
-                        else:
-                            file_path = os.path.join(extract_dir, filename)
-                            display_path = filename
-                        
-                        # Extrair arquivo em chunks (para arquivos grandes)
-                        f.seek(entry_offset)
-                        
-                        chunk_size = 8 * 1024 * 1024  # 8MB por vez
-                        bytes_written = 0
-                        
-                        with open(file_path, 'wb') as out_file:
-                            while bytes_written < entry_size:
-                                chunk_to_read = min(chunk_size, entry_size - bytes_written)
-                                chunk = f.read(chunk_to_read)
-                                if not chunk:
-                                    break
-                                out_file.write(chunk)
-                                bytes_written += len(chunk)
-                        
-                        extracted_files.append({
-                            "name": filename,
-                            "path": display_path,
-                            "size": entry_size,
-                            "id": entry_id,
-                            "offset": entry_offset
-                        })
-                        
-                        size_mb = entry_size / (1024*1024)
-                        size_str = f"{size_mb:.2f} MB" if size_mb > 1 else f"{entry_size/1024:.1f} KB"
-                        self.add_log(f"✓ [{i+1}/{len(all_entries)}] {display_path} ({size_str})", "success")
-                        
-                        self.progress['value'] = i + 1
-                        self.progress_label.config(text=f"Extraindo: {i+1}/{len(all_entries)}")
-                        self.root.update()
-                        
-                    except Exception as e:
-                        self.add_log(f"Erro no item {i}: {str(e)}", "warning")
-                        continue
-                
-                # Criar estrutura de diretórios adicional
-                extra_dirs = ["sce_module", "app", "license"]
-                for dir_name in extra_dirs:
-                    dir_path = os.path.join(extract_dir, dir_name)
-                    os.makedirs(dir_path, exist_ok=True)
-                
-                # Salvar informações da extração
-                extraction_info = {
-                    "pkg_file": os.path.basename(self.pkg_file),
-                    "extraction_date": datetime.now().isoformat(),
-                    "extract_directory": extract_dir,
-                    "format_filter": self.format_var.get(),
-                    "total_entries_found": len(all_entries),
-                    "extracted_files": len(extracted_files),
-                    "files": extracted_files
-                }
-                
-                info_path = os.path.join(extract_dir, "extraction_info.json")
-                with open(info_path, 'w', encoding='utf-8') as f:
-                    json.dump(extraction_info, f, indent=2, ensure_ascii=False)
-                
-                self.progress_label.config(text="Extração concluída!")
-                self.add_log(f"\n{'='*50}", "info")
-                self.add_log(f"✅ EXTRAÇÃO COMPLETA CONCLUÍDA!", "success")
-                self.add_log(f"📁 Local: {extract_dir}", "info")
-                self.add_log(f"📊 Arquivos extraídos: {len(extracted_files)} de {len(all_entries)} encontrados", "info")
-                self.add_log(f"{'='*50}", "info")
-                
-                messagebox.showinfo(
-                    "Sucesso!",
-                    f"PKG extraído completamente!\n\n"
-                    f"Entradas encontradas: {len(all_entries)}\n"
-                    f"Arquivos extraídos: {len(extracted_files)}\n"
-                    f"Local: {extract_dir}\n\n"
-                    f"Verifique o arquivo extraction_info.json para detalhes."
+            with PkgReader(options["pkg_file"], log=events.log, cache=self.index_cache) as reader:
+                extractor = PkgExtractor(
+                    reader,
+                    output_base=options["output_dir"],
+                    format_filter=options["format_filter"],
+                    log=events.log,
+                    progress=events.progress,
+                    recovery=options["recovery"],
+                    resume=options["resume"],
+                    hashes=options["hashes"],
+                    pfs=options["pfs"]
                 )
+                extraction_info = extractor.extract()
+            events.post("done", extraction_info)
                 
         except Exception as e:
-            self.add_log(f"❌ ERRO NA EXTRAÇÃO: {str(e)}", "error")
-            messagebox.showerror("Erro", f"Erro ao extrair PKG:\n{str(e)}")
-            
-        finally:
-            self.extracting = False
-            self.btn_extract.config(state='normal')
-            self.progress['value'] = 0
-            self.progress_label.config(text="Pronto para extrair")
-            
-    def _matches_filter(self, filename, formats):
-        """Verifica se arquivo corresponde ao filtro"""
-        if "*.*" in formats:
-            return True
-        
-        ext = os.path.splitext(filename)[1].lower()
-        for fmt in formats:
-            filter_ext = fmt.replace("*", "").lower()
-            if filter_ext == ext:
-                return True
-        return False
+            events.log(f"❌ ERRO NA EXTRAÇÃO: {str(e)}", "error")
+            events.post("failed", str(e))
     
-    def _extract_by_signature(self, data, extract_dir, extracted_files, formats):
-        """Extrai arquivos procurando por assinaturas conhecidas"""
-        signatures = {
-            b'\x7FELF': ('eboot.bin', ''),
-            b'\x00PSF': ('param.sfo', 'sce_sys'),
-            b'\x89PNG': ('icon0.png', 'sce_sys'),
-            b'OggS': ('audio.ogg', 'sce_sys'),
-        }
+    def _poll_events(self):
+        """Consome os eventos da extração em lote (chamado pelo timer do Tk)"""
+        logs, progress, finished = self.events.drain()
         
-        for sig, (filename, subdir) in signatures.items():
-            offset = data.find(sig)
-            if offset != -1:
-                # Tentar determinar o tamanho do arquivo
-                # Para ELF, ler o tamanho do header
-                if sig == b'\x7FELF' and offset + 64 <= len(data):
-                    try:
-                        # Ler tamanho do ELF do header
-                        e_shoff = struct.unpack('<Q', data[offset+40:offset+48])[0]
-                        if e_shoff > 0:
-                            file_size = min(e_shoff + 0x10000, len(data) - offset)
-                        else:
-                            file_size = min(10*1024*1024, len(data) - offset)  # 10MB default
-                    except:
-                        file_size = min(10*1024*1024, len(data) - offset)
-                elif sig == b'\x00PSF' and offset + 24 <= len(data):
-                    try:
-                        # PSF/SFO tem tamanho no header
-                        file_size = struct.unpack('<I', data[offset+16:offset+20])[0]
-                        file_size = min(file_size + 24, 100*1024, len(data) - offset)
-                    except:
-                        file_size = min(64*1024, len(data) - offset)
-                elif sig == b'\x89PNG':
-                    # Para PNG, procurar pelo final
-                    end_marker = b'IEND\xae\x42\x60\x82'
-                    end_offset = data.find(end_marker, offset)
-                    if end_offset != -1:
-                        file_size = end_offset - offset + 8
-                    else:
-                        file_size = min(2*1024*1024, len(data) - offset)
-                else:
-                    file_size = min(1024*1024, len(data) - offset)
-                
-                if not self._matches_filter(filename, formats):
-                    continue
-                
-                # Extrair arquivo
-                if subdir:
-                    file_dir = os.path.join(extract_dir, subdir)
-                    os.makedirs(file_dir, exist_ok=True)
-                    file_path = os.path.join(file_dir, filename)
-                    display_path = f"{subdir}/{filename}"
-                else:
-                    file_path = os.path.join(extract_dir, filename)
-                    display_path = filename
-                
-                with open(file_path, 'wb') as f:
-                    f.write(data[offset:offset+file_size])
-                
-                extracted_files.append({
-                    "name": filename,
-                    "path": display_path,
-                    "size": file_size,
-                    "offset": offset
-                })
-                
-                self.add_log(f"✓ Extraído por assinatura: {display_path} ({file_size/1024:.1f} KB)", "success")
+        self._write_log(logs)
+        if progress is not None:
+            self.progress['maximum'] = max(progress.bytes_total, 1)
+            self.progress['value'] = progress.bytes_done
+            self.progress_label.config(text=f"Extraindo: {progress.describe()}")
+        
+        for event in finished:
+            self._on_extraction_finished(event)
         
+        if self.extracting:
+            self.root.after(self.POLL_INTERVAL_MS, self._poll_events)
+    
+    def _on_extraction_finished(self, event):
+        """Finaliza a extração na thread principal"""
+        self.extracting = False
+        self.btn_extract.config(state='normal')
+        self.progress['value'] = 0
+        self.progress_label.config(text="Pronto para extrair")
+        
+        kind = event[0]
+        if kind == "done":
+            extraction_info = event[1]
+            messagebox.showinfo(
+                "Sucesso!",
+                f"PKG extraído completamente!\n\n"
+                f"Entradas encontradas: {extraction_info['total_entries_found']}\n"
+                f"Arquivos extraídos: {extraction_info['extracted_files']}\n"
+                f"Local: {extraction_info['extract_directory']}\n\n"
+                f"Verifique o arquivo extraction_info.json para detalhes."
+            )
+        else:
+            messagebox.showerror("Erro", f"Erro ao extrair PKG:\n{event[1]}")
+            
     def clear_all(self):
         """Limpa todos os campos"""
         self.pkg_file = None
@@ -710,10 +521,18 @@ class PS4PKGExtractor:
         
         self.add_log("Sistema limpo. Pronto para nova extração!", "info")
 
-def main():
+def main_gui():
+    load_tk()
     root = tk.Tk()
     app = PS4PKGExtractor(root)
     root.mainloop()
 
+def main():
+    # Com argumentos, usa a linha de comando (sem criar janela Tk)
+    if len(sys.argv) > 1:
+        from pkg_cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
+    main_gui()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
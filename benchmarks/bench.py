@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark do extrator de PKG
+Mede análise do header, leitura da tabela, varredura de recuperação,
+extração e carving em um PKG sintético (ou real), reportando MB/s,
+entradas/s e pico de memória (RSS) de cada fase. Roda offline.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import argparse
+import platform
+import multiprocessing
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from pkg_filter import parse_size
+from synthetic_pkg import generate_pkg, PROFILES
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _peak_rss_kb():
+    """Pico de RSS do processo atual em KB (Linux reporta KB, macOS bytes)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak //= 1024
+    return peak
+
+
+def _drop_file_cache(path):
+    """Descarta as páginas do PKG do cache do SO (não precisa de root)"""
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+    return True
+
+
+# Fases (executadas em um processo novo cada, para medir o RSS isoladamente)
+
+def _phase_analyze(pkg, params):
+    from pkg_core import PkgReader
+    iterations = params.get("iterations", 100)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        with PkgReader(pkg) as reader:
+            reader.header.is_valid
+    return {"elapsed": time.perf_counter() - started, "entries": iterations, "bytes": 0}
+
+
+def _phase_table(pkg, params):
+    from pkg_core import PkgReader
+    started = time.perf_counter()
+    with PkgReader(pkg) as reader:
+        entries = reader.entries()
+        for entry in entries:
+            reader.entry_name(entry)
+    return {"elapsed": time.perf_counter() - started, "entries": len(entries),
+            "bytes": len(entries) * 32}
+
+
+def _phase_scan(pkg, params):
+    from pkg_core import PkgReader
+    started = time.perf_counter()
+    with PkgReader(pkg) as reader:
+        entries = reader.entries(recovery="scan")
+    return {"elapsed": time.perf_counter() - started, "entries": len(entries), "bytes": 0}
+
+
+def _phase_extract(pkg, params):
+    from pkg_core import PkgReader, PkgExtractor
+    out_dir = tempfile.mkdtemp(prefix="pkgbench_", dir=params.get("workdir"))
+    try:
+        started = time.perf_counter()
+        with PkgReader(pkg) as reader:
+            info = PkgExtractor(reader, output_base=out_dir, **params.get("options", {})).extract()
+        elapsed = time.perf_counter() - started
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+    return {"elapsed": elapsed, "entries": info["extracted_files"],
+            "bytes": info["bytes_copied"], "timings": info["timings"]}
+
+
+def _phase_carve(pkg, params):
+    from pkg_core import PkgReader
+    from pkg_carver import SignatureCarver
+    started = time.perf_counter()
+    with PkgReader(pkg) as reader:
+        found = sum(1 for _ in SignatureCarver(reader).scan())
+        size = reader.file_size
+    return {"elapsed": time.perf_counter() - started, "entries": found, "bytes": size}
+
+
+PHASES = {
+    "analyze": _phase_analyze,
+    "table": _phase_table,
+    "scan": _phase_scan,
+    "extract": _phase_extract,
+    "carve": _phase_carve,
+}
+
+
+def _run_in_child(phase, pkg, params):
+    result = PHASES[phase](pkg, params)
+    result["peak_rss_kb"] = _peak_rss_kb()
+    return result
+
+
+def run_phase(phase, pkg, params, cold=False):
+    """Executa uma fase em um processo novo e devolve as métricas"""
+    if cold:
+        _drop_file_cache(pkg)
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(1) as pool:
+        result = pool.apply(_run_in_child, (phase, pkg, params))
+
+    elapsed = result["elapsed"]
+    result["mb_s"] = result["bytes"] / elapsed / (1024*1024) if elapsed > 0 else 0.0
+    result["entries_s"] = result["entries"] / elapsed if elapsed > 0 else 0.0
+    return result
+
+
+def build_plan(args):
+    """Lista de (nome, fase, parâmetros) a medir"""
+    plan = [
+        ("analyze", "analyze", {"iterations": args.analyze_iterations}),
+        ("table", "table", {}),
+        ("scan", "scan", {}),
+    ]
+    for jobs in args.jobs:
+        for zero_copy in (True, False):
+            label = f"extract j={jobs} {'kernel' if zero_copy else 'userspace'}"
+            options = {"jobs": jobs, "zero_copy": zero_copy}
+            plan.append((label, "extract", {"options": options, "workdir": args.workdir}))
+    plan.append(("carve", "carve", {}))
+
+    if args.phases:
+        wanted = set(args.phases)
+        plan = [item for item in plan if item[1] in wanted]
+    return plan
+
+
+def print_table(results):
+    print(f"{'fase':<28}{'tempo (s)':>11}{'MB/s':>11}{'entradas/s':>13}{'pico RSS':>12}")
+    for name, result in results:
+        rss = result.get("peak_rss_kb")
+        rss_str = f"{rss / 1024:.1f} MB" if rss else "-"
+        print(f"{name:<28}{result['elapsed']:>11.3f}{result['mb_s']:>11.1f}"
+              f"{result['entries_s']:>13.0f}{rss_str:>12}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark do extrator de PKG PS4")
+    parser.add_argument("--pkg", help="PKG a medir (padrão: gera um sintético)")
+    parser.add_argument("-n", "--entries", type=int, default=2000,
+                        help="Entradas do PKG sintético (padrão: 2000)")
+    parser.add_argument("-p", "--profile", choices=PROFILES, default="mixed",
+                        help="Distribuição de tamanhos do PKG sintético")
+    parser.add_argument("-s", "--total-size", default="256M",
+                        help="Tamanho aproximado do PKG sintético (padrão: 256M)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-j", "--jobs", type=int, nargs="+", default=[1, 4],
+                        help="Valores de --jobs a medir na extração (padrão: 1 4)")
+    parser.add_argument("--phases", nargs="+", choices=sorted(PHASES),
+                        help="Mede apenas estas fases")
+    parser.add_argument("--analyze-iterations", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="Repetições por fase (reporta a mais rápida)")
+    parser.add_argument("--cold", action="store_true",
+                        help="Descarta o PKG do cache do SO antes de cada fase")
+    parser.add_argument("--workdir", default=None,
+                        help="Diretório para o PKG sintético e as extrações")
+    parser.add_argument("--json", dest="json_path", default=None,
+                        help="Grava os resultados em JSON (para comparar versões)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.workdir:
+        # mkdtemp (PKG gerado e pastas de extração) exige que o diretório exista
+        os.makedirs(args.workdir, exist_ok=True)
+
+    tmp_dir = None
+    pkg = args.pkg
+    if pkg is None:
+        tmp_dir = tempfile.mkdtemp(prefix="pkgbench_", dir=args.workdir)
+        pkg = os.path.join(tmp_dir, "synthetic.pkg")
+        print(f"Gerando PKG sintético ({args.entries} entradas, {args.profile}, {args.total_size})...")
+        generate_pkg(pkg, entries=args.entries, profile=args.profile,
+                     total_size=parse_size(args.total_size), seed=args.seed)
+
+    try:
+        print(f"PKG: {pkg} ({os.path.getsize(pkg) / (1024*1024):.1f} MB)")
+        results = []
+        for name, phase, params in build_plan(args):
+            runs = [run_phase(phase, pkg, params, cold=args.cold) for _ in range(args.repeat)]
+            results.append((name, min(runs, key=lambda r: r["elapsed"])))
+        print_table(results)
+
+        if args.json_path:
+            report = {
+                "date": datetime.now().isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "pkg": os.path.basename(pkg),
+                "pkg_size": os.path.getsize(pkg),
+                "synthetic": None if args.pkg else {
+                    "entries": args.entries, "profile": args.profile,
+                    "total_size": args.total_size, "seed": args.seed,
+                },
+                "cold": args.cold,
+                "results": {name: result for name, result in results},
+            }
+            with open(args.json_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gerador de PKGs sintéticos com layout PS4
+Cria pacotes reproduzíveis (mesma semente -> mesmos bytes) para benchmarks:
+quantidade de entradas, distribuição de tamanhos e tipos de conteúdo configuráveis,
+opcionalmente com uma imagem PFS (arquivos do jogo, PFS interno comprimido em PFSC)
+"""
+
+import os
+import sys
+import math
+import struct
+import zlib
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pkg_core import PKG_MAGIC, HEADER_SIZE, TABLE_ENTRY_STRUCT, KNOWN_ENTRY_NAMES
+from pkg_filter import parse_size
+from pkg_pfs import (PFS_VERSION, PFS_MAGIC, PFSC_MAGIC, SUPERBLOCK_STRUCT, INODE_STRUCT,
+                     INODE_SIZE, INODE_BLOCKS_OFFSET, INODE_POINTERS_OFFSET, DIRECT_BLOCKS,
+                     INODE_COMPRESSED, DIRENT_STRUCT, DIRENT_FILE, DIRENT_DIR, PFSC_STRUCT,
+                     ROOT_DIR, NESTED_IMAGE)
+from pkg_sfo import (SFO_MAGIC, SFO_HEADER_STRUCT, SFO_INDEX_STRUCT, SFO_FORMAT_UTF8,
+                     SFO_FORMAT_INT32, PARAM_SFO_ID)
+
+TABLE_OFFSET = 0x2000
+DATA_ALIGN = 16
+PATTERN_SIZE = 1024 * 1024
+MAX_SYNTH_ENTRY_SIZE = 2 * 1024 * 1024 * 1024 - DATA_ALIGN
+
+PROFILES = ("small", "large", "mixed")
+CONTENT_TYPES = ("elf", "psf", "png", "xml", "raw")
+
+SMALL_MIN = 512
+SMALL_MAX = 64 * 1024
+
+PFS_BLOCK_SIZE = 0x10000
+PFS_ALIGN = 0x10000
+# Posição de pfs_image_offset/size no header do PKG
+PFS_HEADER_FIELDS = 0x410
+DIRENT_DOT = 4
+DIRENT_DOTDOT = 5
+
+
+def entry_sizes(rng, count, profile, total_size):
+    """Tamanhos das entradas conforme o perfil
+
+    small: muitos arquivos pequenos (estilo sce_sys), ignora `total_size`
+    large: poucos blobs grandes dividindo `total_size`
+    mixed: 90% pequenos e o restante de `total_size` em blobs
+    """
+    def small():
+        return int(math.exp(rng.uniform(math.log(SMALL_MIN), math.log(SMALL_MAX))))
+
+    if profile == "small":
+        return [small() for _ in range(count)]
+
+    if profile == "large":
+        size = max(1, total_size // count)
+        return [min(size, MAX_SYNTH_ENTRY_SIZE) for _ in range(count)]
+
+    if profile == "mixed":
+        small_count = max(0, min(count - 1, int(count * 0.9)))
+        sizes = [small() for _ in range(small_count)]
+        big_count = count - small_count
+        remaining = max(big_count * 1024 * 1024, total_size - sum(sizes))
+        big = min(remaining // big_count, MAX_SYNTH_ENTRY_SIZE)
+        sizes.extend(big for _ in range(big_count))
+        rng.shuffle(sizes)
+        return sizes
+
+    raise ValueError(f"Perfil desconhecido: {profile}")
+
+
+def entry_ids(count):
+    """IDs realistas: conhecidos de sce_sys, módulos, recursos e depois dados"""
+    ids = sorted(KNOWN_ENTRY_NAMES)
+    ids += list(range(0x200, 0x260))
+    ids += [i for i in range(0x1000, 0x1400) if i not in KNOWN_ENTRY_NAMES]
+    next_id = 0x2000
+    while len(ids) < count:
+        ids.append(next_id)
+        next_id += 1
+    return ids[:count]
+
+
+# Cabeçalhos válidos por tipo (o carver consegue calcular o tamanho de todos)
+
+def _elf_header(size):
+    header = bytearray(64 + 56)
+    header[0:4] = b'\x7FELF'
+    header[4:7] = bytes([2, 1, 1])  # 64 bits, little-endian, versão 1
+    struct.pack_into('<HHIQQQIHHHHHH', header, 16,
+                     2, 0x3E, 1, 0, 64, 0, 0, 64, 56, 1, 64, 0, 0)
+    # Um program header cobrindo a entrada inteira
+    struct.pack_into('<IIQQQQQQ', header, 64, 1, 5, 0, 0, 0, size, size, 0x1000)
+    return bytes(header)
+
+
+def _psf_header(size):
+    key = b'TITLE_ID\x00\x00\x00\x00'
+    data_len = max(4, size - 0x14 - 16 - len(key))
+    index = struct.pack('<HHIII', 0, 0x0204, 10, data_len, 0)
+    key_table = 0x14 + len(index)
+    data_table = key_table + len(key)
+    header = SFO_MAGIC + struct.pack('<IIII', 0x0101, key_table, data_table, 1) + index + key
+    return header + b'CUSA00000\x00'
+
+
+def build_sfo(values):
+    """param.sfo com os parâmetros informados (str -> texto UTF-8, int -> inteiro de 32 bits)"""
+    keys = sorted(values)
+    key_table = b''
+    data_table = b''
+    index = b''
+    for key in keys:
+        value = values[key]
+        if isinstance(value, int):
+            fmt, data = SFO_FORMAT_INT32, struct.pack('<I', value)
+            length = max_length = 4
+        else:
+            fmt, data = SFO_FORMAT_UTF8, value.encode('utf-8') + b'\x00'
+            length = len(data)
+            max_length = (length + 3) & ~3
+        index += SFO_INDEX_STRUCT.pack(len(key_table), fmt, length, max_length, len(data_table))
+        key_table += key.encode('ascii') + b'\x00'
+        data_table += data.ljust(max_length, b'\x00')
+    key_table = key_table.ljust((len(key_table) + 3) & ~3, b'\x00')
+    key_start = SFO_HEADER_STRUCT.size + len(index)
+    header = SFO_HEADER_STRUCT.pack(SFO_MAGIC, 0x0101, key_start, key_start + len(key_table),
+                                    len(keys))
+    return header + index + key_table + data_table
+
+
+def _png_header(size):
+    ihdr = struct.pack('>IIBBBBB', 1, 1, 8, 0, 0, 0, 0)
+    head = b'\x89PNG\r\n\x1a\n' + struct.pack('>I', len(ihdr)) + b'IHDR' + ihdr + b'\x00' * 4
+    # IDAT ocupa o restante, IEND fecha a entrada
+    idat_len = max(0, size - len(head) - 12 - 12)
+    return head + struct.pack('>I', idat_len) + b'IDAT', idat_len
+
+
+def content_prefix_suffix(kind, size):
+    """Bytes iniciais/finais da entrada para o tipo de conteúdo"""
+    if kind == "elf" and size >= 120:
+        return _elf_header(size), b''
+    if kind == "psf" and size >= 64:
+        return _psf_header(size), b''
+    if kind == "png" and size >= 64:
+        head, idat_len = _png_header(size)
+        tail = b'\x00' * 4 + struct.pack('>I', 0) + b'IEND' + b'\xaeB`\x82'
+        return head, tail
+    if kind == "xml" and size >= 32:
+        return b'<?xml version="1.0" encoding="utf-8"?>\n<data>', b'</data>\n'
+    return b'', b''
+
+
+def _write_payload(f, size, pattern, zero_fraction, rng):
+    """Escreve `size` bytes do padrão (ou zeros) em blocos, sem guardar tudo na memória"""
+    written = 0
+    while written < size:
+        n = min(len(pattern), size - written)
+        if zero_fraction and rng.random() < zero_fraction:
+            f.write(b'\x00' * n)
+        else:
+            start = rng.randrange(0, len(pattern) - n + 1)
+            f.write(pattern[start:start+n])
+        written += n
+
+
+def _dirent(number, kind, name):
+    encoded = name.encode('utf-8')
+    size = (DIRENT_STRUCT.size + len(encoded) + 1 + 7) // 8 * 8
+    record = DIRENT_STRUCT.pack(number, kind, len(encoded), size) + encoded
+    return record + b'\x00' * (size - len(record))
+
+
+def build_pfs(files, block_size=PFS_BLOCK_SIZE, compressed=()):
+    """Imagem PFS (sem criptografia) com superroot/uroot e os arquivos `files`
+
+    `files` mapeia caminho -> conteúdo; caminhos em `compressed` são
+    gravados em PFSC com a flag de compressão no inode. Arquivos com mais
+    de 12 blocos usam um bloco indireto, como nas imagens reais.
+    """
+    # Diretórios: caminho -> lista de filhos (nome, caminho completo, é_dir)
+    dirs = {"": []}
+    for path in sorted(files):
+        parts = path.split("/")
+        for depth in range(1, len(parts)):
+            parent, current = "/".join(parts[:depth - 1]), "/".join(parts[:depth])
+            if current not in dirs:
+                dirs[current] = []
+                dirs[parent].append((parts[depth - 1], current, True))
+        dirs["/".join(parts[:-1])].append((parts[-1], path, False))
+
+    # Inodes: 0 = superroot, 1 = uroot, depois diretórios e arquivos
+    numbers = {None: 0, "": 1}
+    order = [None, ""]
+    for directory in sorted(dirs):
+        for _, child, _ in dirs[directory]:
+            numbers[child] = len(order)
+            order.append(child)
+
+    contents = {}
+    for key in order:
+        if key is None:
+            contents[key] = (_dirent(0, DIRENT_DOT, ".") + _dirent(0, DIRENT_DOTDOT, "..")
+                             + _dirent(1, DIRENT_DIR, ROOT_DIR))
+        elif key in dirs:
+            parent = numbers[key.rpartition("/")[0]] if key else 0
+            data = _dirent(numbers[key], DIRENT_DOT, ".") + _dirent(parent, DIRENT_DOTDOT, "..")
+            for name, child, is_dir in dirs[key]:
+                data += _dirent(numbers[child], DIRENT_DIR if is_dir else DIRENT_FILE, name)
+            if len(data) > block_size:
+                raise ValueError("Diretório grande demais para um bloco")
+            contents[key] = data
+        elif key in compressed:
+            contents[key] = build_pfsc(files[key])
+        else:
+            contents[key] = files[key]
+
+    inode_blocks = -(-len(order) // (block_size // INODE_SIZE))
+    next_block = 1 + inode_blocks
+    per_indirect = block_size // 4
+    placement = {}
+    indirect_blocks = {}
+    for key in order:
+        count = -(-len(contents[key]) // block_size)
+        placement[key] = (next_block, count)
+        next_block += count
+        if count > DIRECT_BLOCKS:
+            if count - DIRECT_BLOCKS > per_indirect:
+                raise ValueError("Arquivo grande demais para o gerador (só indireto simples)")
+            indirect_blocks[key] = next_block
+            next_block += 1
+
+    image = bytearray(next_block * block_size)
+    SUPERBLOCK_STRUCT.pack_into(image, 0, PFS_VERSION, PFS_MAGIC, 0, 0, 1, 1, 0, 0, 0,
+                                block_size, 0, next_block, len(order), 0, inode_blocks, 0)
+
+    per_block = block_size // INODE_SIZE
+    for number, key in enumerate(order):
+        first, count = placement[key]
+        data = contents[key]
+        position = (1 + number // per_block) * block_size + (number % per_block) * INODE_SIZE
+        is_dir = key is None or key in dirs
+        mode = 0x41ED if is_dir else 0x81A4
+        flags = INODE_COMPRESSED if key in compressed else 0
+        size = len(files[key]) if key in compressed else len(data)
+        INODE_STRUCT.pack_into(image, position, mode, 2 if is_dir else 1, flags, size, len(data))
+        struct.pack_into('<I', image, position + INODE_BLOCKS_OFFSET, count)
+        blocks = list(range(first, first + count))
+        direct = blocks[:DIRECT_BLOCKS] + [0] * (DIRECT_BLOCKS - min(count, DIRECT_BLOCKS))
+        indirect = [indirect_blocks.get(key, 0), 0, 0, 0, 0]
+        struct.pack_into(f'<{DIRECT_BLOCKS + 5}I', image, position + INODE_POINTERS_OFFSET,
+                         *direct, *indirect)
+        if key in indirect_blocks:
+            rest = blocks[DIRECT_BLOCKS:]
+            struct.pack_into(f'<{len(rest)}I', image, indirect_blocks[key] * block_size, *rest)
+        image[first * block_size:first * block_size + len(data)] = data
+
+    return bytes(image)
+
+
+def build_pfsc(data, block_size=PFS_BLOCK_SIZE):
+    """Arquivo PFSC: blocos comprimidos com zlib (ou crus, se não compensar)"""
+    count = -(-len(data) // block_size)
+    table_offset = PFSC_STRUCT.size
+    data_start = (table_offset + 8 * (count + 1) + 0xFFF) & ~0xFFF
+    blocks = []
+    for i in range(count):
+        block = data[i * block_size:(i + 1) * block_size]
+        block += b'\x00' * (block_size - len(block))
+        packed = zlib.compress(block, 6)
+        blocks.append(packed if len(packed) < block_size else block)
+
+    offsets = [data_start]
+    for block in blocks:
+        offsets.append(offsets[-1] + len(block))
+    header = PFSC_STRUCT.pack(PFSC_MAGIC, 0, 6, block_size, block_size, table_offset,
+                              data_start, len(data))
+    table = struct.pack(f'<{count + 1}Q', *offsets)
+    return header + table + b'\x00' * (data_start - len(header) - len(table)) + b''.join(blocks)
+
+
+def pfs_game_files(rng, count, profile, total_size, pattern, zero_fraction):
+    """Árvore de arquivos de jogo para a imagem PFS"""
+    files = {"eboot.bin": _elf_header(64 * 1024) + pattern[:64 * 1024 - 120]}
+    for i, size in enumerate(entry_sizes(rng, count, profile, total_size)):
+        folder = "sce_module" if i % 10 == 0 else f"data/{i % 7:02d}"
+        data = bytearray()
+        while len(data) < size:
+            n = min(len(pattern), size - len(data))
+            if zero_fraction and rng.random() < zero_fraction:
+                data += bytes(n)
+            else:
+                start = rng.randrange(0, len(pattern) - n + 1)
+                data += pattern[start:start + n]
+        files[f"{folder}/file{i:04d}.bin"] = bytes(data)
+    return files
+
+
+def generate_pkg(path, entries=100, profile="mixed", total_size=64 * 1024 * 1024,
+                 types=CONTENT_TYPES, seed=0, zero_fraction=0.0, pfs_files=0,
+                 pfs_compressed=True, title_id="CUSA00000", app_ver="01.00"):
+    """Gera um PKG sintético e retorna a lista de (id, offset, size, tipo)
+
+    Com `pfs_files`, também grava uma imagem PFS no fim do PKG (apontada
+    por pfs_image_offset/size no header). A entrada 0x1000, se existir,
+    é um param.sfo com `title_id` e `app_ver`.
+    """
+    rng = random.Random(seed)
+    sizes = entry_sizes(rng, entries, profile, total_size)
+    ids = entry_ids(entries)
+    kinds = [rng.choice(types) for _ in range(entries)]
+    pattern = bytes(rng.getrandbits(8) for _ in range(PATTERN_SIZE))
+
+    table_size = entries * TABLE_ENTRY_STRUCT.size
+    data_offset = (TABLE_OFFSET + table_size + 0xFFF) & ~0xFFF
+
+    content_id = f"UP0000-{title_id}_00-SYNTHETIC0000000"[:0x24]
+    sfo = build_sfo({"TITLE_ID": title_id, "CONTENT_ID": content_id, "APP_VER": app_ver,
+                     "VERSION": app_ver, "CATEGORY": "gd", "TITLE": f"Synthetic {title_id}",
+                     "APP_TYPE": 1})
+
+    layout = []
+    offset = data_offset
+    for entry_id, size, kind in zip(ids, sizes, kinds):
+        if entry_id == PARAM_SFO_ID:
+            size, kind = len(sfo), "sfo"
+        layout.append((entry_id, offset, size, kind))
+        offset += (size + DATA_ALIGN - 1) // DATA_ALIGN * DATA_ALIGN
+    pfs_image = b''
+    if pfs_files:
+        files = pfs_game_files(rng, pfs_files, profile, total_size, pattern, zero_fraction)
+        if pfs_compressed:
+            # Como nos PKGs reais: o PFS externo guarda o interno em PFSC
+            inner = build_pfs(files)
+            pfs_image = build_pfs({NESTED_IMAGE: inner}, compressed={NESTED_IMAGE})
+        else:
+            pfs_image = build_pfs(files)
+    pfs_offset = (offset + PFS_ALIGN - 1) // PFS_ALIGN * PFS_ALIGN if pfs_image else 0
+    file_size = pfs_offset + len(pfs_image) if pfs_image else offset
+
+    header = bytearray(HEADER_SIZE)
+    struct.pack_into('>I', header, 0x00, PKG_MAGIC)
+    struct.pack_into('>I', header, 0x04, 1)
+    struct.pack_into('>I', header, 0x10, entries)
+    struct.pack_into('>HH', header, 0x14, entries, entries)
+    struct.pack_into('>I', header, 0x18, TABLE_OFFSET)
+    struct.pack_into('>I', header, 0x1C, table_size)
+    struct.pack_into('>QQ', header, 0x20, TABLE_OFFSET, file_size - TABLE_OFFSET)
+    header[0x40:0x64] = content_id.encode('ascii').ljust(0x24, b'\x00')
+    struct.pack_into('>QQ', header, PFS_HEADER_FIELDS, pfs_offset, len(pfs_image))
+
+    with open(path, 'wb') as f:
+        f.write(header)
+        f.write(b'\x00' * (TABLE_OFFSET - HEADER_SIZE))
+        for entry_id, entry_offset, size, kind in layout:
+            f.write(TABLE_ENTRY_STRUCT.pack(entry_id, 0, 0, 0, entry_offset, size, 0))
+        f.write(b'\x00' * (data_offset - TABLE_OFFSET - table_size))
+
+        for entry_id, entry_offset, size, kind in layout:
+            if kind == "sfo":
+                f.write(sfo)
+                f.write(b'\x00' * ((-size) % DATA_ALIGN))
+                continue
+            prefix, suffix = content_prefix_suffix(kind, size)
+            f.write(prefix)
+            _write_payload(f, size - len(prefix) - len(suffix), pattern, zero_fraction, rng)
+            f.write(suffix)
+            f.write(b'\x00' * ((-size) % DATA_ALIGN))
+
+        if pfs_image:
+            f.write(b'\x00' * (pfs_offset - f.tell()))
+            f.write(pfs_image)
+
+    return layout
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Gera um PKG PS4 sintético para benchmarks")
+    parser.add_argument("output", help="Arquivo .pkg a criar")
+    parser.add_argument("-n", "--entries", type=int, default=100, help="Número de entradas")
+    parser.add_argument("-p", "--profile", choices=PROFILES, default="mixed",
+                        help="Distribuição de tamanhos (padrão: mixed)")
+    parser.add_argument("-s", "--total-size", default="64M",
+                        help="Tamanho total aproximado dos dados, ex.: 512M, 10G")
+    parser.add_argument("-t", "--types", default=",".join(CONTENT_TYPES),
+                        help="Tipos de conteúdo separados por vírgula (elf,psf,png,xml,raw)")
+    parser.add_argument("--zero-fraction", type=float, default=0.0,
+                        help="Fração de blocos de 1MB preenchidos com zeros")
+    parser.add_argument("--pfs-files", type=int, default=0,
+                        help="Inclui uma imagem PFS com este número de arquivos")
+    parser.add_argument("--pfs-uncompressed", action="store_true",
+                        help="Grava os arquivos direto no PFS externo, sem PFSC")
+    parser.add_argument("--title-id", default="CUSA00000",
+                        help="TITLE_ID do param.sfo e do content ID (padrão: CUSA00000)")
+    parser.add_argument("--app-ver", default="01.00", help="APP_VER do param.sfo (padrão: 01.00)")
+    parser.add_argument("--seed", type=int, default=0, help="Semente (mesma semente, mesmo PKG)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    types = tuple(t.strip() for t in args.types.split(",") if t.strip())
+    unknown = set(types) - set(CONTENT_TYPES)
+    if unknown:
+        print(f"Tipos desconhecidos: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+
+    layout = generate_pkg(args.output, entries=args.entries, profile=args.profile,
+                          total_size=parse_size(args.total_size), types=types,
+                          seed=args.seed, zero_fraction=args.zero_fraction,
+                          pfs_files=args.pfs_files, pfs_compressed=not args.pfs_uncompressed,
+                          title_id=args.title_id, app_ver=args.app_ver)
+    total = sum(size for _, _, size, _ in layout)
+    print(f"{args.output}: {len(layout)} entradas, {total / (1024*1024):.2f} MB de dados")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
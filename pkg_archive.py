@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Extração direta para arquivos tar/zip (ou stdout)
+As entradas saem do PKG em ordem de offset e vão direto para o pacote,
+sem passar por <pkg>_extracted/ no disco. A memória usada é limitada ao
+buffer de cópia, então funciona com PKGs de vários GB através de pipes.
+"""
+
+import io
+import os
+import sys
+import json
+import gzip
+import time
+import tarfile
+import zipfile
+from datetime import datetime
+
+from pkg_core import (PkgExtractor, PkgError, EntryFile, ProgressTracker, INFO_FILENAME,
+                      EXTRA_DIRS, PARTIAL_SUFFIX, entry_path, format_size)
+from pkg_hash import MultiHasher
+from pkg_plan import plan_reads
+
+try:
+    import zstandard
+except ImportError:  # zstd é opcional
+    zstandard = None
+
+ARCHIVE_FORMATS = ("tar", "tar.gz", "tar.zst", "zip")
+# Extensões reconhecidas no nome do arquivo de saída
+_SUFFIXES = (
+    (".tar.gz", "tar.gz"), (".tgz", "tar.gz"),
+    (".tar.zst", "tar.zst"), (".tzst", "tar.zst"),
+    (".tar", "tar"), (".zip", "zip"),
+)
+
+COPY_BUFSIZE = 1024 * 1024
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+STDOUT = "-"
+
+
+def detect_format(path, default="tar"):
+    """Formato pelo nome do arquivo de saída (stdout usa `default`)"""
+    lower = path.lower()
+    for suffix, archive_format in _SUFFIXES:
+        if lower.endswith(suffix):
+            return archive_format
+    return default
+
+
+class _CountingReader(io.RawIOBase):
+    """Lê de outro arquivo alimentando hashes e progresso no caminho"""
+
+    def __init__(self, source, hasher=None, on_copy=None):
+        super().__init__()
+        self._source = source
+        self._hasher = hasher
+        self._on_copy = on_copy
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        data = self._source.read(size)
+        if data:
+            if self._hasher is not None:
+                self._hasher.update(data)
+            if self._on_copy is not None:
+                self._on_copy(len(data))
+        return data
+
+
+class _DetachableOutput:
+    """Saída do compressor que pode ser desligada: depois de `detach`, nada mais é gravado"""
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+
+    def write(self, data):
+        if self.fileobj is None:
+            return len(data)
+        return self.fileobj.write(data)
+
+    def flush(self):
+        if self.fileobj is not None:
+            self.fileobj.flush()
+
+    def detach(self):
+        self.fileobj = None
+
+
+class TarSink:
+    """tar em modo stream (sem seek), opcionalmente comprimido com gzip ou zstd"""
+
+    def __init__(self, fileobj, compression=None):
+        self._compressor = None
+        # gzip e zstd gravam o fim do stream ao fechar (até no coletor de lixo)
+        self._output = _DetachableOutput(fileobj)
+        if compression == "gz":
+            self._compressor = gzip.GzipFile(filename="", mode="wb", fileobj=self._output,
+                                             compresslevel=GZIP_LEVEL)
+            fileobj = self._compressor
+        elif compression == "zst":
+            self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL, threads=-1).stream_writer(
+                self._output, closefd=False)
+            fileobj = self._compressor
+
+        self._tar = tarfile.open(fileobj=fileobj, mode="w|", bufsize=COPY_BUFSIZE,
+                                 copybufsize=COPY_BUFSIZE, format=tarfile.PAX_FORMAT)
+
+    def _info(self, path, size, mtime):
+        info = tarfile.TarInfo(path)
+        info.size = size
+        info.mtime = mtime
+        info.mode = 0o644
+        return info
+
+    def add_file(self, path, size, fileobj, mtime):
+        self._tar.addfile(self._info(path, size, mtime), fileobj)
+
+    def add_directory(self, path, mtime):
+        info = self._info(path, 0, mtime)
+        info.type = tarfile.DIRTYPE
+        info.mode = 0o755
+        self._tar.addfile(info)
+
+    def add_bytes(self, path, data, mtime):
+        self.add_file(path, len(data), io.BytesIO(data), mtime)
+
+    def close(self):
+        self._tar.close()
+        if self._compressor is not None:
+            self._compressor.close()
+
+    def abort(self):
+        """Descarta o arquivo sem gravar o final (nem no coletor de lixo)"""
+        self._tar.closed = self._tar.fileobj.closed = True
+        self._output.detach()
+
+
+class ZipSink:
+    """zip sem compressão (conteúdo de PKG já é comprimido); aceita saída sem seek"""
+
+    def __init__(self, fileobj):
+        self._zip = zipfile.ZipFile(fileobj, mode="w", compression=zipfile.ZIP_STORED,
+                                    allowZip64=True)
+
+    def add_file(self, path, size, fileobj, mtime):
+        info = zipfile.ZipInfo(path, date_time=time.localtime(max(mtime, 315532800))[:6])
+        info.file_size = size
+        info.external_attr = 0o644 << 16
+        with self._zip.open(info, "w", force_zip64=size >= zipfile.ZIP64_LIMIT) as dst:
+            while True:
+                chunk = fileobj.read(COPY_BUFSIZE)
+                if not chunk:
+                    break
+                dst.write(chunk)
+
+    def add_directory(self, path, mtime):
+        info = zipfile.ZipInfo(path.rstrip("/") + "/", date_time=time.localtime(max(mtime, 315532800))[:6])
+        info.external_attr = (0o40755 << 16) | 0x10
+        self._zip.writestr(info, b"")
+
+    def add_bytes(self, path, data, mtime):
+        self.add_file(path, len(data), io.BytesIO(data), mtime)
+
+    def close(self):
+        self._zip.close()
+
+    def abort(self):
+        """Descarta o arquivo sem gravar o diretório central"""
+        self._zip.fp = None
+
+
+def open_sink(fileobj, archive_format):
+    if archive_format == "tar":
+        return TarSink(fileobj)
+    if archive_format == "tar.gz":
+        return TarSink(fileobj, "gz")
+    if archive_format == "tar.zst":
+        return TarSink(fileobj, "zst")
+    if archive_format == "zip":
+        return ZipSink(fileobj)
+    raise PkgError(f"Formato de arquivo desconhecido: {archive_format}")
+
+
+class ArchiveExtractor(PkgExtractor):
+    """Extrai as entradas para um tar/zip em vez de um diretório
+
+    Usa o mesmo filtro, nomes e plano de leitura da extração normal; o
+    relatório vai como último membro, em <pkg>_extracted/extraction_info.json.
+    """
+
+    def __init__(self, reader, archive_path, archive_format=None, format_filter="*.*", log=None,
+                 progress=None, recovery=False, hashes=(), coalesce=True):
+        super().__init__(reader, format_filter=format_filter, log=log, progress=progress,
+                         recovery=recovery, hashes=hashes, coalesce=coalesce)
+        self.archive_path = archive_path
+        self.archive_format = archive_format or detect_format(archive_path)
+        if self.archive_format not in ARCHIVE_FORMATS:
+            raise PkgError(f"Formato de arquivo desconhecido: {self.archive_format}")
+        if self.archive_format == "tar.zst" and zstandard is None:
+            raise PkgError("Compressão zstd requer o pacote opcional 'zstandard' "
+                           "(pip install zstandard)")
+        self.root = os.path.basename(self.extract_dir)
+        self.mtime = int(os.stat(reader.path).st_mtime)
+
+    def extract(self):
+        """Gera o arquivo completo e retorna o dicionário do relatório"""
+        reader = self.reader
+        target = "stdout" if self.archive_path == STDOUT else self.archive_path
+        self.log(f"Iniciando extração para arquivo {self.archive_format}...", "info")
+        self.log(f"Destino: {target}", "info")
+
+        all_entries = reader.entries(recovery=self.recovery)
+        if len(all_entries) == 0:
+            self.log("Nenhuma entrada válida encontrada!", "error")
+            raise PkgError("Não foi possível localizar entradas no PKG")
+
+        filter_started = time.perf_counter()
+        selected = self._select_entries(all_entries)
+        filter_seconds = time.perf_counter() - filter_started
+        tracker = ProgressTracker(sum(e.size for e in selected), len(selected), self.progress)
+        self._tracker = tracker
+
+        # Arquivo incompleto nunca fica com o nome final: grava em .part e renomeia no fim
+        part_path = None
+        if self.archive_path == STDOUT:
+            out = sys.stdout.buffer
+        else:
+            part_path = self.archive_path + PARTIAL_SUFFIX
+            out = open(part_path, "wb")
+
+        copy_started = time.perf_counter()
+        results = [None] * len(selected)
+        sink = None
+        try:
+            sink = open_sink(out, self.archive_format)
+            # Um único fluxo de saída: leituras em ordem de offset, sem threads
+            for batch in plan_reads(selected, coalesce=self.coalesce):
+                buffer = None
+                if batch.coalesced:
+                    buffer = reader.read_at(batch.offset, batch.size)
+                for i, entry in batch.items:
+                    data = None
+                    if buffer is not None:
+                        start = entry.offset - batch.offset
+                        data = buffer[start:start+entry.size]
+                    results[i] = self._archive_entry(sink, entry, data)
+                    tracker.entry_done()
+            copy_seconds = time.perf_counter() - copy_started
+
+            # Mesma estrutura de diretórios adicional da extração em pasta
+            for dir_name in EXTRA_DIRS:
+                sink.add_directory(f"{self.root}/{dir_name}", self.mtime)
+
+            files = [record for record in results if record is not None]
+            extraction_info = {
+                "pkg_file": os.path.basename(reader.path),
+                "extraction_date": datetime.now().isoformat(),
+                "archive": target,
+                "archive_format": self.archive_format,
+                "format_filter": self.format_filter,
+                "total_entries_found": len(all_entries),
+                "extracted_files": len(files),
+                "files": files,
+            }
+            if not self.filter.matches_everything:
+                extraction_info["selected_entries"] = len(selected)
+            if self.hashes:
+                extraction_info["hash_algorithms"] = list(self.hashes)
+
+            timings = dict(reader.timings)
+            timings["filter"] = filter_seconds
+            timings["copy"] = copy_seconds
+            extraction_info["bytes_total"] = tracker.bytes_total
+            extraction_info["bytes_copied"] = tracker.bytes_copied
+            extraction_info["throughput_mb_s"] = round(
+                tracker.bytes_copied / copy_seconds / (1024*1024) if copy_seconds > 0 else 0.0, 3)
+            extraction_info["timings"] = {phase: round(s, 6) for phase, s in timings.items()}
+
+            report = json.dumps(extraction_info, indent=2, ensure_ascii=False).encode("utf-8")
+            sink.add_bytes(f"{self.root}/{INFO_FILENAME}", report, self.mtime)
+            sink.close()
+            if part_path is not None:
+                out.close()
+                os.replace(part_path, self.archive_path)
+        except BaseException:
+            if sink is not None:
+                sink.abort()
+            if part_path is not None:
+                try:
+                    out.close()
+                finally:
+                    os.remove(part_path)
+            raise
+        finally:
+            if part_path is None:
+                out.flush()
+
+        self.log(f"\n{'='*50}", "info")
+        self.log(f"✅ EXTRAÇÃO COMPLETA CONCLUÍDA!", "success")
+        self.log(f"📦 Arquivo: {target}", "info")
+        self.log(f"📊 Arquivos extraídos: {len(files)} de {len(all_entries)} encontrados", "info")
+        self.log(
+            f"⏱ {format_size(tracker.bytes_copied)} copiados em {copy_seconds:.2f}s "
+            f"({extraction_info['throughput_mb_s']:.1f} MB/s)",
+            "info"
+        )
+        self.log(f"{'='*50}", "info")
+        return extraction_info
+
+    def _archive_entry(self, sink, entry, data=None):
+        """Grava uma entrada no arquivo e retorna o registro do relatório"""
+        filename, subdir = self.reader.entry_name(entry, data)
+        path = entry_path(filename, subdir)
+        if not self.filter.accepts(entry.id, entry.size, path):
+            self._tracker.skipped(entry.size)
+            return None
+
+        # O tamanho do membro vai no header, antes dos dados: entradas cortadas
+        # pelo fim do PKG entram só com os bytes que existem
+        size = max(0, min(entry.size, self.reader.file_size - entry.offset))
+        started = time.perf_counter()
+        if data is not None:
+            source = io.BytesIO(data[:size])
+        else:
+            source = EntryFile(self.reader, entry.offset, size, name=filename)
+        hasher = MultiHasher(self.hashes) if self.hashes else None
+        sink.add_file(f"{self.root}/{path}", size,
+                      _CountingReader(source, hasher, self._tracker.copied), self.mtime)
+        if size < entry.size:
+            self._tracker.skipped(entry.size - size)
+
+        record = {
+            "name": filename,
+            "path": path,
+            "size": size,
+            "id": entry.id,
+            "offset": entry.offset,
+            "copy_seconds": round(time.perf_counter() - started, 6),
+        }
+        if hasher is not None:
+            record["hashes"] = hasher.hexdigests()
+        self.log(f"✓ {path} ({format_size(entry.size)})", "success")
+        return record
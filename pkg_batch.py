@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Extração em lote de vários PKGs
+Cada PKG roda em um processo separado (pool), com limites independentes
+para pacotes simultâneos e para bytes em andamento. Os maiores começam
+primeiro, para que o último a terminar não seja um pacote enorme. Cada
+pacote gera seu próprio extraction_info.json e o lote um resumo geral.
+"""
+
+import os
+import json
+import time
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from pkg_core import PkgReader, PkgExtractor, PkgError, format_size
+from pkg_cache import IndexCache
+
+PKG_SUFFIX = ".pkg"
+SUMMARY_FILENAME = "batch_summary.json"
+
+
+def _null_log(message, log_type="info"):
+    pass
+
+
+def collect_packages(paths):
+    """Arquivos .pkg das listas e diretórios informados (diretórios são percorridos)"""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                found.extend(os.path.join(root, name) for name in sorted(files)
+                             if name.lower().endswith(PKG_SUFFIX))
+        else:
+            found.append(path)
+
+    # Mesmo PKG informado duas vezes (ex.: diretório e arquivo) roda uma vez
+    unique = []
+    seen = set()
+    for path in found:
+        key = os.path.realpath(path)
+        if key not in seen:
+            seen.add(key)
+            unique.append(path)
+    return unique
+
+
+def _extract_package(path, output_base, options, cache_dir, use_cache):
+    """Extrai um PKG (roda no processo do pool); retorna o resultado resumido"""
+    started = time.perf_counter()
+    result = {"pkg": path, "size": os.path.getsize(path)}
+    try:
+        cache = IndexCache(cache_dir) if use_cache else None
+        with PkgReader(path, cache=cache) as reader:
+            extractor = PkgExtractor(reader, output_base=output_base, **options)
+            info = extractor.extract()
+        result.update({
+            "status": "ok",
+            "extract_directory": extractor.extract_dir,
+            "extracted_files": info["extracted_files"],
+            "bytes_copied": info["bytes_copied"],
+        })
+    except (PkgError, OSError, ValueError) as e:
+        result.update({"status": "error", "error": str(e)})
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+class BatchExtractor:
+    """Agenda a extração de vários PKGs em um pool de processos
+
+    `max_packages` limita os pacotes simultâneos e `max_inflight_bytes` a
+    soma dos tamanhos dos pacotes em andamento (0 = sem limite; um pacote
+    maior que o limite roda sozinho). `io_workers` é o total de threads de
+    cópia, dividido entre os pacotes simultâneos.
+    """
+
+    def __init__(self, packages, output_base, max_packages=2, max_inflight_bytes=0,
+                 io_workers=4, options=None, cache_dir=None, use_cache=True, log=None):
+        self.packages = packages
+        self.output_base = output_base
+        self.max_packages = max(1, max_packages)
+        self.max_inflight_bytes = max_inflight_bytes
+        self.io_workers = max(1, io_workers)
+        self.options = dict(options or {})
+        self.options.setdefault("jobs", max(1, self.io_workers // self.max_packages))
+        self.cache_dir = cache_dir
+        self.use_cache = use_cache
+        self.log = log or _null_log
+
+    def _jobs_by_size(self):
+        jobs = []
+        names = {}
+        failures = []
+        for path in self.packages:
+            try:
+                size = os.path.getsize(path)
+            except OSError as e:
+                failures.append({"pkg": path, "size": 0, "status": "error", "error": str(e)})
+                continue
+            # Mesmo nome geraria a mesma pasta <nome>_extracted
+            name = os.path.splitext(os.path.basename(path))[0]
+            if name in names:
+                failures.append({"pkg": path, "size": size, "status": "error",
+                                 "error": f"Nome repetido (mesma pasta de saída que {names[name]})"})
+                continue
+            names[name] = path
+            jobs.append((size, path))
+        jobs.sort(key=lambda job: job[0], reverse=True)
+        return jobs, failures
+
+    def _next_job(self, pending, inflight_bytes, running):
+        """Maior pacote pendente que cabe no limite de bytes (ou o maior, se nada roda)"""
+        if not pending:
+            return None
+        if not self.max_inflight_bytes or not running:
+            return pending.pop(0)
+        for i, (size, path) in enumerate(pending):
+            if inflight_bytes + size <= self.max_inflight_bytes:
+                return pending.pop(i)
+        return None
+
+    def run(self):
+        """Executa o lote e retorna o resumo (também gravado em batch_summary.json)"""
+        os.makedirs(self.output_base, exist_ok=True)
+        pending, results = self._jobs_by_size()
+        total = len(pending) + len(results)
+        total_bytes = sum(size for size, _ in pending)
+        self.log(f"Lote: {len(pending)} PKGs ({format_size(total_bytes)}), até {self.max_packages} "
+                 f"simultâneos, {self.options['jobs']} threads de cópia cada", "info")
+        for failure in results:
+            self.log(f"❌ {failure['pkg']}: {failure['error']}", "error")
+
+        started = time.perf_counter()
+        running = {}
+        inflight_bytes = 0
+        done = len(results)
+        pool = ProcessPoolExecutor(max_workers=self.max_packages)
+        try:
+            while pending or running:
+                while len(running) < self.max_packages:
+                    job = self._next_job(pending, inflight_bytes, running)
+                    if job is None:
+                        break
+                    size, path = job
+                    future = pool.submit(_extract_package, path, self.output_base,
+                                         self.options, self.cache_dir, self.use_cache)
+                    running[future] = job
+                    inflight_bytes += size
+                    self.log(f"▶ {os.path.basename(path)} ({format_size(size)})", "info")
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    size, path = running.pop(future)
+                    inflight_bytes -= size
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        # Ex.: processo do pool encerrado por falta de memória
+                        result = {"pkg": path, "size": size, "status": "error", "error": str(e)}
+                    results.append(result)
+                    done += 1
+                    self._log_result(result, done, total)
+        except KeyboardInterrupt:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        pool.shutdown()
+
+        summary = self._summary(results, time.perf_counter() - started)
+        with open(os.path.join(self.output_base, SUMMARY_FILENAME), 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+
+        self.log(f"\n{'='*50}", "info")
+        self.log(f"Lote concluído: {summary['succeeded']} ok, {summary['failed']} com erro, "
+                 f"{summary['throughput_mb_s']:.1f} MB/s no total", "success")
+        self.log(f"📁 Resumo: {os.path.join(self.output_base, SUMMARY_FILENAME)}", "info")
+        self.log(f"{'='*50}", "info")
+        return summary
+
+    def _log_result(self, result, done, total):
+        name = os.path.basename(result["pkg"])
+        if result["status"] == "ok":
+            rate = result["bytes_copied"] / result["seconds"] / (1024*1024) if result["seconds"] else 0
+            self.log(f"✓ [{done}/{total}] {name}: {result['extracted_files']} arquivos "
+                     f"em {result['seconds']:.1f}s ({rate:.1f} MB/s)", "success")
+        else:
+            self.log(f"❌ [{done}/{total}] {name}: {result['error']}", "error")
+
+    def _summary(self, results, seconds):
+        # Mesma ordem da entrada, independente da ordem de conclusão
+        order = {path: i for i, path in enumerate(self.packages)}
+        results.sort(key=lambda r: order.get(r["pkg"], len(order)))
+        bytes_copied = sum(r.get("bytes_copied", 0) for r in results)
+        failures = [{"pkg": r["pkg"], "error": r["error"]} for r in results if r["status"] != "ok"]
+        return {
+            "batch_date": datetime.now().isoformat(),
+            "output_directory": self.output_base,
+            "max_packages": self.max_packages,
+            "max_inflight_bytes": self.max_inflight_bytes,
+            "jobs_per_package": self.options["jobs"],
+            "packages": len(results),
+            "succeeded": len(results) - len(failures),
+            "failed": len(failures),
+            "bytes_copied": bytes_copied,
+            "seconds": round(seconds, 3),
+            "throughput_mb_s": round(bytes_copied / seconds / (1024*1024) if seconds > 0 else 0.0, 3),
+            "failures": failures,
+            "results": results,
+        }
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache persistente do índice de PKGs
+Guarda header, tabela de entradas e nomes detectados para que reabrir
+o mesmo PKG não precise escanear a tabela nem ler o conteúdo das entradas
+"""
+
+import os
+import sys
+import json
+import hashlib
+
+CACHE_VERSION = 2
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def default_cache_dir():
+    """Diretório de cache do usuário, conforme o sistema operacional"""
+    env_dir = os.environ.get("PKG_EXTRACTOR_CACHE_DIR")
+    if env_dir:
+        return env_dir
+    if sys.platform.startswith("win"):
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "pkg-conversor", "cache")
+    if sys.platform == "darwin":
+        return os.path.join(os.path.expanduser("~"), "Library", "Caches", "pkg-conversor")
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "pkg-conversor")
+
+
+class IndexCache:
+    """Índices de PKG em disco, com remoção LRU quando passa de `max_bytes`"""
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = os.path.join(cache_dir or default_cache_dir(), "index")
+        self.max_bytes = max_bytes
+
+    def key_for(self, path, header_data):
+        """Chave do PKG: caminho, tamanho, mtime e hash do header"""
+        st = os.stat(path)
+        key = hashlib.sha256()
+        key.update(os.path.abspath(path).encode("utf-8", "surrogateescape"))
+        key.update(f"|{st.st_size}|{st.st_mtime_ns}|".encode("ascii"))
+        key.update(hashlib.sha256(header_data).digest())
+        return key.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def load(self, key):
+        """Retorna o índice salvo, ou None se não existir ou estiver inválido"""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if data.get("version") != CACHE_VERSION:
+            return None
+
+        # Marca como usado recentemente (LRU por mtime)
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return data
+
+    def store(self, key, data):
+        """Grava o índice de forma atômica e aplica o limite de tamanho"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        data = dict(data, version=CACHE_VERSION)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """Remove os índices menos usados até caber em `max_bytes`"""
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+
+        files = []
+        total = 0
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+
+        files.sort()
+        for mtime, size, path in files:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        """Apaga todos os índices"""
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        for name in names:
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
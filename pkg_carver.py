@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Recuperação de arquivos por assinatura (carving) em PKGs danificados
+Varre o PKG uma única vez em janelas de tamanho fixo, procurando todas as
+assinaturas ao mesmo tempo, e calcula o tamanho de cada arquivo pelo formato
+"""
+
+import re
+import struct
+
+from pkg_sfo import (SfoError, SFO_MAGIC, SFO_HEADER_STRUCT, SFO_INDEX_STRUCT, MAX_SFO_SIZE,
+                     parse_header)
+
+WINDOW_SIZE = 16 * 1024 * 1024
+
+ELF_MAGIC = b'\x7FELF'
+PNG_MAGIC = b'\x89PNG\r\n\x1a\n'
+OGG_MAGIC = b'OggS'
+
+# assinatura -> (tipo, extensão)
+SIGNATURES = {
+    ELF_MAGIC: ("elf", ".elf"),
+    SFO_MAGIC: ("sfo", ".sfo"),
+    PNG_MAGIC: ("png", ".png"),
+    OGG_MAGIC: ("ogg", ".ogg"),
+}
+
+CARVED_SUBDIR = "carved"
+PNG_IEND = b'IEND'
+OGG_EOS_FLAG = 0x04
+
+_SIGNATURE_RE = re.compile(b'|'.join(re.escape(sig) for sig in SIGNATURES))
+_OVERLAP = max(len(sig) for sig in SIGNATURES) - 1
+
+
+class CarvedFile:
+    """Arquivo encontrado por assinatura"""
+
+    __slots__ = ('kind', 'offset', 'size', 'extension')
+
+    def __init__(self, kind, offset, size, extension):
+        self.kind = kind
+        self.offset = offset
+        self.size = size
+        self.extension = extension
+
+    @property
+    def filename(self):
+        return f"{self.kind}_{self.offset:010X}{self.extension}"
+
+    def __repr__(self):
+        return f"CarvedFile({self.kind}, offset=0x{self.offset:X}, size={self.size})"
+
+
+class SignatureCarver:
+    """Procura arquivos conhecidos (ELF, SFO, PNG, Ogg) em qualquer posição do PKG
+
+    Usa memória limitada: cada janela é uma fatia do PKG mapeado, e os
+    tamanhos são resolvidos lendo só os headers/chunks de cada formato.
+    """
+
+    def __init__(self, reader, window_size=WINDOW_SIZE, skip_nested=True):
+        self.reader = reader
+        self.window_size = window_size
+        self.skip_nested = skip_nested
+        self._resolvers = {
+            "elf": self._elf_size,
+            "sfo": self._sfo_size,
+            "png": self._png_size,
+            "ogg": self._ogg_size,
+        }
+
+    def scan(self, start=0, end=None):
+        """Gera os arquivos encontrados, em ordem de offset"""
+        file_size = self.reader.file_size
+        end = file_size if end is None else min(end, file_size)
+        carved_end = start
+        pos = start
+
+        while pos < end:
+            window_end = min(pos + self.window_size, end)
+            # Sobreposição para não perder assinaturas cortadas entre janelas
+            window = self.reader.view(pos, min(window_end + _OVERLAP, end) - pos)
+            try:
+                for match in _SIGNATURE_RE.finditer(window):
+                    offset = pos + match.start()
+                    if offset >= window_end:
+                        break
+                    if self.skip_nested and offset < carved_end:
+                        continue
+
+                    kind, extension = SIGNATURES[match.group()]
+                    size = self._resolvers[kind](offset, end)
+                    if not size:
+                        continue
+
+                    carved_end = offset + size
+                    yield CarvedFile(kind, offset, size, extension)
+            finally:
+                window.release()
+            pos = window_end
+
+    # Resolução de tamanho por formato (retorna 0 quando não é um arquivo válido)
+
+    def _elf_size(self, offset, end):
+        ident = self.reader.read_at(offset, 64)
+        if len(ident) < 52 or ident[6] != 1:
+            return 0
+
+        elf_class, elf_data = ident[4], ident[5]
+        if elf_data not in (1, 2) or elf_class not in (1, 2):
+            return 0
+        order = '<' if elf_data == 1 else '>'
+
+        if elf_class == 2:
+            if len(ident) < 64:
+                return 0
+            e_phoff, e_shoff = struct.unpack_from(order + 'QQ', ident, 0x20)
+            e_phentsize, e_phnum, e_shentsize, e_shnum = struct.unpack_from(order + 'HHHH', ident, 0x36)
+            ph_fmt, ph_fields = order + 'IIQQQQQQ', (2, 5)      # p_offset, p_filesz
+            sh_fmt, sh_fields = order + 'IIQQQQIIQQ', (4, 5)    # sh_offset, sh_size
+            header_size = 64
+        else:
+            e_phoff, e_shoff = struct.unpack_from(order + 'II', ident, 0x1C)
+            e_phentsize, e_phnum, e_shentsize, e_shnum = struct.unpack_from(order + 'HHHH', ident, 0x2A)
+            ph_fmt, ph_fields = order + 'IIIIIIII', (1, 4)
+            sh_fmt, sh_fields = order + 'IIIIIIIIII', (4, 5)
+            header_size = 52
+
+        if e_phnum == 0 and e_shnum == 0:
+            return 0
+
+        limit = end - offset
+        size = header_size
+
+        tables = (
+            (e_phoff, e_phnum, e_phentsize, ph_fmt, ph_fields, None),
+            (e_shoff, e_shnum, e_shentsize, sh_fmt, sh_fields, 1),
+        )
+        for table_off, count, entsize, fmt, (off_idx, size_idx), type_idx in tables:
+            if count == 0:
+                continue
+            if entsize < struct.calcsize(fmt) or table_off + count * entsize > limit:
+                return 0
+            table = self.reader.read_at(offset + table_off, count * entsize)
+            size = max(size, table_off + count * entsize)
+            for i in range(count):
+                fields = struct.unpack_from(fmt, table, i * entsize)
+                # SHT_NOBITS (.bss) não ocupa espaço no arquivo
+                if type_idx is not None and fields[type_idx] == 8:
+                    continue
+                seg_end = fields[off_idx] + fields[size_idx]
+                if seg_end > limit:
+                    return 0
+                size = max(size, seg_end)
+
+        return size
+
+    def _sfo_size(self, offset, end):
+        try:
+            key_table, data_table, count = parse_header(
+                self.reader.read_at(offset, SFO_HEADER_STRUCT.size))
+        except SfoError:
+            return 0
+        if count == 0:
+            return 0
+
+        index_size = count * SFO_INDEX_STRUCT.size
+        index = self.reader.read_at(offset + SFO_HEADER_STRUCT.size, index_size)
+        if len(index) < index_size:
+            return 0
+
+        size = data_table
+        for i in range(count):
+            key_off, fmt, length, max_length, data_off = SFO_INDEX_STRUCT.unpack_from(
+                index, i * SFO_INDEX_STRUCT.size)
+            size = max(size, data_table + data_off + max_length)
+
+        if size > MAX_SFO_SIZE or offset + size > end:
+            return 0
+        return size
+
+    def _png_size(self, offset, end):
+        pos = offset + len(PNG_MAGIC)
+        while pos + 12 <= end:
+            chunk_header = self.reader.read_at(pos, 8)
+            length = struct.unpack('>I', chunk_header[0:4])[0]
+            chunk_type = chunk_header[4:8]
+            if length > 0x7FFFFFFF or not chunk_type.isalpha():
+                return 0
+            pos += 12 + length
+            if chunk_type == PNG_IEND:
+                return pos - offset if pos <= end else 0
+        return 0
+
+    def _ogg_size(self, offset, end):
+        pos = offset
+        serial = None
+        while pos + 27 <= end:
+            page = self.reader.read_at(pos, 27)
+            if page[0:4] != OGG_MAGIC or page[4] != 0:
+                break
+            header_type = page[5]
+            page_serial = struct.unpack_from('<I', page, 14)[0]
+            if serial is None:
+                serial = page_serial
+            segments = self.reader.read_at(pos + 27, page[26])
+            if len(segments) < page[26]:
+                break
+            pos += 27 + page[26] + sum(segments)
+            if page_serial == serial and header_type & OGG_EOS_FLAG:
+                break
+
+        if pos == offset or pos > end:
+            return 0
+        return pos - offset
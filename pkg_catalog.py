@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Catálogo SQLite de uma biblioteca de PKGs
+Guarda os campos do header, a tabela de entradas e os valores do
+param.sfo de cada PKG. De cada arquivo só são lidos o header, a tabela e
+o param.sfo; arquivos com o mesmo tamanho e mtime da última varredura são
+pulados, então varrer de novo a biblioteca custa só os stat().
+"""
+
+import os
+import time
+import sqlite3
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from pkg_core import PkgReader, PkgError, resolve_entry_name, entry_path
+from pkg_cache import default_cache_dir
+from pkg_batch import collect_packages
+from pkg_sfo import SfoError, parse_sfo, MAX_SFO_SIZE, PARAM_SFO_ID
+
+CATALOG_FILENAME = "catalog.sqlite"
+CATALOG_VERSION = 1
+
+# Campos do header gravados como colunas de `packages`
+HEADER_COLUMNS = ("content_id", "pkg_type", "pkg_revision", "entry_count", "body_offset",
+                  "body_size", "pfs_image_offset", "pfs_image_size")
+# Parâmetros do param.sfo gravados como colunas (todos ficam também em `sfo`)
+SFO_COLUMNS = {"TITLE_ID": "title_id", "TITLE": "title", "APP_VER": "app_ver",
+               "VERSION": "version", "CATEGORY": "category"}
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS packages (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    scanned_at TEXT NOT NULL,
+    valid INTEGER NOT NULL,
+    error TEXT,
+    {", ".join(f"{name} {'TEXT' if name == 'content_id' else 'INTEGER'}" for name in HEADER_COLUMNS)},
+    {", ".join(f"{column} TEXT" for column in SFO_COLUMNS.values())}
+);
+CREATE TABLE IF NOT EXISTS entries (
+    package_id INTEGER NOT NULL REFERENCES packages(id) ON DELETE CASCADE,
+    entry_id INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    path TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sfo (
+    package_id INTEGER NOT NULL REFERENCES packages(id) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    value TEXT
+);
+CREATE INDEX IF NOT EXISTS packages_title_id ON packages(title_id);
+CREATE INDEX IF NOT EXISTS packages_content_id ON packages(content_id);
+CREATE INDEX IF NOT EXISTS packages_size ON packages(size);
+CREATE INDEX IF NOT EXISTS entries_package ON entries(package_id);
+CREATE INDEX IF NOT EXISTS sfo_package ON sfo(package_id);
+CREATE INDEX IF NOT EXISTS sfo_key_value ON sfo(key, value);
+"""
+
+
+def _null_log(message, log_type="info"):
+    pass
+
+
+def default_catalog_path():
+    """Banco padrão, junto do cache de índice do usuário"""
+    return os.path.join(default_cache_dir(), CATALOG_FILENAME)
+
+
+def read_package(path):
+    """Metadados de um PKG lendo só header, tabela e param.sfo
+
+    Os nomes das entradas vêm só do ID (sem sniff do conteúdo). Erros
+    viram o campo "error" em vez de exceção, para o PKG entrar no
+    catálogo mesmo assim.
+    """
+    info = {"path": os.path.abspath(path), "size": 0, "mtime_ns": 0,
+            "valid": False, "error": None, "header": {}, "entries": [], "sfo": {}}
+    try:
+        # Arquivo removido depois da listagem vira registro com erro, não derruba a varredura
+        stat = os.stat(path)
+        info["size"], info["mtime_ns"] = stat.st_size, stat.st_mtime_ns
+        with PkgReader(path) as reader:
+            header = reader.header
+            info["valid"] = header.is_valid
+            info["header"] = {name: getattr(header, name) for name in HEADER_COLUMNS}
+            entries = reader.entries()
+            info["entries"] = [(e.id, e.offset, e.size, entry_path(*resolve_entry_name(e.id)))
+                               for e in entries]
+            sfo = next((e for e in entries if e.id == PARAM_SFO_ID), None)
+            if sfo is not None:
+                info["sfo"] = parse_sfo(reader.read_at(sfo.offset, min(sfo.size, MAX_SFO_SIZE)))
+    except (PkgError, SfoError, OSError, ValueError) as e:
+        info["error"] = str(e)
+    return info
+
+
+class PkgCatalog:
+    """Banco SQLite com os metadados de uma biblioteca de PKGs"""
+
+    def __init__(self, db_path=None, log=None):
+        self.db_path = db_path or default_catalog_path()
+        self.log = log or _null_log
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self.db = sqlite3.connect(self.db_path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA foreign_keys = ON")
+        self.db.execute("PRAGMA journal_mode = WAL")
+        version = self.db.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, CATALOG_VERSION):
+            raise PkgError(f"Catálogo {self.db_path} de versão desconhecida ({version})")
+        self.db.executescript(SCHEMA)
+        self.db.execute(f"PRAGMA user_version = {CATALOG_VERSION}")
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def scan(self, paths, jobs=4, prune=True):
+        """Atualiza o catálogo com os PKGs de `paths` (arquivos e/ou diretórios)
+
+        Só arquivos novos ou com tamanho/mtime diferentes são lidos, com
+        `jobs` threads. Com `prune`, PKGs que sumiram dos diretórios
+        varridos saem do catálogo. Retorna as contagens da varredura.
+        """
+        started = time.perf_counter()
+        found = {os.path.abspath(path) for path in collect_packages(paths)}
+        known = {row["path"]: (row["size"], row["mtime_ns"])
+                 for row in self.db.execute("SELECT path, size, mtime_ns FROM packages")}
+
+        changed = []
+        for path in sorted(found):
+            try:
+                stat = os.stat(path)
+            except OSError as e:
+                self.log(f"❌ {path}: {e}", "error")
+                continue
+            if known.get(path) != (stat.st_size, stat.st_mtime_ns):
+                changed.append(path)
+
+        removed = []
+        if prune:
+            roots = [os.path.join(os.path.abspath(p), "") for p in paths if os.path.isdir(p)]
+            removed = [path for path in known if path not in found
+                       and (any(path.startswith(root) for root in roots) or not os.path.exists(path))]
+
+        self.log(f"Catálogo: {len(found)} PKGs, {len(changed)} novos ou alterados, "
+                 f"{len(removed)} removidos", "info")
+
+        errors = 0
+        with self.db:
+            with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+                for done, info in enumerate(pool.map(read_package, changed), 1):
+                    self._store(info)
+                    if info["error"]:
+                        errors += 1
+                        self.log(f"⚠ {info['path']}: {info['error']}", "warning")
+                    else:
+                        self.log(f"✓ [{done}/{len(changed)}] {info['path']}", "success")
+            self.db.executemany("DELETE FROM packages WHERE path = ?", [(p,) for p in removed])
+
+        return {
+            "packages": len(found),
+            "scanned": len(changed),
+            "skipped": len(found) - len(changed),
+            "removed": len(removed),
+            "errors": errors,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+
+    def _store(self, info):
+        """Substitui o registro do PKG (e suas entradas e parâmetros)"""
+        sfo = info["sfo"]
+        header = info["header"]
+        row = {
+            "path": info["path"],
+            "size": info["size"],
+            "mtime_ns": info["mtime_ns"],
+            "scanned_at": datetime.now().isoformat(),
+            "valid": int(info["valid"]),
+            "error": info["error"],
+        }
+        row.update({name: header.get(name) for name in HEADER_COLUMNS})
+        row.update({column: _sfo_text(sfo.get(key)) for key, column in SFO_COLUMNS.items()})
+
+        self.db.execute("DELETE FROM packages WHERE path = ?", (info["path"],))
+        columns = ", ".join(row)
+        placeholders = ", ".join("?" for _ in row)
+        package_id = self.db.execute(f"INSERT INTO packages ({columns}) VALUES ({placeholders})",
+                                     list(row.values())).lastrowid
+        self.db.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?)",
+                            [(package_id,) + entry for entry in info["entries"]])
+        self.db.executemany("INSERT INTO sfo VALUES (?, ?, ?)",
+                            [(package_id, key, _sfo_text(value)) for key, value in sfo.items()])
+
+    def query(self, title_id=None, content_id=None, app_ver=None, category=None,
+              min_size=None, max_size=None, sfo=None, entry=None):
+        """PKGs que atendem a todas as condições informadas
+
+        `title_id` e `content_id` aceitam curingas do SQLite GLOB (ex.:
+        "CUSA0*"); `sfo` é um dicionário chave -> valor do param.sfo e
+        `entry` um glob do caminho de uma entrada (ex.: "sce_module/*").
+        """
+        conditions = []
+        params = []
+        for column, value in (("title_id", title_id), ("content_id", content_id)):
+            if value is not None:
+                conditions.append(f"p.{column} GLOB ?")
+                params.append(value)
+        for column, value in (("app_ver", app_ver), ("category", category)):
+            if value is not None:
+                conditions.append(f"p.{column} = ?")
+                params.append(value)
+        if min_size is not None:
+            conditions.append("p.size >= ?")
+            params.append(min_size)
+        if max_size is not None:
+            conditions.append("p.size <= ?")
+            params.append(max_size)
+        for key, value in (sfo or {}).items():
+            conditions.append("EXISTS (SELECT 1 FROM sfo s WHERE s.package_id = p.id "
+                              "AND s.key = ? AND s.value = ?)")
+            params += [key, str(value)]
+        if entry is not None:
+            conditions.append("EXISTS (SELECT 1 FROM entries e WHERE e.package_id = p.id "
+                              "AND e.path GLOB ?)")
+            params.append(entry)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self.db.execute(f"SELECT * FROM packages p {where} ORDER BY p.path", params)
+        return [dict(row) for row in rows]
+
+    def package_entries(self, path):
+        """Entradas registradas de um PKG do catálogo"""
+        rows = self.db.execute(
+            "SELECT e.entry_id, e.offset, e.size, e.path FROM entries e "
+            "JOIN packages p ON p.id = e.package_id WHERE p.path = ? ORDER BY e.offset",
+            (os.path.abspath(path),))
+        return [dict(row) for row in rows]
+
+
+def _sfo_text(value):
+    return None if value is None else str(value)
@@ -0,0 +1,490 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Extrator de PKG PS4 - Linha de Comando
+Permite extrair PKGs sem interface gráfica (ex.: servidores sem display)
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+from pkg_core import PkgReader, PkgExtractor, PkgError, format_size
+from pkg_cache import IndexCache
+from pkg_hash import parse_algorithms
+from pkg_filter import parse_size
+from pkg_pfs import PfsError, open_pfs
+from pkg_store import LINK_MODES
+
+# Opções do extract que só valem para a extração em diretório (o --archive não as usa)
+DIRECTORY_ONLY_OPTIONS = (
+    ("output", "-o"), ("jobs", "--jobs"), ("no_zero_copy", "--no-zero-copy"),
+    ("chunk_size", "--chunk-size"), ("queue_depth", "--queue-depth"),
+    ("split_threshold", "--split-threshold"), ("split_size", "--split-size"),
+    ("preallocate", "--no-preallocate"), ("sparse", "--sparse"), ("store", "--store"),
+    ("store_link", "--store-link"), ("pfs", "--pfs"), ("resume", "--resume"),
+    ("verify", "--verify"), ("fsync", "--fsync"),
+)
+
+
+def _print_log(message, log_type="info"):
+    stream = sys.stderr if log_type in ("error", "warning") else sys.stdout
+    print(message, file=stream)
+
+
+def _quiet_log(message, log_type="info"):
+    if log_type in ("error", "warning"):
+        print(message, file=sys.stderr)
+
+
+class _ProgressPrinter:
+    """Linha de progresso no terminal (no máximo 2 atualizações por segundo)"""
+
+    INTERVAL = 0.5
+
+    def __init__(self, stream=sys.stderr):
+        self.stream = stream
+        self._last = 0.0
+
+    def __call__(self, stats):
+        now = time.monotonic()
+        finished = stats.entries_done == stats.entries_total
+        if not finished and now - self._last < self.INTERVAL:
+            return
+        self._last = now
+        end = "\n" if finished else ""
+        self.stream.write(f"\r{stats.fraction*100:5.1f}% | {stats.describe()}\033[K{end}")
+        self.stream.flush()
+
+
+def _hash_algorithms(text):
+    try:
+        return parse_algorithms(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def _size(text):
+    try:
+        return parse_size(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Tamanho inválido: {text}")
+
+
+def _index_cache(args):
+    if getattr(args, "no_cache", False):
+        return None
+    return IndexCache(args.cache_dir)
+
+
+def _stderr_log(message, log_type="info"):
+    print(message, file=sys.stderr)
+
+
+def cmd_extract(args):
+    log = _quiet_log if args.quiet else _print_log
+    if args.archive == "-" and not args.quiet:
+        # stdout é o próprio arquivo: mensagens vão para stderr
+        log = _stderr_log
+    progress = None
+    if args.progress or (args.progress is None and not args.quiet and sys.stderr.isatty()):
+        progress = _ProgressPrinter()
+    with PkgReader(args.pkg, log=log, cache=_index_cache(args)) as reader:
+        if args.archive:
+            from pkg_archive import ArchiveExtractor
+            ArchiveExtractor(
+                reader,
+                args.archive,
+                archive_format=args.archive_format,
+                format_filter=args.filter,
+                log=log,
+                progress=progress,
+                recovery=args.recovery,
+                hashes=args.hash,
+                coalesce=not args.no_coalesce
+            ).extract()
+            return 0
+        extractor = PkgExtractor(
+            reader,
+            output_base=args.output,
+            format_filter=args.filter,
+            log=log,
+            progress=progress,
+            recovery=args.recovery,
+            jobs=args.jobs,
+            zero_copy=not args.no_zero_copy,
+            resume=args.resume,
+            verify=args.verify,
+            fsync=args.fsync,
+            hashes=args.hash,
+            coalesce=not args.no_coalesce,
+            chunk_size=args.chunk_size,
+            queue_depth=args.queue_depth,
+            split_threshold=args.split_threshold,
+            split_size=args.split_size,
+            preallocate=args.preallocate,
+            sparse=args.sparse,
+            pfs=args.pfs,
+            store=args.store,
+            store_link=args.store_link
+        )
+        extractor.extract()
+    return 0
+
+
+def cmd_batch(args):
+    from pkg_batch import BatchExtractor, collect_packages
+    packages = collect_packages(args.paths)
+    if not packages:
+        raise PkgError("Nenhum arquivo .pkg encontrado")
+    options = {
+        "format_filter": args.filter,
+        "recovery": args.recovery,
+        "zero_copy": not args.no_zero_copy,
+        "resume": args.resume,
+        "verify": args.verify,
+        "hashes": args.hash,
+        "sparse": args.sparse,
+        "pfs": args.pfs,
+        "store": args.store,
+        "store_link": args.store_link,
+    }
+    if args.jobs:
+        options["jobs"] = args.jobs
+    summary = BatchExtractor(
+        packages,
+        args.output,
+        max_packages=args.max_packages,
+        max_inflight_bytes=args.max_bytes,
+        io_workers=args.io_workers,
+        options=options,
+        cache_dir=args.cache_dir,
+        use_cache=not args.no_cache,
+        log=_quiet_log if args.quiet else _print_log
+    ).run()
+    return 0 if summary["failed"] == 0 else 1
+
+
+def cmd_diff(args):
+    from pkg_diff import PkgDiff, DIFF_FILENAME
+    log = _quiet_log if args.quiet or args.json else _print_log
+    cache = _index_cache(args)
+    with PkgReader(args.old, log=log, cache=cache) as old, \
+            PkgReader(args.new, log=log, cache=cache) as new:
+        diff = PkgDiff(old, new, recovery=args.recovery, jobs=args.jobs, log=log)
+        report = diff.compare()
+        if args.json:
+            print(json.dumps(report, indent=2, ensure_ascii=False))
+        else:
+            for symbol, key in (("+", "added"), ("-", "removed"), ("*", "modified")):
+                for record in report[key]:
+                    print(f"{symbol} {record['path']} ({record['id']}, {record['size']} bytes)")
+            print(f"{len(report['added'])} adicionadas, {len(report['removed'])} removidas, "
+                  f"{len(report['modified'])} modificadas, {report['unchanged']} iguais "
+                  f"({report['seconds']:.2f}s)")
+        if args.extract:
+            extractor, _ = diff.extract_changed(
+                output_base=args.output,
+                format_filter=args.filter,
+                jobs=args.jobs,
+                hashes=args.hash
+            )
+            with open(os.path.join(extractor.extract_dir, DIFF_FILENAME), 'w',
+                      encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+    return 0
+
+
+def cmd_serve(args):
+    # Importado só aqui: http.server não é usado pela extração
+    from pkg_server import serve
+    log = None if args.quiet else _print_log
+    with PkgReader(args.pkg, log=_quiet_log, cache=_index_cache(args)) as reader:
+        return serve(reader, host=args.host, port=args.port, recovery=args.recovery, log=log)
+
+
+def cmd_info(args):
+    with PkgReader(args.pkg) as reader:
+        info = reader.header.to_dict()
+        info["file_size"] = reader.file_size
+        info["valid"] = reader.header.is_valid
+        if args.pfs:
+            try:
+                image, _ = open_pfs(reader, reader.entries())
+                info["pfs"] = {
+                    "compressed": image.compressed,
+                    "block_size": image.block_size,
+                    "files": [{"path": f.path, "size": f.size, "inode": f.inode.number}
+                              for f in image.files()],
+                }
+            except PfsError as e:
+                info["pfs"] = {"error": str(e)}
+    print(json.dumps(info, indent=2, ensure_ascii=False))
+    return 0
+
+
+def cmd_catalog(args):
+    from pkg_catalog import PkgCatalog
+    with PkgCatalog(args.db, log=_quiet_log if args.quiet else _print_log) as catalog:
+        stats = catalog.scan(args.paths, jobs=args.jobs, prune=not args.no_prune)
+    print(f"{stats['packages']} PKGs: {stats['scanned']} lidos, {stats['skipped']} sem mudança, "
+          f"{stats['removed']} removidos, {stats['errors']} com erro ({stats['seconds']:.2f}s)")
+    return 0
+
+
+def cmd_query(args):
+    from pkg_catalog import PkgCatalog
+    sfo = {}
+    for item in args.sfo:
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise PkgError(f"--sfo espera CHAVE=VALOR: {item}")
+        sfo[key] = value
+    with PkgCatalog(args.db) as catalog:
+        rows = catalog.query(title_id=args.title_id, content_id=args.content_id,
+                             app_ver=args.app_ver, category=args.category,
+                             min_size=args.min_size, max_size=args.max_size,
+                             sfo=sfo, entry=args.entry)
+    if args.json:
+        print(json.dumps(rows, indent=2, ensure_ascii=False))
+    else:
+        for row in rows:
+            print(f"{row['title_id'] or '-':<10} {row['app_ver'] or '-':<6} "
+                  f"{format_size(row['size']):>10}  {row['path']}"
+                  + (f"  ({row['error']})" if row['error'] else ""))
+    return 0
+
+
+def cmd_clear_cache(args):
+    IndexCache(args.cache_dir).clear()
+    print("Cache de índice apagado")
+    return 0
+
+
+def _add_cache_arguments(parser):
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Não usa o cache de índice do PKG")
+    parser.add_argument("--cache-dir", default=None,
+                        help="Diretório do cache de índice (padrão: cache do usuário)")
+
+
+def _add_store_arguments(parser):
+    parser.add_argument("--store", default=None, metavar="DIR",
+                        help="Repositório deduplicado: cada conteúdo é gravado uma vez em DIR "
+                             "e a pasta _extracted recebe links para ele")
+    parser.add_argument("--store-link", default="auto", choices=sorted(LINK_MODES),
+                        help="Como ligar os arquivos ao repositório (padrão: auto = reflink, "
+                             "senão hardlink, senão cópia)")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="pkg_cli",
+        description="Extrator de PKG PS4 (sem argumentos abre a interface gráfica)"
+    )
+    sub = parser.add_subparsers(dest="command")
+
+    p_extract = sub.add_parser("extract", help="Extrai um PKG para um diretório")
+    p_extract.add_argument("pkg", help="Arquivo .pkg")
+    p_extract.add_argument("-o", "--output", default=None,
+                           help="Diretório de saída (padrão: pasta atual)")
+    p_extract.add_argument("-f", "--filter", default="*.*",
+                           help='Filtro de arquivos, ex.: "*.bin *.elf *.oelf", "sce_sys/*", '
+                                '"id:0x1000-0x12FF", "size:>1M" (padrão: *.*)')
+    p_extract.add_argument("--recovery", nargs="?", const="scan", default=None,
+                           choices=["scan", "carve"],
+                           help="PKG danificado: ignora a tabela do header e procura entradas "
+                                "por heurística (scan, padrão) ou arquivos por assinatura (carve)")
+    p_extract.add_argument("-a", "--archive", default=None, metavar="ARQUIVO",
+                           help="Grava direto em um tar/zip (.tar, .tar.gz, .tar.zst, .zip) "
+                                "em vez de um diretório; '-' envia para stdout")
+    p_extract.add_argument("--archive-format", default=None,
+                           choices=["tar", "tar.gz", "tar.zst", "zip"],
+                           help="Formato do --archive (padrão: pela extensão; tar para stdout)")
+    p_extract.add_argument("-j", "--jobs", type=int, default=1,
+                           help="Número de entradas extraídas em paralelo (padrão: 1)")
+    p_extract.add_argument("--no-zero-copy", action="store_true",
+                           help="Desativa a cópia pelo kernel (copy_file_range/sendfile)")
+    p_extract.add_argument("--chunk-size", type=_size, default="8M",
+                           help="Tamanho de cada bloco da cópia em Python (padrão: 8M)")
+    p_extract.add_argument("--queue-depth", type=int, default=4,
+                           help="Blocos em circulação entre leitura e escrita (padrão: 4)")
+    p_extract.add_argument("--split-threshold", type=_size, default="256M",
+                           help="Com -j > 1, entradas a partir deste tamanho são copiadas em "
+                                "faixas paralelas (padrão: 256M)")
+    p_extract.add_argument("--split-size", type=_size, default="64M",
+                           help="Tamanho de cada faixa de uma entrada dividida (padrão: 64M)")
+    p_extract.add_argument("--no-preallocate", dest="preallocate", action="store_false",
+                           help="Não reservar o espaço dos arquivos grandes antes da cópia")
+    p_extract.add_argument("--sparse", action="store_true",
+                           help="Não gravar blocos zerados (viram buracos no arquivo); "
+                                "economiza disco em imagens com padding")
+    _add_store_arguments(p_extract)
+    p_extract.add_argument("--pfs", action="store_true",
+                           help="Extrai os arquivos de dentro da imagem PFS (em app/) "
+                                "em vez de gravar a imagem inteira")
+    p_extract.add_argument("--no-coalesce", action="store_true",
+                           help="Não agrupa entradas pequenas vizinhas em uma única leitura")
+    p_extract.add_argument("--resume", action="store_true",
+                           help="Retoma uma extração anterior, pulando arquivos já completos")
+    p_extract.add_argument("--verify", action="store_true",
+                           help="Com --resume, confere o SHA-256 dos arquivos existentes")
+    p_extract.add_argument("--fsync", action="store_true",
+                           help="Força a gravação em disco (fsync) de cada arquivo extraído")
+    p_extract.add_argument("--hash", type=_hash_algorithms, default=(), metavar="ALGS",
+                           help="Calcula hashes durante a cópia e grava no relatório, "
+                                "ex.: sha256,crc32 (hashlib, crc32 ou adler32)")
+    p_extract.add_argument("--progress", dest="progress", action="store_true", default=None,
+                           help="Mostra barra de progresso com MB/s e ETA (padrão: só em terminal)")
+    p_extract.add_argument("--no-progress", dest="progress", action="store_false",
+                           help="Não mostra barra de progresso")
+    p_extract.add_argument("-q", "--quiet", action="store_true",
+                           help="Mostra apenas avisos e erros")
+    _add_cache_arguments(p_extract)
+    p_extract.set_defaults(func=cmd_extract)
+
+    p_serve = sub.add_parser("serve", help="Serve as entradas do PKG por HTTP, sem extrair")
+    p_serve.add_argument("pkg", help="Arquivo .pkg")
+    p_serve.add_argument("--host", default="127.0.0.1",
+                         help="Endereço de escuta (padrão: 127.0.0.1, só a máquina local)")
+    p_serve.add_argument("-p", "--port", type=int, default=8000,
+                         help="Porta (padrão: 8000; 0 escolhe uma livre)")
+    p_serve.add_argument("--recovery", nargs="?", const="scan", default=None,
+                         choices=["scan", "carve"],
+                         help="PKG danificado: localiza as entradas por heurística ou assinatura")
+    p_serve.add_argument("-q", "--quiet", action="store_true",
+                         help="Não mostra cada requisição")
+    _add_cache_arguments(p_serve)
+    p_serve.set_defaults(func=cmd_serve)
+
+    cpus = os.cpu_count() or 1
+    p_batch = sub.add_parser("batch", help="Extrai vários PKGs (lista ou diretórios) em paralelo")
+    p_batch.add_argument("paths", nargs="+", help="Arquivos .pkg e/ou diretórios com PKGs")
+    p_batch.add_argument("-o", "--output", default=".", help="Diretório de saída (padrão: atual)")
+    p_batch.add_argument("-P", "--max-packages", type=int, default=min(4, cpus),
+                         help="PKGs extraídos ao mesmo tempo, cada um em um processo "
+                              f"(padrão: {min(4, cpus)})")
+    p_batch.add_argument("--max-bytes", type=_size, default=0,
+                         help="Soma máxima do tamanho dos PKGs em andamento, ex.: 32G "
+                              "(padrão: sem limite)")
+    p_batch.add_argument("--io-workers", type=int, default=cpus,
+                         help=f"Total de threads de cópia, divididas entre os PKGs (padrão: {cpus})")
+    p_batch.add_argument("-j", "--jobs", type=int, default=0,
+                         help="Threads de cópia por PKG (substitui a divisão de --io-workers)")
+    p_batch.add_argument("-f", "--filter", default="*.*", help="Filtro de arquivos")
+    p_batch.add_argument("--recovery", nargs="?", const="scan", default=None,
+                         choices=["scan", "carve"], help="Modo de recuperação (ver extract)")
+    p_batch.add_argument("--no-zero-copy", action="store_true",
+                         help="Desativa a cópia pelo kernel")
+    p_batch.add_argument("--resume", action="store_true", help="Retoma extrações anteriores")
+    p_batch.add_argument("--verify", action="store_true",
+                         help="Com --resume, confere o SHA-256 dos arquivos existentes")
+    p_batch.add_argument("--hash", type=_hash_algorithms, default=(),
+                         help="Hashes calculados durante a cópia, ex.: sha256,crc32")
+    p_batch.add_argument("--sparse", action="store_true", help="Não gravar blocos zerados")
+    p_batch.add_argument("--pfs", action="store_true",
+                         help="Extrai os arquivos de dentro da imagem PFS")
+    _add_store_arguments(p_batch)
+    p_batch.add_argument("-q", "--quiet", action="store_true", help="Mostra apenas erros")
+    _add_cache_arguments(p_batch)
+    p_batch.set_defaults(func=cmd_batch)
+
+    p_diff = sub.add_parser("diff", help="Compara dois PKGs (ex.: versão antiga e patch)")
+    p_diff.add_argument("old", help="PKG antigo")
+    p_diff.add_argument("new", help="PKG novo")
+    p_diff.add_argument("--json", action="store_true", help="Mostra o relatório em JSON")
+    p_diff.add_argument("-x", "--extract", action="store_true",
+                        help="Extrai do PKG novo só as entradas adicionadas e modificadas")
+    p_diff.add_argument("-o", "--output", default=None,
+                        help="Diretório de saída do --extract (padrão: pasta atual)")
+    p_diff.add_argument("-f", "--filter", default="*.*",
+                        help="Filtro aplicado às entradas extraídas com --extract")
+    p_diff.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Entradas comparadas/extraídas em paralelo (padrão: 1)")
+    p_diff.add_argument("--hash", type=_hash_algorithms, default=(),
+                        help="Hashes das entradas extraídas com --extract, ex.: sha256")
+    p_diff.add_argument("--recovery", nargs="?", const="scan", default=None,
+                        choices=["scan", "carve"], help="Modo de recuperação (ver extract)")
+    p_diff.add_argument("-q", "--quiet", action="store_true", help="Mostra apenas erros")
+    _add_cache_arguments(p_diff)
+    p_diff.set_defaults(func=cmd_diff)
+
+    p_info = sub.add_parser("info", help="Mostra os campos do header do PKG")
+    p_info.add_argument("pkg", help="Arquivo .pkg")
+    p_info.add_argument("--pfs", action="store_true",
+                        help="Lista também os arquivos da imagem PFS")
+    p_info.set_defaults(func=cmd_info)
+
+    p_catalog = sub.add_parser("catalog", help="Cataloga uma biblioteca de PKGs em SQLite")
+    p_catalog.add_argument("paths", nargs="+", help="Arquivos .pkg e/ou diretórios com PKGs")
+    p_catalog.add_argument("--db", default=None,
+                           help="Banco SQLite (padrão: catalog.sqlite no cache do usuário)")
+    p_catalog.add_argument("-j", "--jobs", type=int, default=8,
+                           help="PKGs lidos em paralelo (padrão: 8)")
+    p_catalog.add_argument("--no-prune", action="store_true",
+                           help="Mantém no catálogo PKGs que não existem mais")
+    p_catalog.add_argument("-q", "--quiet", action="store_true", help="Mostra apenas erros")
+    p_catalog.set_defaults(func=cmd_catalog)
+
+    p_query = sub.add_parser("query", help="Consulta o catálogo de PKGs")
+    p_query.add_argument("--db", default=None,
+                         help="Banco SQLite (padrão: catalog.sqlite no cache do usuário)")
+    p_query.add_argument("--title-id", default=None, help='TITLE_ID, aceita curingas ("CUSA0*")')
+    p_query.add_argument("--content-id", default=None, help="CONTENT_ID, aceita curingas")
+    p_query.add_argument("--app-ver", default=None, help="APP_VER do param.sfo, ex.: 01.02")
+    p_query.add_argument("--category", default=None, help="CATEGORY do param.sfo, ex.: gd, gp")
+    p_query.add_argument("--min-size", type=_size, default=None, help="Tamanho mínimo, ex.: 10G")
+    p_query.add_argument("--max-size", type=_size, default=None, help="Tamanho máximo")
+    p_query.add_argument("--sfo", action="append", default=[], metavar="CHAVE=VALOR",
+                         help="Outro parâmetro do param.sfo (pode repetir)")
+    p_query.add_argument("--entry", default=None,
+                         help='PKGs com uma entrada neste caminho, ex.: "sce_module/*"')
+    p_query.add_argument("--json", action="store_true", help="Mostra os registros em JSON")
+    p_query.set_defaults(func=cmd_query)
+
+    p_cache = sub.add_parser("clear-cache", help="Apaga o cache de índice de PKGs")
+    p_cache.add_argument("--cache-dir", default=None,
+                         help="Diretório do cache de índice (padrão: cache do usuário)")
+    p_cache.set_defaults(func=cmd_clear_cache)
+
+    p_gui = sub.add_parser("gui", help="Abre a interface gráfica")
+    p_gui.set_defaults(func=None)
+
+    return parser
+
+
+def run_gui():
+    # Tkinter só é importado quando a interface é realmente usada
+    from app import main_gui
+    main_gui()
+    return 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        return run_gui()
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None or args.func is None:
+        return run_gui()
+    if args.command == "extract" and args.archive:
+        # Valores padrão já convertidos pelo argparse, para comparar com os informados
+        defaults = parser.parse_args(["extract", "--", args.pkg])
+        ignored = [flag for dest, flag in DIRECTORY_ONLY_OPTIONS
+                   if getattr(args, dest) != getattr(defaults, dest)]
+        if ignored:
+            parser.error(f"--archive não aceita {', '.join(ignored)} (opções da extração em diretório)")
+
+    try:
+        return args.func(args)
+    except (PkgError, OSError) as e:
+        print(f"❌ ERRO: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
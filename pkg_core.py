@@ -0,0 +1,1636 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Núcleo de leitura e extração de PKG PS4 (sem interface gráfica)
+Usado tanto pela interface Tkinter quanto pela linha de comando
+"""
+
+import io
+import os
+import errno
+import shutil
+import mmap
+import struct
+import json
+import hashlib
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+
+from pkg_io import (CHUNK_SIZE, PIPELINE_DEPTH, pread, write_all, write_sparse, preallocate,
+                    copy_range, copy_range_at, CopyPipeline)
+from pkg_hash import MultiHasher
+from pkg_plan import plan_reads
+from pkg_filter import EntryFilter
+from pkg_pfs import PfsError, open_pfs
+from pkg_store import ContentStore, STORE_ALGORITHM
+from pkg_carver import SignatureCarver, CARVED_SUBDIR
+
+PKG_MAGIC = 0x7F434E54
+HEADER_SIZE = 0x1000
+TABLE_ENTRY_SIZE = 32
+# id, filename_offset, flags1, flags2, offset, size, padding
+TABLE_ENTRY_STRUCT = struct.Struct('>IIIIIIQ')
+MAX_ENTRY_SIZE = 2 * 1024 * 1024 * 1024
+
+# Modos de recuperação: "scan" (tabelas em offsets conhecidos) ou "carve" (assinaturas)
+RECOVERY_MODES = ("scan", "carve")
+
+# Offsets onde tabelas de entrada costumam aparecer (apenas modo de recuperação)
+FALLBACK_TABLE_OFFSETS = [0x2A80, 0x3000, 0x4000, 0x1000, 0x2000]
+MAX_ENTRIES_TO_SCAN = 500
+
+# Mapeamento de IDs conhecidos
+KNOWN_ENTRY_NAMES = {
+    0x1: ("eboot.bin", ""),
+    0x1000: ("param.sfo", "sce_sys"),
+    0x1001: ("nptitle.dat", "sce_sys"),
+    0x1002: ("npbind.dat", "sce_sys"),
+    0x1003: ("selfinfo.dat", "sce_sys"),
+    0x1004: ("imageinfo.dat", "sce_sys"),
+    0x1005: ("target-deltainfo.dat", "sce_sys"),
+    0x1006: ("origin-deltainfo.dat", "sce_sys"),
+    0x1007: ("psreserved.dat", "sce_sys"),
+    0x1200: ("icon0.png", "sce_sys"),
+    0x1220: ("pic0.png", "sce_sys"),
+    0x1240: ("pic1.png", "sce_sys"),
+    0x1260: ("snd0.at9", "sce_sys"),
+    0x1280: ("changeinfo.xml", "sce_sys"),
+    0x1300: ("trophy_conf", "sce_sys"),
+    0x400: ("license.dat", "sce_sys"),
+    0x401: ("license.info", "sce_sys"),
+}
+
+EXTRA_DIRS = ["sce_module", "app", "license"]
+
+INFO_FILENAME = "extraction_info.json"
+# Uma linha JSON por entrada concluída; permite retomar extrações interrompidas
+JOURNAL_FILENAME = ".extraction_journal"
+
+# Inícios de conteúdo que mudam a extensão em refine_name_by_magic (mais um neutro)
+SNIFF_MAGICS = (b'', b'\x7FELF', b'\x00PSF', b'\x89PNG', b'<?xml')
+SNIFF_SIZE = 16
+# Magics de entradas a até esta distância são lidos juntos
+SNIFF_SPAN = 64 * 1024
+
+# Entradas a partir deste tamanho são copiadas em faixas paralelas (com --jobs > 1)
+SPLIT_THRESHOLD = 256 * 1024 * 1024
+SPLIT_RANGE_SIZE = 64 * 1024 * 1024
+PARTIAL_SUFFIX = ".part"
+# Trechos do início e do fim de um arquivo parcial conferidos antes de continuá-lo
+RESUME_CHECK_SIZE = 1024 * 1024
+
+# Arquivos de dentro da imagem PFS (com --pfs) vão para esta subpasta
+PFS_SUBDIR = "app"
+
+
+class PkgError(Exception):
+    """Erro de leitura ou extração de PKG"""
+
+
+def _null_log(message, log_type="info"):
+    pass
+
+
+def _null_progress(stats):
+    pass
+
+
+def format_size(size):
+    """Formata tamanho em MB ou KB para o log"""
+    size_mb = size / (1024*1024)
+    return f"{size_mb:.2f} MB" if size_mb > 1 else f"{size/1024:.1f} KB"
+
+
+def format_duration(seconds):
+    """Formata segundos como MM:SS ou H:MM:SS"""
+    if seconds is None:
+        return "--:--"
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes:02d}:{seconds:02d}"
+
+
+def format_rate(bytes_per_second):
+    """Formata vazão em MB/s"""
+    return f"{bytes_per_second / (1024*1024):.1f} MB/s"
+
+
+class ProgressStats:
+    """Fotografia do progresso da extração (em bytes e em entradas)"""
+
+    __slots__ = ('bytes_done', 'bytes_total', 'entries_done', 'entries_total',
+                 'throughput', 'eta', 'elapsed')
+
+    def __init__(self, bytes_done, bytes_total, entries_done, entries_total,
+                 throughput, eta, elapsed):
+        self.bytes_done = bytes_done
+        self.bytes_total = bytes_total
+        self.entries_done = entries_done
+        self.entries_total = entries_total
+        self.throughput = throughput
+        self.eta = eta
+        self.elapsed = elapsed
+
+    @property
+    def fraction(self):
+        if self.bytes_total == 0:
+            return 1.0
+        return self.bytes_done / self.bytes_total
+
+    def describe(self):
+        """Texto curto para barras de progresso"""
+        return (
+            f"{self.entries_done}/{self.entries_total} arquivos | "
+            f"{format_size(self.bytes_done)} de {format_size(self.bytes_total)} | "
+            f"{format_rate(self.throughput)} | ETA {format_duration(self.eta)}"
+        )
+
+
+class ProgressTracker:
+    """Progresso por bytes com vazão média móvel e ETA (seguro entre threads)
+
+    Bytes pulados (filtro, retomada) avançam o progresso mas não contam na
+    vazão, que mede apenas o que foi realmente copiado.
+    """
+
+    WINDOW_SECONDS = 5.0
+
+    def __init__(self, bytes_total, entries_total, callback=None):
+        self.bytes_total = bytes_total
+        self.entries_total = entries_total
+        self.callback = callback or _null_progress
+        self.bytes_done = 0
+        self.bytes_copied = 0
+        self.entries_done = 0
+        self.started = time.perf_counter()
+        self._samples = deque([(self.started, 0)])
+        self._lock = threading.Lock()
+
+    def copied(self, nbytes):
+        """Bytes efetivamente copiados"""
+        with self._lock:
+            self.bytes_done += nbytes
+            self.bytes_copied += nbytes
+            stats = self._snapshot()
+        self.callback(stats)
+
+    def skipped(self, nbytes):
+        """Bytes que não precisaram ser copiados"""
+        with self._lock:
+            self.bytes_done += nbytes
+            stats = self._snapshot()
+        self.callback(stats)
+
+    def entry_done(self):
+        with self._lock:
+            self.entries_done += 1
+            stats = self._snapshot()
+        self.callback(stats)
+
+    def snapshot(self):
+        with self._lock:
+            return self._snapshot()
+
+    def _snapshot(self):
+        now = time.perf_counter()
+        samples = self._samples
+        samples.append((now, self.bytes_copied))
+        while len(samples) > 2 and now - samples[1][0] > self.WINDOW_SECONDS:
+            samples.popleft()
+
+        then, copied_then = samples[0]
+        if now - then > 0:
+            throughput = (self.bytes_copied - copied_then) / (now - then)
+        else:
+            throughput = 0.0
+
+        remaining = self.bytes_total - self.bytes_done
+        if remaining <= 0:
+            eta = 0.0
+        elif throughput > 0:
+            eta = remaining / throughput
+        else:
+            eta = None
+
+        return ProgressStats(self.bytes_done, self.bytes_total, self.entries_done,
+                             self.entries_total, throughput, eta, now - self.started)
+
+
+def resolve_entry_name(entry_id):
+    """Determina nome e subpasta de uma entrada pelo ID"""
+    if entry_id in KNOWN_ENTRY_NAMES:
+        return KNOWN_ENTRY_NAMES[entry_id]
+    if entry_id >= 0x200 and entry_id < 0x260:
+        return f"module_{entry_id:04X}.prx", "sce_module"
+    if entry_id >= 0x1000 and entry_id < 0x1400:
+        return f"resource_{entry_id:04X}.dat", "sce_sys"
+    if entry_id >= 0x400 and entry_id < 0x500:
+        return f"playgo_{entry_id:04X}.dat", "app"
+    return f"file_{entry_id:04X}.bin", "data"
+
+
+def refine_name_by_magic(filename, header_sample):
+    """Ajusta a extensão do arquivo pelo conteúdo (magic number)"""
+    if header_sample.startswith(b'\x7FELF'):
+        if '.bin' in filename or '.dat' in filename:
+            filename = filename.rsplit('.', 1)[0] + '.elf'
+    elif header_sample.startswith(b'\x00PSF'):
+        if '.sfo' not in filename and '.dat' in filename:
+            filename = filename.replace('.dat', '.sfo')
+    elif header_sample.startswith(b'\x89PNG'):
+        if '.png' not in filename:
+            filename = filename.rsplit('.', 1)[0] + '.png'
+    elif header_sample.startswith(b'<?xml'):
+        if '.xml' not in filename:
+            filename = filename.rsplit('.', 1)[0] + '.xml'
+    return filename
+
+
+def candidate_names(filename):
+    """Nomes que uma entrada pode receber depois do sniff, conforme o magic do conteúdo"""
+    return {refine_name_by_magic(filename, magic) for magic in SNIFF_MAGICS}
+
+
+def entry_path(filename, subdir):
+    """Caminho relativo de uma entrada no diretório de extração"""
+    return f"{subdir}/{filename}" if subdir else filename
+
+
+def matches_filter(filename, formats):
+    """Verifica se arquivo corresponde ao filtro"""
+    return EntryFilter(formats).accepts_name(filename)
+
+
+def entries_mode(recovery):
+    """Normaliza o parâmetro `recovery` ("table", "scan" ou "carve")"""
+    if not recovery:
+        return "table"
+    if recovery is True:
+        return "scan"
+    if recovery in RECOVERY_MODES:
+        return recovery
+    raise PkgError(f"Modo de recuperação desconhecido: {recovery}")
+
+
+def is_shared_file(path):
+    """True se o arquivo tem outros hardlinks (ex.: objeto do repositório --store)"""
+    try:
+        return os.stat(path).st_nlink > 1
+    except OSError:
+        return False
+
+
+def open_output(path, start=0):
+    """Abre um arquivo de saída sem nunca gravar dentro de um arquivo compartilhado
+
+    Um hardlink é desfeito antes da escrita: truncar ou continuar o arquivo
+    alteraria também o objeto do repositório e as outras extrações.
+    """
+    if is_shared_file(path):
+        if start:
+            raise PkgError(f"{path} é compartilhado (hardlink) e não pode ser continuado")
+        os.remove(path)
+    return open(path, 'r+b' if start else 'wb')
+
+
+def file_digest(path, algorithm="sha256", chunk_size=CHUNK_SIZE):
+    """Hash de um arquivo já extraído"""
+    digest = hashlib.new(algorithm)
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_formats(format_filter):
+    """Converte a string de filtro ("*.bin *.elf") em lista"""
+    if isinstance(format_filter, str):
+        return format_filter.split()
+    return list(format_filter)
+
+
+class PkgEntry:
+    """Registro da tabela de entradas do PKG"""
+
+    __slots__ = ('id', 'filename_offset', 'flags1', 'flags2', 'offset', 'size')
+
+    def __init__(self, entry_id, offset, size, filename_offset=0, flags1=0, flags2=0):
+        self.id = entry_id
+        self.offset = offset
+        self.size = size
+        self.filename_offset = filename_offset
+        self.flags1 = flags1
+        self.flags2 = flags2
+
+    @classmethod
+    def from_record(cls, record):
+        """Cria a entrada a partir de uma tupla de TABLE_ENTRY_STRUCT"""
+        entry_id, filename_offset, flags1, flags2, offset, size, _ = record
+        return cls(entry_id, offset, size, filename_offset, flags1, flags2)
+
+    def to_list(self):
+        """Forma compacta usada no cache de índice"""
+        return [self.id, self.offset, self.size, self.filename_offset, self.flags1, self.flags2]
+
+    @classmethod
+    def from_list(cls, values):
+        return cls(*values)
+
+    def __repr__(self):
+        return f"PkgEntry(id=0x{self.id:X}, offset=0x{self.offset:X}, size={self.size})"
+
+
+def decode_entry_table(table_data):
+    """Decodifica a tabela inteira de uma vez (registros completos de 32 bytes)"""
+    usable = len(table_data) - len(table_data) % TABLE_ENTRY_SIZE
+    return TABLE_ENTRY_STRUCT.iter_unpack(table_data[:usable])
+
+
+class PkgHeader:
+    """Campos do header de um PKG PS4"""
+
+    def __init__(self, data):
+        if len(data) < 0x40:
+            raise PkgError("Arquivo PKG inválido ou corrompido")
+
+        self.magic = struct.unpack('>I', data[0:4])[0]
+        self.pkg_type = struct.unpack('>I', data[4:8])[0]
+        self.pkg_revision = struct.unpack('>I', data[8:12])[0]
+        self.header_size = struct.unpack('>H', data[12:14])[0]
+        self.item_count = struct.unpack('>H', data[14:16])[0]
+        self.entry_count = struct.unpack('>I', data[0x10:0x14])[0]
+        self.table_offset = struct.unpack('>I', data[0x18:0x1C])[0]
+        self.body_offset = struct.unpack('>Q', data[0x20:0x28])[0]
+        self.body_size = struct.unpack('>Q', data[0x28:0x30])[0]
+        self.content_id = bytes(data[0x40:0x64]).split(b'\x00', 1)[0].decode('ascii', 'replace')
+        # Imagem PFS (árvore de arquivos do jogo); ausente em headers curtos
+        if len(data) >= 0x420:
+            self.pfs_image_offset, self.pfs_image_size = struct.unpack('>QQ', data[0x410:0x420])
+        else:
+            self.pfs_image_offset = self.pfs_image_size = 0
+
+    @property
+    def is_valid(self):
+        return self.magic == PKG_MAGIC
+
+    def to_dict(self):
+        return {
+            "magic": self.magic,
+            "pkg_type": self.pkg_type,
+            "pkg_revision": self.pkg_revision,
+            "header_size": self.header_size,
+            "item_count": self.item_count,
+            "entry_count": self.entry_count,
+            "table_offset": self.table_offset,
+            "body_offset": self.body_offset,
+            "body_size": self.body_size,
+            "content_id": self.content_id,
+            "pfs_image_offset": self.pfs_image_offset,
+            "pfs_image_size": self.pfs_image_size,
+        }
+
+
+class EntryFile(io.RawIOBase):
+    """Arquivo somente leitura (acesso aleatório) sobre uma entrada do PKG"""
+
+    def __init__(self, reader, offset, size, name=None):
+        super().__init__()
+        self._reader = reader
+        self._offset = offset
+        self._size = size
+        self._pos = 0
+        self.name = name
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, pos, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            pos += self._pos
+        elif whence == io.SEEK_END:
+            pos += self._size
+        if pos < 0:
+            raise ValueError("posição negativa")
+        self._pos = pos
+        return self._pos
+
+    def read(self, size=-1):
+        remaining = self._size - self._pos
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        if size <= 0:
+            return b''
+        data = self._reader.read_at(self._offset + self._pos, size)
+        self._pos += len(data)
+        return data
+
+    def readall(self):
+        return self.read()
+
+    def readinto(self, b):
+        n = min(len(b), self._size - self._pos)
+        if n <= 0:
+            return 0
+        target = memoryview(b).cast('B')
+        target[:n] = self._reader.view(self._offset + self._pos, n)
+        self._pos += n
+        return n
+
+
+class PkgReader:
+    """Leitura do header e das entradas de um PKG (sem carregar o arquivo todo)
+
+    O arquivo é mapeado em memória: entradas são expostas como fatias
+    `memoryview` sob demanda, então só as páginas tocadas são lidas do disco.
+    """
+
+    def __init__(self, path, log=None, cache=None):
+        self.path = path
+        self.log = log or _null_log
+        self.file_size = os.path.getsize(path)
+        self._file = open(path, 'rb')
+        self.fd = self._file.fileno()
+        self._mmap = None
+        self._view = None
+        self._entries = {}
+        self._names = {}
+        self._cache = cache
+        self._cache_key = None
+        self._index_dirty = False
+        self._timing_lock = threading.Lock()
+        self.timings = {"header_parse": 0.0, "table_scan": 0.0, "sniff": 0.0}
+        try:
+            if self.file_size > 0:
+                try:
+                    self._mmap = mmap.mmap(self.fd, 0, access=mmap.ACCESS_READ)
+                    self._view = memoryview(self._mmap)
+                except (OSError, ValueError, OverflowError):
+                    # Ex.: Python 32 bits com PKG maior que o espaço de endereços
+                    self._mmap = None
+            started = time.perf_counter()
+            header_data = self.read_at(0, HEADER_SIZE)
+            self.header = PkgHeader(header_data)
+            if cache is not None:
+                self._load_index(header_data)
+            self.timings["header_parse"] = time.perf_counter() - started
+        except Exception:
+            self.close()
+            raise
+
+    def _load_index(self, header_data):
+        """Carrega entradas e nomes do cache de índice, se houver"""
+        try:
+            self._cache_key = self._cache.key_for(self.path, header_data)
+            data = self._cache.load(self._cache_key)
+        except OSError:
+            self._cache_key = None
+            return
+
+        if data is None:
+            return
+
+        for mode, records in data.get("entries", {}).items():
+            self._entries[mode] = [PkgEntry.from_list(r) for r in records]
+        for entry_id, offset, filename, subdir in data.get("names", []):
+            self._names[(entry_id, offset)] = (filename, subdir)
+        self.log("Índice do PKG carregado do cache", "info")
+
+    def save_index(self):
+        """Grava no cache o que foi lido/detectado desde a abertura"""
+        if self._cache is None or self._cache_key is None or not self._index_dirty:
+            return
+        data = {
+            "path": os.path.abspath(self.path),
+            "file_size": self.file_size,
+            "header": self.header.to_dict(),
+            "entries": {
+                mode: [e.to_list() for e in entries]
+                for mode, entries in self._entries.items()
+            },
+            "names": [
+                [entry_id, offset, filename, subdir]
+                for (entry_id, offset), (filename, subdir) in self._names.items()
+            ],
+        }
+        try:
+            self._cache.store(self._cache_key, data)
+            self._index_dirty = False
+        except OSError as e:
+            self.log(f"Não foi possível gravar o cache de índice: {e}", "warning")
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.save_index()
+        if self._view is not None:
+            try:
+                self._view.release()
+                self._mmap.close()
+            except BufferError:
+                # Ainda há fatias em uso; o mapeamento é liberado pelo GC
+                pass
+            self._view = None
+            self._mmap = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def read_at(self, offset, size):
+        """Lê `size` bytes a partir de `offset` (seguro entre threads)"""
+        if self._mmap is not None:
+            return self._mmap[offset:offset+size]
+        return pread(self.fd, size, offset)
+
+    def view(self, offset, size):
+        """Fatia `memoryview` sem cópia de uma região do PKG"""
+        if self._view is not None:
+            return self._view[offset:offset+size]
+        return memoryview(self.read_at(offset, size))
+
+    def entry_view(self, entry):
+        """Conteúdo de uma entrada como `memoryview` (lido sob demanda)"""
+        return self.view(entry.offset, entry.size)
+
+    def find_entry(self, entry_id, recovery=False):
+        """Procura uma entrada pelo ID"""
+        for entry in self.entries(recovery=recovery):
+            if entry.id == entry_id:
+                return entry
+        raise PkgError(f"Entrada 0x{entry_id:X} não encontrada no PKG")
+
+    def open_entry(self, entry, recovery=False):
+        """Abre uma entrada (ou ID) como arquivo somente leitura com seek"""
+        if not isinstance(entry, PkgEntry):
+            entry = self.find_entry(entry, recovery=recovery)
+        filename, subdir = self.entry_name(entry)
+        return EntryFile(self, entry.offset, entry.size, name=filename)
+
+    def iter_views(self, offset, size, chunk_size=CHUNK_SIZE):
+        """Percorre uma região do PKG em fatias de até `chunk_size` bytes"""
+        end = offset + size
+        while offset < end:
+            n = min(chunk_size, end - offset)
+            yield self.view(offset, n)
+            offset += n
+
+    def entry_digest(self, entry, algorithm="sha256", chunk_size=CHUNK_SIZE):
+        """Hash do conteúdo de uma entrada, lido direto do mapeamento"""
+        digest = hashlib.new(algorithm)
+        for chunk in self.iter_views(entry.offset, entry.size, chunk_size):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    def data_region(self):
+        """Limites (início, fim) da região de dados declarada no header"""
+        start = self.header.body_offset
+        end = start + self.header.body_size
+        if self.header.body_size == 0 or end > self.file_size:
+            return 0, self.file_size
+        return start, end
+
+    def read_entry_table(self):
+        """Lê exatamente `entry_count` registros no offset declarado no header"""
+        header = self.header
+        if not header.is_valid:
+            raise PkgError("PKG inválido: Magic number incorreto")
+
+        self.log(f"Offset da tabela (header): 0x{header.table_offset:X}", "info")
+        self.log(f"Entradas no header: {header.entry_count}", "info")
+
+        table_size = header.entry_count * TABLE_ENTRY_SIZE
+        if header.entry_count == 0 or header.table_offset + table_size > self.file_size:
+            raise PkgError(
+                "Tabela de entradas fora dos limites do arquivo "
+                "(tente o modo de recuperação)"
+            )
+
+        table_data = self.read_at(header.table_offset, table_size)
+        region_start, region_end = self.data_region()
+        entries = []
+
+        for idx, record in enumerate(decode_entry_table(table_data)):
+            entry = PkgEntry.from_record(record)
+
+            if entry.offset < region_start or entry.offset + entry.size > region_end:
+                self.log(
+                    f"Entrada {idx} (ID 0x{entry.id:X}) fora da região de dados, ignorada",
+                    "warning"
+                )
+                continue
+
+            entries.append(entry)
+
+        if not entries:
+            raise PkgError("Nenhuma entrada válida na tabela (tente o modo de recuperação)")
+
+        return entries
+
+    def scan_entries(self):
+        """Modo de recuperação: procura entradas válidas em possíveis tabelas do PKG"""
+        if not self.header.is_valid:
+            raise PkgError("PKG inválido: Magic number incorreto")
+
+        self.log("Modo de recuperação: escaneando tabelas possíveis", "warning")
+
+        possible_table_offsets = [self.header.table_offset] + FALLBACK_TABLE_OFFSETS
+        all_entries = []
+        seen = set()
+
+        # Escanear cada offset possível (sem carregar arquivo inteiro)
+        for base_offset in possible_table_offsets:
+            if base_offset >= self.file_size:
+                continue
+
+            self.log(f"Escaneando tabela em 0x{base_offset:X}...", "info")
+
+            # Ler apenas a região da tabela (não o arquivo inteiro!)
+            table_data = self.read_at(base_offset, MAX_ENTRIES_TO_SCAN * TABLE_ENTRY_SIZE)
+
+            for record in decode_entry_table(table_data):
+                entry_id = record[0]
+                entry_offset = record[4]
+                entry_size = record[5]
+
+                # Validações
+                if entry_size == 0 or entry_size > MAX_ENTRY_SIZE:
+                    continue
+
+                if entry_offset == 0 or entry_offset + entry_size > self.file_size:
+                    continue
+
+                # Evitar duplicatas
+                key = (entry_id, entry_offset)
+                if key in seen:
+                    continue
+                seen.add(key)
+
+                all_entries.append(PkgEntry.from_record(record))
+
+        return all_entries
+
+    def carve_entries(self):
+        """Modo de recuperação: procura arquivos por assinatura em todo o PKG"""
+        self.log("Modo de recuperação: procurando arquivos por assinatura", "warning")
+
+        entries = []
+        for carved in SignatureCarver(self).scan():
+            entry = PkgEntry(0, carved.offset, carved.size)
+            self._names[(entry.id, entry.offset)] = (carved.filename, CARVED_SUBDIR)
+            entries.append(entry)
+
+        self.log(f"{len(entries)} arquivos encontrados por assinatura", "info")
+        return entries
+
+    def entries(self, recovery=False):
+        """Entradas do PKG: tabela do header, ou recuperação ("scan"/"carve")"""
+        mode = entries_mode(recovery)
+        if mode not in self._entries:
+            started = time.perf_counter()
+            if mode == "carve":
+                self._entries[mode] = self.carve_entries()
+            elif mode == "scan":
+                self._entries[mode] = self.scan_entries()
+            else:
+                self._entries[mode] = self.read_entry_table()
+            self._index_dirty = True
+            self.timings["table_scan"] += time.perf_counter() - started
+        return self._entries[mode]
+
+    def entry_name(self, entry, data=None):
+        """Nome e subpasta finais de uma entrada (mapa de IDs + magic do conteúdo)
+
+        `data`, se informado, é o conteúdo já lido da entrada (leitura
+        agrupada) e evita uma leitura só para o magic.
+        """
+        key = (entry.id, entry.offset)
+        name = self._names.get(key)
+        if name is None:
+            started = time.perf_counter()
+            filename, subdir = resolve_entry_name(entry.id)
+
+            # Detectar tipo pelo conteúdo (ler apenas header)
+            if data is not None:
+                header_sample = bytes(data[:SNIFF_SIZE])
+            else:
+                header_sample = self.read_at(entry.offset, min(SNIFF_SIZE, entry.size))
+            name = (refine_name_by_magic(filename, header_sample), subdir)
+            self._names[key] = name
+            self._index_dirty = True
+            with self._timing_lock:
+                self.timings["sniff"] += time.perf_counter() - started
+        return name
+
+    def cached_name(self, entry):
+        """Nome já resolvido (sniff anterior, cache ou carving), ou None"""
+        return self._names.get((entry.id, entry.offset))
+
+    def sniff_names(self, entries, span=SNIFF_SPAN):
+        """Resolve os nomes de várias entradas lendo os magics em ordem de offset
+
+        Entradas próximas (até `span` bytes) têm os magics lidos em uma única leitura.
+        """
+        pending = sorted((e for e in entries if self.cached_name(e) is None),
+                         key=lambda e: e.offset)
+        i = 0
+        while i < len(pending):
+            group_start = pending[i].offset
+            j = i + 1
+            while j < len(pending) and pending[j].offset - group_start <= span:
+                j += 1
+            group = pending[i:j]
+            group_end = max(e.offset + min(SNIFF_SIZE, e.size) for e in group)
+            data = self.read_at(group_start, group_end - group_start)
+            for entry in group:
+                start = entry.offset - group_start
+                self.entry_name(entry, data[start:start + min(SNIFF_SIZE, entry.size)])
+            i = j
+
+
+class PkgExtractor:
+    """Extrai as entradas de um PKG para um diretório"""
+
+    def __init__(self, reader, output_base=None, format_filter="*.*", log=None, progress=None,
+                 recovery=False, jobs=1, zero_copy=True, resume=False, verify=False,
+                 fsync=False, hashes=(), coalesce=True, chunk_size=CHUNK_SIZE,
+                 queue_depth=PIPELINE_DEPTH, split_threshold=SPLIT_THRESHOLD,
+                 split_size=SPLIT_RANGE_SIZE, preallocate=True, sparse=False, pfs=False,
+                 only=None, store=None, store_link="auto"):
+        self.reader = reader
+        try:
+            self.store = ContentStore(store, store_link) if store else None
+        except ValueError as e:
+            raise PkgError(str(e))
+        # Entradas escolhidas por quem chama (ex.: pkg_diff); o filtro ainda se aplica
+        self.only = None if only is None else {(entry.id, entry.offset) for entry in only}
+        self.pfs = pfs
+        self.preallocate = preallocate
+        self.sparse = sparse
+        self.split_threshold = split_threshold
+        self.split_size = max(1024 * 1024, int(split_size))
+        self.coalesce = coalesce
+        self.hashes = tuple(hashes)
+        self.chunk_size = max(64 * 1024, int(chunk_size))
+        self.queue_depth = max(2, int(queue_depth))
+        self.fsync = fsync
+        self.resume = resume
+        self.verify = verify
+        self.zero_copy = zero_copy
+        self.recovery = recovery
+        self.jobs = max(1, int(jobs))
+        self.output_base = output_base or os.getcwd()
+        self.format_filter = " ".join(parse_formats(format_filter))
+        self.formats = parse_formats(format_filter)
+        try:
+            self.filter = EntryFilter(self.formats)
+        except ValueError as e:
+            raise PkgError(str(e))
+        self.log = log or _null_log
+        self.progress = progress or _null_progress
+
+        pkg_name = os.path.splitext(os.path.basename(reader.path))[0]
+        self.extract_dir = os.path.join(self.output_base, f"{pkg_name}_extracted")
+
+        self._completed = {}
+        self._journal = None
+        self._journal_lock = threading.Lock()
+        self._skipped = 0
+        self._local = threading.local()
+        self._pipelines = []
+        self._range_pool = None
+        self._range_pool_lock = threading.Lock()
+        self._tracker = None
+        self._fsync_seconds = 0.0
+
+    def extract(self):
+        """Executa a extração completa e retorna o dicionário do relatório"""
+        reader = self.reader
+        extract_dir = self.extract_dir
+
+        os.makedirs(extract_dir, exist_ok=True)
+        self.log(f"Iniciando extração completa...", "info")
+        self.log(f"Destino: {extract_dir}", "info")
+        self.log(f"Tamanho do PKG: {reader.file_size/(1024*1024):.2f} MB", "info")
+
+        all_entries = reader.entries(recovery=self.recovery)
+        self.log(f"✓ {len(all_entries)} entradas únicas encontradas!", "success")
+
+        if len(all_entries) == 0:
+            self.log("Nenhuma entrada válida encontrada!", "error")
+            raise PkgError("Não foi possível localizar entradas no PKG")
+
+        if self.resume:
+            self._load_previous_run()
+
+        total = len(all_entries)
+        pfs_image = None
+        pfs_files = []
+        if self.pfs:
+            pfs_image, pfs_entry, pfs_files = self._open_pfs(all_entries)
+
+        filter_started = time.perf_counter()
+        selected = self._select_entries(all_entries)
+        if self.only is not None:
+            selected = [entry for entry in selected if (entry.id, entry.offset) in self.only]
+        if self.pfs and pfs_entry is not None:
+            # A imagem em si não é gravada: só os arquivos de dentro dela
+            selected = [entry for entry in selected if entry is not pfs_entry]
+        filter_seconds = time.perf_counter() - filter_started
+
+        selected_bytes = sum(entry.size for entry in selected)
+        pfs_bytes = sum(f.size for f in pfs_files)
+        self._tracker = ProgressTracker(selected_bytes + pfs_bytes, len(selected) + len(pfs_files),
+                                        self.progress)
+        self._check_free_space(selected, pfs_files)
+
+        journal_path = os.path.join(extract_dir, JOURNAL_FILENAME)
+        self._journal = open(journal_path, 'a' if self.resume else 'w', encoding='utf-8')
+
+        # Leituras em ordem de offset, com entradas pequenas vizinhas agrupadas
+        batches = plan_reads(selected, coalesce=self.coalesce)
+        grouped = sum(len(batch.items) for batch in batches if len(batch.items) > 1)
+        self.log(f"Plano de leitura: {len(batches)} leituras para {len(selected)} entradas "
+                 f"({grouped} agrupadas)", "info")
+
+        copy_started = time.perf_counter()
+        try:
+            if self.jobs > 1:
+                self.log(f"Extraindo com {self.jobs} threads em paralelo", "info")
+                results = self._extract_parallel(batches, len(selected))
+            else:
+                results = self._extract_serial(batches, len(selected))
+            if pfs_files:
+                results += self._extract_pfs(pfs_image, pfs_files)
+        finally:
+            self._journal.close()
+            self._journal = None
+            for pipeline in self._pipelines:
+                pipeline.close()
+            self._pipelines = []
+            if self._range_pool is not None:
+                self._range_pool.shutdown()
+                self._range_pool = None
+        copy_seconds = time.perf_counter() - copy_started
+
+        # Mantém a ordem da tabela, independente da ordem de conclusão
+        extracted_files = [record for record in results if record is not None]
+
+        # Criar estrutura de diretórios adicional
+        for dir_name in EXTRA_DIRS:
+            os.makedirs(os.path.join(extract_dir, dir_name), exist_ok=True)
+
+        extraction_info = {
+            "pkg_file": os.path.basename(reader.path),
+            "extraction_date": datetime.now().isoformat(),
+            "extract_directory": extract_dir,
+            "format_filter": self.format_filter,
+            "total_entries_found": total,
+            "extracted_files": len(extracted_files),
+            "files": extracted_files
+        }
+        if self.resume:
+            extraction_info["resumed"] = True
+            extraction_info["skipped_existing"] = self._skipped
+        if not self.filter.matches_everything or self.only is not None:
+            extraction_info["selected_entries"] = len(selected)
+        if self.hashes:
+            extraction_info["hash_algorithms"] = list(self.hashes)
+        if self.sparse:
+            extraction_info["sparse"] = True
+        if self.store is not None:
+            extraction_info["store"] = self.store.stats()
+        if self.pfs:
+            extraction_info["pfs"] = {
+                "compressed": pfs_image.compressed,
+                "selected_files": len(pfs_files),
+                "extracted_files": sum(1 for record in results[len(selected):] if record is not None),
+            }
+
+        tracker = self._tracker
+        bytes_copied = tracker.bytes_copied
+        # Tempo de cópia inclui o sniff das entradas e o fsync, que também são listados à parte
+        timings = dict(reader.timings)
+        timings["filter"] = filter_seconds
+        timings["copy"] = copy_seconds
+        timings["fsync"] = self._fsync_seconds
+        extraction_info["bytes_total"] = tracker.bytes_total
+        extraction_info["bytes_copied"] = bytes_copied
+        extraction_info["throughput_mb_s"] = round(
+            bytes_copied / copy_seconds / (1024*1024) if copy_seconds > 0 else 0.0, 3)
+        extraction_info["timings"] = timings
+
+        info_path = os.path.join(extract_dir, INFO_FILENAME)
+        report_started = time.perf_counter()
+        self._write_report(info_path, extraction_info)
+        timings["report_write"] = time.perf_counter() - report_started
+        # Regrava para que o próprio relatório contenha o tempo de escrita
+        for phase, seconds in timings.items():
+            timings[phase] = round(seconds, 6)
+        self._write_report(info_path, extraction_info)
+
+        # O relatório final substitui o journal
+        try:
+            os.remove(journal_path)
+        except OSError:
+            pass
+
+        self.log(f"\n{'='*50}", "info")
+        self.log(f"✅ EXTRAÇÃO COMPLETA CONCLUÍDA!", "success")
+        self.log(f"📁 Local: {extract_dir}", "info")
+        self.log(f"📊 Arquivos extraídos: {len(extracted_files)} de {total} encontrados", "info")
+        self.log(
+            f"⏱ {format_size(bytes_copied)} copiados em {copy_seconds:.2f}s "
+            f"({extraction_info['throughput_mb_s']:.1f} MB/s)",
+            "info"
+        )
+        if self.resume:
+            self.log(f"↷ Já existentes (ignorados): {self._skipped}", "info")
+        self.log(f"{'='*50}", "info")
+
+        return extraction_info
+
+    @staticmethod
+    def _write_report(info_path, extraction_info):
+        with open(info_path, 'w', encoding='utf-8') as f:
+            json.dump(extraction_info, f, indent=2, ensure_ascii=False)
+
+    def _load_previous_run(self):
+        """Lê extraction_info.json e o journal da execução anterior"""
+        info_path = os.path.join(self.extract_dir, INFO_FILENAME)
+        try:
+            with open(info_path, 'r', encoding='utf-8') as f:
+                for record in json.load(f).get("files", []):
+                    self._completed[record["path"]] = record
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+
+        journal_path = os.path.join(self.extract_dir, JOURNAL_FILENAME)
+        try:
+            with open(journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        self._completed[record["path"]] = record
+                    except (ValueError, KeyError):
+                        # Última linha pode ter sido cortada pela interrupção
+                        continue
+        except OSError:
+            pass
+
+        self.log(f"Retomando: {len(self._completed)} arquivos registrados na execução anterior", "info")
+
+    def _open_pfs(self, entries):
+        """Abre o PFS do PKG e aplica o filtro aos arquivos de dentro dele"""
+        started = time.perf_counter()
+        try:
+            image, image_entry = open_pfs(self.reader, entries)
+            files = image.files()
+        except PfsError as e:
+            raise PkgError(f"PFS: {e}")
+        selected = [f for f in files
+                    if self.filter.accepts_file(f.size, f"{PFS_SUBDIR}/{f.path}")]
+        self.reader.timings["pfs_scan"] = time.perf_counter() - started
+
+        kind = "comprimido (PFSC)" if image.compressed else "sem compressão"
+        self.log(f"✓ PFS {kind}: {len(files)} arquivos, {len(selected)} selecionados "
+                 f"({format_size(sum(f.size for f in selected))})", "success")
+        return image, image_entry, selected
+
+    def _extract_pfs(self, image, files):
+        """Extrai os arquivos do PFS direto do PKG, em paralelo entre inodes"""
+        # Ordem da tabela de inodes na imagem: leituras sequenciais no PKG
+        order = sorted(range(len(files)), key=lambda i: files[i].offset)
+        results = [None] * len(files)
+
+        def run(i):
+            results[i] = self._extract_pfs_one(image, files[i], i, len(files))
+
+        if self.jobs > 1:
+            with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+                for future in [pool.submit(run, i) for i in order]:
+                    future.result()
+        else:
+            for i in order:
+                run(i)
+        return results
+
+    def _extract_pfs_one(self, image, pfs_file, i, total):
+        """Extrai um arquivo do PFS registrando erros no log em vez de interromper"""
+        tracker = self._tracker
+        copied = [0]
+
+        def on_copy(nbytes):
+            copied[0] += nbytes
+            tracker.copied(nbytes)
+
+        try:
+            record = self._extract_pfs_file(image, pfs_file, on_copy)
+        except Exception as e:
+            self.log(f"Erro no arquivo do PFS {pfs_file.path}: {str(e)}", "warning")
+            record = None
+
+        if pfs_file.size > copied[0]:
+            tracker.skipped(pfs_file.size - copied[0])
+        tracker.entry_done()
+
+        if record is not None:
+            self.log(f"✓ [PFS {i+1}/{total}] {record['path']} ({format_size(record['size'])})",
+                     "success")
+        return record
+
+    def _extract_pfs_file(self, image, pfs_file, on_copy):
+        """Copia um arquivo do PFS; trechos sem compressão vão do PKG pelo kernel"""
+        size = pfs_file.size
+        display_path = f"{PFS_SUBDIR}/{pfs_file.path}"
+        file_path = os.path.join(self.extract_dir, PFS_SUBDIR, *pfs_file.path.split("/"))
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        source = image.open(pfs_file)
+
+        record = {
+            "name": os.path.basename(file_path),
+            "path": display_path,
+            "size": size,
+            "pfs_inode": pfs_file.inode.number,
+        }
+
+        if self.store is not None:
+            return self._extract_pfs_stored(source, size, file_path, on_copy, record)
+
+        if self.resume and self._pfs_complete(source, size, file_path, display_path):
+            with self._journal_lock:
+                self._skipped += 1
+            record["copy_seconds"] = 0.0
+            if self.hashes:
+                previous = (self._completed.get(display_path) or {}).get("hashes") or {}
+                if all(name in previous for name in self.hashes):
+                    record["hashes"] = {name: previous[name] for name in self.hashes}
+                else:
+                    hasher = MultiHasher(self.hashes)
+                    for view in source.views(0, size):
+                        hasher.update(view)
+                    record["hashes"] = hasher.hexdigests()
+            self._journal_record(record)
+            return record
+
+        started = time.perf_counter()
+        with open_output(file_path) as out_file:
+            hasher = MultiHasher(self.hashes) if self.hashes else None
+            self._copy_pfs(source, size, out_file.fileno(), on_copy, display_path, hasher)
+            if hasher is not None:
+                record["hashes"] = hasher.hexdigests()
+
+        record["copy_seconds"] = round(time.perf_counter() - started, 6)
+        self._journal_record(record)
+        return record
+
+    def _extract_pfs_stored(self, source, size, file_path, on_copy, record):
+        """Arquivo do PFS pelo repositório, como `_extract_stored` faz com as entradas"""
+        started = time.perf_counter()
+        algorithms = (STORE_ALGORITHM,) + tuple(name for name in self.hashes
+                                                if name != STORE_ALGORITHM)
+        hasher = MultiHasher(algorithms)
+        hashed = 0
+        for view in source.views(0, size):
+            hasher.update(view)
+            hashed += len(view)
+        if hashed != size:
+            raise PkgError(f"{record['path']}: {hashed} de {size} bytes lidos (imagem PFS cortada)")
+        hashes = hasher.hexdigests()
+        digest = hashes[STORE_ALGORITHM]
+
+        def write(out_fd):
+            self._copy_pfs(source, size, out_fd, on_copy, record["path"])
+
+        stored = self.store.add(digest, size, write)
+        record["hashes"] = hashes
+        record["stored"] = "new" if stored else "reused"
+        record["link"] = self.store.materialize(digest, file_path)
+        record["copy_seconds"] = round(time.perf_counter() - started, 6)
+        self._journal_record(record)
+        return record
+
+    def _copy_pfs(self, source, size, out_fd, on_copy, display_path, hasher=None):
+        """Grava um arquivo do PFS em `out_fd`; trechos sem compressão vão do PKG pelo kernel"""
+        if self.preallocate and not self.sparse and size > self.chunk_size:
+            self._preallocate(out_fd, size, display_path)
+        # Posições no PKG quando o arquivo não está comprimido
+        extents = source.locate(0, size)
+        copied = 0
+        if extents is not None:
+            for offset, length in extents:
+                copied += copy_range(self.reader.fd, out_fd, offset, length,
+                                     chunk_size=self.chunk_size, zero_copy=self.zero_copy,
+                                     progress=on_copy, pipeline=self._pipeline(),
+                                     sink=hasher.update if hasher is not None else None,
+                                     sparse=self.sparse)
+        else:
+            for view in source.views(0, size):
+                if self.sparse:
+                    write_sparse(out_fd, bytes(view), len(view))
+                else:
+                    write_all(out_fd, view)
+                if hasher is not None:
+                    hasher.update(view)
+                on_copy(len(view))
+                copied += len(view)
+        if copied != size:
+            raise PkgError(f"{display_path}: {copied} de {size} bytes copiados "
+                           f"(imagem PFS cortada)")
+        if self.sparse:
+            os.ftruncate(out_fd, os.lseek(out_fd, 0, os.SEEK_CUR))
+        if self.fsync:
+            fsync_started = time.perf_counter()
+            os.fsync(out_fd)
+            with self._journal_lock:
+                self._fsync_seconds += time.perf_counter() - fsync_started
+
+    def _pfs_complete(self, source, size, file_path, display_path):
+        """True se o arquivo do PFS já foi extraído por inteiro numa execução anterior"""
+        try:
+            if os.path.getsize(file_path) != size:
+                return False
+        except OSError:
+            return False
+
+        previous = self._completed.get(display_path)
+        if self.verify:
+            expected = (previous or {}).get("hashes", {}).get("sha256")
+            if expected is None:
+                digest = hashlib.sha256()
+                for view in source.views(0, size):
+                    digest.update(view)
+                expected = digest.hexdigest()
+            return file_digest(file_path) == expected
+        return previous is not None or not self._completed
+
+    def _check_free_space(self, selected, pfs_files=()):
+        """Falha antes de copiar se o disco de destino não comporta as entradas e arquivos do PFS"""
+        # Arquivos já existentes são continuados ou regravados no mesmo lugar: só a diferença
+        # conta. Pasta vazia (caso comum) dispensa o sniff dos nomes e os stat()
+        existing = bool(os.listdir(self.extract_dir))
+        if existing:
+            self.reader.sniff_names(selected)
+
+        def missing(path, size):
+            # Hardlink (--store) é desfeito antes da escrita: o espaço não é liberado
+            if not existing or is_shared_file(path):
+                return size
+            try:
+                return size - min(size, os.path.getsize(path))
+            except OSError:
+                return size
+
+        needed = 0
+        for entry in selected:
+            size = self._available_size(entry)
+            if existing:
+                size = missing(os.path.join(self.extract_dir,
+                                            entry_path(*self.reader.entry_name(entry))), size)
+            needed += size
+        for pfs_file in pfs_files:
+            path = os.path.join(self.extract_dir, PFS_SUBDIR, *pfs_file.path.split("/"))
+            needed += missing(path, pfs_file.size)
+
+        free = shutil.disk_usage(self.extract_dir).free
+        if needed <= free:
+            return
+        message = (f"Espaço insuficiente em {self.extract_dir}: {format_size(needed)} "
+                   f"necessários, {format_size(free)} livres")
+        if self.sparse or self.store is not None:
+            # Trechos zerados e conteúdo já guardado não ocupam disco, então pode caber
+            self.log(f"⚠ {message} (continuando)", "warning")
+        else:
+            raise PkgError(message)
+
+    def _available_size(self, entry):
+        """Bytes da entrada que existem no PKG (entradas cortadas pelo fim do arquivo)"""
+        return max(0, min(entry.size, self.reader.file_size - entry.offset))
+
+    def _preallocate(self, out_fd, size, display_path, keep_size=True):
+        """Reserva o espaço do arquivo de saída; traduz falta de espaço em PkgError"""
+        try:
+            return preallocate(out_fd, size, keep_size=keep_size)
+        except OSError as e:
+            if e.errno == errno.ENOSPC:
+                raise PkgError(f"Sem espaço em disco para {display_path} ({format_size(size)})")
+            raise
+
+    def _resume_position(self, entry, file_path, display_path):
+        """Quantos bytes do arquivo de saída podem ser reaproveitados"""
+        try:
+            existing = os.path.getsize(file_path)
+        except OSError:
+            return 0
+
+        previous = self._completed.get(display_path)
+        # Registros só existem para entradas completas: o tamanho também precisa bater
+        known = (previous is not None and previous.get("id") == entry.id
+                 and previous.get("offset") == entry.offset
+                 and previous.get("size") == entry.size)
+
+        if existing == entry.size:
+            if self.verify:
+                # Hash do relatório anterior evita reler a entrada no PKG
+                expected = previous.get("hashes", {}).get("sha256") if known else None
+                if file_digest(file_path) == (expected or self.reader.entry_digest(entry)):
+                    return entry.size
+                return 0
+            if known or not self._completed:
+                return entry.size
+            return 0
+
+        # Arquivo escrito pela metade: continua de onde parou (nunca dentro de um hardlink),
+        # desde que os bytes gravados sejam desta entrada. O registro não ajuda aqui: um
+        # arquivo menor que o registrado veio de outra entrada ou foi alterado depois
+        if existing < entry.size and not is_shared_file(file_path):
+            if self._prefix_matches(entry, file_path, existing):
+                return existing
+            self.log(f"↺ {display_path}: arquivo parcial não corresponde à entrada, "
+                     f"recomeçando", "warning")
+        return 0
+
+    def _prefix_matches(self, entry, file_path, existing):
+        """Confere o trecho já gravado de um arquivo parcial contra a entrada no PKG
+
+        Compara o início e o fim do trecho (com --verify, o trecho inteiro):
+        um parcial de outro PKG, filtro ou offset não passa.
+        """
+        if self.verify:
+            windows = [(pos, min(self.chunk_size, existing - pos))
+                       for pos in range(0, existing, self.chunk_size)]
+        else:
+            size = min(RESUME_CHECK_SIZE, existing)
+            windows = sorted({(0, size), (existing - size, size)})
+        with open(file_path, 'rb') as f:
+            for pos, size in windows:
+                if pread(f.fileno(), size, pos) != self.reader.read_at(entry.offset + pos, size):
+                    return False
+        return True
+
+    def _journal_record(self, record):
+        with self._journal_lock:
+            self._journal.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._journal.flush()
+
+    def _extract_one(self, i, entry, total, data=None):
+        """Extrai uma entrada registrando erros no log em vez de interromper"""
+        tracker = self._tracker
+        copied_before = [0]
+
+        def on_copy(nbytes):
+            copied_before[0] += nbytes
+            tracker.copied(nbytes)
+
+        try:
+            record = self._extract_entry(entry, on_copy, data)
+        except Exception as e:
+            self.log(f"Erro no item {i}: {str(e)}", "warning")
+            record = None
+
+        # O que não foi copiado (filtro, retomada, erro) conta como concluído
+        if entry.size > copied_before[0]:
+            tracker.skipped(entry.size - copied_before[0])
+        tracker.entry_done()
+
+        if record is not None:
+            self.log(f"✓ [{i+1}/{total}] {record['path']} ({format_size(record['size'])})", "success")
+        return record
+
+    def _select_entries(self, all_entries):
+        """Aplica o filtro antes de ler o conteúdo das entradas
+
+        ID e tamanho vêm da tabela, e o nome pelo ID já decide a maioria
+        dos casos: o sniff só pode trocar a extensão de alguns nomes. Só
+        as entradas em que essa troca muda o resultado do filtro têm o
+        magic lido (em lote, em ordem de offset).
+        """
+        entry_filter = self.filter
+        if entry_filter.matches_everything:
+            return list(all_entries)
+
+        reader = self.reader
+        accepted = set()
+        ambiguous = []
+        for i, entry in enumerate(all_entries):
+            if not entry_filter.accepts_metadata(entry.id, entry.size):
+                continue
+
+            name = reader.cached_name(entry)
+            if name is not None:
+                names = [name]
+            else:
+                filename, subdir = resolve_entry_name(entry.id)
+                candidates = candidate_names(filename) if entry.size else {filename}
+                names = [(candidate, subdir) for candidate in candidates]
+
+            verdicts = {entry_filter.accepts_name(entry_path(*name)) for name in names}
+            if verdicts == {True}:
+                accepted.add(i)
+            elif True in verdicts:
+                ambiguous.append(i)
+
+        if ambiguous:
+            reader.sniff_names([all_entries[i] for i in ambiguous])
+            for i in ambiguous:
+                if entry_filter.accepts_name(entry_path(*reader.entry_name(all_entries[i]))):
+                    accepted.add(i)
+
+        selected = [entry for i, entry in enumerate(all_entries) if i in accepted]
+        self.log(f"Filtro \"{self.format_filter}\": {len(selected)} de {len(all_entries)} entradas "
+                 f"selecionadas ({len(ambiguous)} lidas para detectar o tipo)", "info")
+        return selected
+
+    def _extract_batch(self, batch, total, results):
+        """Extrai as entradas de uma leitura; grupos são lidos do PKG uma única vez"""
+        buffer = None
+        if batch.coalesced:
+            try:
+                buffer = memoryview(self.reader.read_at(batch.offset, batch.size))
+            except Exception as e:
+                # Cada entrada tenta sozinha e registra o próprio erro
+                self.log(f"Erro na leitura agrupada em 0x{batch.offset:X}: {str(e)}", "warning")
+
+        for i, entry in batch.items:
+            data = None
+            if buffer is not None:
+                start = entry.offset - batch.offset
+                data = buffer[start:start+entry.size]
+            results[i] = self._extract_one(i, entry, total, data)
+
+    def _extract_serial(self, batches, total):
+        """Extrai as leituras uma a uma, em ordem de offset"""
+        # Resultados ficam na ordem da tabela, independente da ordem de leitura
+        results = [None] * total
+        for batch in batches:
+            self._extract_batch(batch, total, results)
+        return results
+
+    def _extract_parallel(self, batches, total):
+        """Extrai as leituras com um pool de threads usando leituras posicionais"""
+        results = [None] * total
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            for future in [pool.submit(self._extract_batch, b, total, results) for b in batches]:
+                future.result()
+
+        return results
+
+    def _extract_entry(self, entry, on_copy=None, data=None):
+        """Extrai uma entrada; retorna None se ela não passar no filtro
+
+        `data` é o conteúdo da entrada quando ela veio de uma leitura agrupada.
+        """
+        entry_id = entry.id
+        entry_offset = entry.offset
+        entry_size = entry.size
+
+        filename, subdir = self.reader.entry_name(entry, data)
+
+        display_path = entry_path(filename, subdir)
+        if not self.filter.accepts(entry_id, entry_size, display_path):
+            return None
+
+        if subdir:
+            file_dir = os.path.join(self.extract_dir, subdir)
+            os.makedirs(file_dir, exist_ok=True)
+            file_path = os.path.join(file_dir, filename)
+        else:
+            file_path = os.path.join(self.extract_dir, filename)
+
+        record = {
+            "name": filename,
+            "path": display_path,
+            "size": entry_size,
+            "id": entry_id,
+            "offset": entry_offset
+        }
+
+        if self.store is not None:
+            return self._extract_stored(entry, file_path, on_copy, record, data)
+
+        start = self._resume_position(entry, file_path, display_path) if self.resume else 0
+        if start == entry_size and self.resume:
+            with self._journal_lock:
+                self._skipped += 1
+            record["copy_seconds"] = 0.0
+            if self.hashes:
+                record["hashes"] = self._existing_hashes(entry, display_path, data)
+            self._journal_record(record)
+            return record
+
+        started = time.perf_counter()
+        if self.jobs > 1 and start == 0 and entry_size >= self.split_threshold:
+            self._extract_split(entry, file_path, on_copy, record)
+            record["copy_seconds"] = round(time.perf_counter() - started, 6)
+            self._journal_record(record)
+            return record
+
+        # Extrair arquivo em chunks (para arquivos grandes)
+        with open_output(file_path, start) as out_file:
+            out_fd = out_file.fileno()
+            if start:
+                self.log(f"↻ {display_path}: continuando de {format_size(start)}", "info")
+                os.lseek(out_fd, start, os.SEEK_SET)
+            # Arquivos de um único bloco já são alocados de uma vez pelo sistema de arquivos
+            available = self._available_size(entry)
+            if self.preallocate and not self.sparse and available - start > self.chunk_size:
+                self._preallocate(out_fd, available, display_path)
+            hasher = MultiHasher(self.hashes) if self.hashes else None
+            if data is not None:
+                self._copy_buffer(data, start, out_fd, on_copy, hasher, self.sparse)
+            else:
+                if hasher is not None:
+                    # Trecho já extraído (retomada) só entra no hash
+                    for chunk in self.reader.iter_views(entry_offset, start):
+                        hasher.update(chunk)
+                copy_range(self.reader.fd, out_fd, entry_offset + start, entry_size - start,
+                           chunk_size=self.chunk_size, zero_copy=self.zero_copy, progress=on_copy,
+                           pipeline=self._pipeline(),
+                           sink=hasher.update if hasher is not None else None,
+                           sparse=self.sparse)
+            if self.sparse:
+                # Trecho zerado no fim não estende o arquivo
+                os.ftruncate(out_fd, os.lseek(out_fd, 0, os.SEEK_CUR))
+            if hasher is not None:
+                record["hashes"] = hasher.hexdigests()
+            if self.fsync:
+                fsync_started = time.perf_counter()
+                os.fsync(out_fd)
+                with self._journal_lock:
+                    self._fsync_seconds += time.perf_counter() - fsync_started
+
+        record["copy_seconds"] = round(time.perf_counter() - started, 6)
+        self._journal_record(record)
+        return record
+
+    def _extract_stored(self, entry, file_path, on_copy, record, data=None):
+        """Extrai pelo repositório: hash primeiro, cópia só se o conteúdo for novo
+
+        O hash é lido do PKG (mapeamento ou leitura agrupada), então uma
+        entrada já guardada por outra extração custa só a leitura e o link.
+        """
+        started = time.perf_counter()
+        size = self._available_size(entry)
+        algorithms = (STORE_ALGORITHM,) + tuple(name for name in self.hashes
+                                                if name != STORE_ALGORITHM)
+        hasher = MultiHasher(algorithms)
+        for chunk in (data,) if data is not None else self.reader.iter_views(entry.offset, size):
+            hasher.update(chunk)
+        hashes = hasher.hexdigests()
+        digest = hashes[STORE_ALGORITHM]
+
+        def write(out_fd):
+            if data is not None:
+                self._copy_buffer(data, 0, out_fd, on_copy, sparse=self.sparse)
+            else:
+                if self.preallocate and not self.sparse and size > self.chunk_size:
+                    self._preallocate(out_fd, size, record["path"])
+                copy_range(self.reader.fd, out_fd, entry.offset, size,
+                           chunk_size=self.chunk_size, zero_copy=self.zero_copy,
+                           progress=on_copy, pipeline=self._pipeline(), sparse=self.sparse)
+                if self.sparse:
+                    os.ftruncate(out_fd, size)
+            if self.fsync:
+                fsync_started = time.perf_counter()
+                os.fsync(out_fd)
+                with self._journal_lock:
+                    self._fsync_seconds += time.perf_counter() - fsync_started
+
+        stored = self.store.add(digest, size, write)
+        record["hashes"] = hashes
+        record["stored"] = "new" if stored else "reused"
+        record["link"] = self.store.materialize(digest, file_path)
+        record["copy_seconds"] = round(time.perf_counter() - started, 6)
+        self._journal_record(record)
+        return record
+
+    def _pipeline(self):
+        """Pipeline de cópia da thread atual (buffers reaproveitados entre entradas)"""
+        pipeline = getattr(self._local, "pipeline", None)
+        if pipeline is None:
+            pipeline = CopyPipeline(self.chunk_size, self.queue_depth)
+            self._local.pipeline = pipeline
+            with self._journal_lock:
+                self._pipelines.append(pipeline)
+        return pipeline
+
+    def _range_executor(self):
+        """Pool das faixas de entradas divididas (separado do pool de entradas)"""
+        with self._range_pool_lock:
+            if self._range_pool is None:
+                self._range_pool = ThreadPoolExecutor(max_workers=self.jobs)
+            return self._range_pool
+
+    def _range_buffer(self):
+        """Buffer de cópia da thread atual, reaproveitado entre faixas"""
+        buffer = getattr(self._local, "range_buffer", None)
+        if buffer is None:
+            buffer = self._local.range_buffer = bytearray(self.chunk_size)
+        return buffer
+
+    def _extract_split(self, entry, file_path, on_copy, record):
+        """Copia uma entrada grande em faixas paralelas, com escritas posicionais
+
+        O arquivo é criado com o tamanho final e cada faixa grava na sua
+        posição. Enquanto isso, a thread que chamou calcula os hashes em
+        ordem, lendo do mapeamento. A cópia é feita em <nome>.part e só
+        recebe o nome final quando completa, então uma interrupção não
+        deixa um arquivo do tamanho certo com buracos (--resume refaz).
+        """
+        # Entradas cortadas pelo fim do PKG ficam só com os bytes que existem
+        size = self._available_size(entry)
+        part_path = file_path + PARTIAL_SUFFIX
+        lock = threading.Lock()
+
+        def progress(nbytes):
+            if on_copy is not None:
+                with lock:
+                    on_copy(nbytes)
+
+        def copy_part(pos, length):
+            copy_range_at(self.reader.fd, out_fd, entry.offset + pos, pos, length,
+                          self._range_buffer(), zero_copy=self.zero_copy, progress=progress,
+                          sparse=self.sparse)
+
+        futures = []
+        try:
+            with open_output(part_path) as out_file:
+                out_fd = out_file.fileno()
+                # As faixas gravam em posições fixas: o arquivo já nasce com o tamanho final
+                if (self.sparse or not self.preallocate
+                        or not self._preallocate(out_fd, size, record["path"], keep_size=False)):
+                    os.ftruncate(out_fd, size)
+
+                pool = self._range_executor()
+                futures = [pool.submit(copy_part, pos, min(self.split_size, size - pos))
+                           for pos in range(0, size, self.split_size)]
+
+                try:
+                    if self.hashes:
+                        hasher = MultiHasher(self.hashes)
+                        for chunk in self.reader.iter_views(entry.offset, size):
+                            hasher.update(chunk)
+                        record["hashes"] = hasher.hexdigests()
+                finally:
+                    # Todas as faixas terminam antes de fechar o arquivo, mesmo com erro
+                    wait(futures)
+                for future in futures:
+                    future.result()
+
+                if self.fsync:
+                    fsync_started = time.perf_counter()
+                    os.fsync(out_fd)
+                    with self._journal_lock:
+                        self._fsync_seconds += time.perf_counter() - fsync_started
+
+            os.replace(part_path, file_path)
+        except BaseException:
+            # Um .part incompleto não é reaproveitado por ninguém (--resume refaz a entrada)
+            try:
+                os.remove(part_path)
+            except OSError:
+                pass
+            raise
+        record["split_ranges"] = len(futures)
+
+    @staticmethod
+    def _copy_buffer(data, start, out_fd, on_copy, hasher=None, sparse=False):
+        """Grava uma entrada que já está em memória (leitura agrupada)"""
+        if hasher is not None:
+            hasher.update(data)
+        if sparse:
+            write_sparse(out_fd, bytes(data[start:]), len(data) - start)
+            os.ftruncate(out_fd, len(data))
+        else:
+            write_all(out_fd, data[start:])
+        on_copy(len(data) - start)
+
+    def _existing_hashes(self, entry, display_path, data=None):
+        """Hashes de um arquivo que já estava completo (do relatório anterior, se houver)"""
+        previous = self._completed.get(display_path) or {}
+        hashes = previous.get("hashes") or {}
+        if previous.get("offset") == entry.offset and all(name in hashes for name in self.hashes):
+            return {name: hashes[name] for name in self.hashes}
+
+        hasher = MultiHasher(self.hashes)
+        for chunk in (data,) if data is not None else self.reader.iter_views(entry.offset, entry.size):
+            hasher.update(chunk)
+        return hasher.hexdigests()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Diferença entre duas versões de um PKG
+As entradas são pareadas pelo caminho resolvido (subdir/nome) e pelo ID.
+Tamanhos diferentes já bastam para marcar uma entrada como modificada;
+só as de mesmo tamanho têm o conteúdo lido, comparado bloco a bloco e
+interrompido na primeira diferença. Nada é gravado no disco.
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pkg_core import PkgExtractor, entry_path, format_size
+
+# Primeiro bloco comparado é pequeno: headers e versões costumam mudar no início
+PROBE_SIZE = 64 * 1024
+COMPARE_CHUNK = 8 * 1024 * 1024
+
+# Relatório gravado junto com as entradas extraídas por `diff --extract`
+DIFF_FILENAME = "diff_info.json"
+
+
+def _null_log(message, log_type="info"):
+    pass
+
+
+def _mismatch(a, b):
+    """Índice do primeiro byte diferente entre dois blocos (busca binária, sem laço por byte)"""
+    low, high = 0, min(len(a), len(b))
+    if a[:high] == b[:high]:
+        return high
+    # Invariante: a[:low] == b[:low] e a[:high] != b[:high]
+    while high - low > 1:
+        mid = (low + high) // 2
+        if a[low:mid] == b[low:mid]:
+            low = mid
+        else:
+            high = mid
+    return low
+
+
+def _describe(entry, path):
+    return {"path": path, "id": f"0x{entry.id:04X}", "size": entry.size}
+
+
+class PkgDiff:
+    """Compara as entradas de dois PKGs abertos (`PkgReader`)"""
+
+    def __init__(self, old_reader, new_reader, recovery=False, jobs=1,
+                 chunk_size=COMPARE_CHUNK, log=None):
+        self.old = old_reader
+        self.new = new_reader
+        self.recovery = recovery
+        self.jobs = max(1, int(jobs))
+        self.chunk_size = max(PROBE_SIZE, int(chunk_size))
+        self.log = log or _null_log
+        self.changed_entries = []
+
+    def _index(self, reader):
+        """Entradas por (caminho, ID); repetições recebem um contador"""
+        entries = reader.entries(recovery=self.recovery)
+        reader.sniff_names(entries)
+        index = {}
+        for entry in entries:
+            path = entry_path(*reader.entry_name(entry))
+            key = (path, entry.id)
+            n = 1
+            while key in index:
+                n += 1
+                key = (f"{path}#{n}", entry.id)
+            index[key] = entry
+        return index
+
+    def _first_difference(self, old_entry, new_entry):
+        """Offset da primeira diferença entre duas entradas de mesmo tamanho, ou None"""
+        size = new_entry.size
+        pos = 0
+        step = min(PROBE_SIZE, size)
+        while pos < size:
+            n = min(step, size - pos)
+            old_data = self.old.read_at(old_entry.offset + pos, n)
+            new_data = self.new.read_at(new_entry.offset + pos, n)
+            if old_data != new_data:
+                return pos + _mismatch(old_data, new_data)
+            pos += n
+            step = self.chunk_size
+        return None
+
+    def compare(self):
+        """Executa a comparação e retorna o relatório (added/removed/modified)"""
+        started = time.perf_counter()
+        old_index = self._index(self.old)
+        new_index = self._index(self.new)
+
+        added = [key for key in new_index if key not in old_index]
+        removed = [key for key in old_index if key not in new_index]
+        modified = []
+        same_size = []
+        for key, new_entry in new_index.items():
+            old_entry = old_index.get(key)
+            if old_entry is None:
+                continue
+            if old_entry.size != new_entry.size:
+                modified.append((key, "size", None))
+            else:
+                same_size.append(key)
+
+        # Leitura em ordem de offset no PKG antigo
+        same_size.sort(key=lambda key: old_index[key].offset)
+        compared_bytes = sum(new_index[key].size for key in same_size)
+        self.log(f"Comparando {len(same_size)} entradas de mesmo tamanho "
+                 f"({format_size(compared_bytes)}); {len(modified)} diferem no tamanho", "info")
+
+        def check(key):
+            return key, self._first_difference(old_index[key], new_index[key])
+
+        if self.jobs > 1:
+            with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+                differences = list(pool.map(check, same_size))
+        else:
+            differences = [check(key) for key in same_size]
+        unchanged = 0
+        for key, offset in differences:
+            if offset is None:
+                unchanged += 1
+            else:
+                modified.append((key, "content", offset))
+
+        order = {key: i for i, key in enumerate(new_index)}
+        modified.sort(key=lambda item: order[item[0]])
+        self.changed_entries = [new_index[key] for key in added]
+        self.changed_entries += [new_index[key] for key, _, _ in modified]
+
+        modified_list = []
+        for key, reason, offset in modified:
+            record = _describe(new_index[key], key[0])
+            record["old_size"] = old_index[key].size
+            record["reason"] = reason
+            if offset is not None:
+                record["first_difference"] = offset
+            modified_list.append(record)
+
+        seconds = time.perf_counter() - started
+        return {
+            "old_pkg": os.path.basename(self.old.path),
+            "new_pkg": os.path.basename(self.new.path),
+            "added": [_describe(new_index[key], key[0]) for key in added],
+            "removed": [_describe(old_index[key], key[0]) for key in removed],
+            "modified": modified_list,
+            "unchanged": unchanged,
+            "same_size_bytes": compared_bytes,
+            "seconds": round(seconds, 3),
+        }
+
+    def extract_changed(self, output_base=None, **options):
+        """Extrai do PKG novo só as entradas adicionadas e modificadas (após `compare`)"""
+        extractor = PkgExtractor(self.new, output_base=output_base, recovery=self.recovery,
+                                 log=self.log, only=self.changed_entries, **options)
+        return extractor, extractor.extract()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Canal de eventos entre o motor de extração e a interface
+A thread de extração só publica eventos; a interface os consome no seu
+próprio loop, em lotes, sem tocar em widgets fora da thread principal
+"""
+
+import queue
+import threading
+
+
+class EventChannel:
+    """Fila de eventos thread-safe com progresso agregado
+
+    Mensagens de log são enfileiradas em ordem. O progresso não é
+    enfileirado: só o valor mais recente é guardado, então milhares de
+    atualizações por segundo custam uma atribuição cada.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._progress = None
+
+    def log(self, message, log_type="info"):
+        self._queue.put(("log", message, log_type))
+
+    def progress(self, stats):
+        with self._lock:
+            self._progress = stats
+
+    def post(self, kind, *payload):
+        """Publica um evento qualquer (ex.: fim da extração)"""
+        self._queue.put((kind,) + payload)
+
+    def drain(self, max_events=None):
+        """Retorna (logs, progresso, outros eventos) pendentes desde a última chamada"""
+        logs = []
+        events = []
+        count = 0
+        while max_events is None or count < max_events:
+            try:
+                event = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            count += 1
+            if event[0] == "log":
+                logs.append((event[1], event[2]))
+            else:
+                events.append(event)
+
+        with self._lock:
+            progress, self._progress = self._progress, None
+
+        return logs, progress, events
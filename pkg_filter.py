@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Filtro de entradas do PKG
+Além das extensões ("*.bin *.elf"), aceita globs no caminho completo
+("sce_sys/*", "icon*"), faixas de ID ("id:0x1000-0x12FF") e limites de
+tamanho ("size:>1M", "size:4K-64K"). ID e tamanho vêm da tabela, então
+essas condições são decididas sem ler o conteúdo das entradas.
+"""
+
+import re
+import fnmatch
+
+_EXTENSION_RE = re.compile(r'^\*(\.[^*?\[\]/]+)$')
+_SIZE_RE = re.compile(r'^(>=|<=|>|<)?(\d+(?:\.\d+)?[KMGT]?)(?:-(\d+(?:\.\d+)?[KMGT]?))?$', re.IGNORECASE)
+
+MATCH_ALL = "*.*"
+
+
+def parse_size(text):
+    """Converte "512K", "64M", "2G" em bytes"""
+    text = str(text).strip().upper()
+    units = {"K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def _parse_id_range(text):
+    low, sep, high = text.partition("-")
+    low = int(low, 0)
+    high = int(high, 0) if sep else low
+    if high < low:
+        raise ValueError
+    return low, high
+
+
+def _parse_size_bound(text):
+    match = _SIZE_RE.match(text)
+    if not match:
+        raise ValueError
+    op, first, second = match.groups()
+    if second is not None:
+        if op:
+            raise ValueError
+        return parse_size(first), parse_size(second)
+    value = parse_size(first)
+    return {
+        None: (value, value),
+        ">": (value + 1, None),
+        ">=": (value, None),
+        "<": (0, value - 1),
+        "<=": (0, value),
+    }[op]
+
+
+class EntryFilter:
+    """Condições de seleção de entradas
+
+    Extensões e globs são alternativas entre si (basta um casar), assim
+    como as faixas de ID; cada limite de tamanho precisa ser respeitado.
+    Globs sem "/" também são comparados só com o nome do arquivo.
+    """
+
+    def __init__(self, format_filter=MATCH_ALL):
+        if isinstance(format_filter, str):
+            terms = format_filter.split()
+        else:
+            terms = list(format_filter)
+
+        self.terms = terms
+        self.match_all_names = False
+        self.extensions = set()
+        self.globs = []
+        self.id_ranges = []
+        self.size_bounds = []
+
+        for term in terms:
+            lower = term.lower()
+            if lower.startswith("id:"):
+                try:
+                    self.id_ranges.append(_parse_id_range(term[3:]))
+                except ValueError:
+                    raise ValueError(f"Faixa de ID inválida no filtro: {term}")
+            elif lower.startswith("size:"):
+                try:
+                    self.size_bounds.append(_parse_size_bound(term[5:]))
+                except (ValueError, KeyError):
+                    raise ValueError(f"Limite de tamanho inválido no filtro: {term}")
+            elif term == MATCH_ALL:
+                self.match_all_names = True
+            elif _EXTENSION_RE.match(term):
+                self.extensions.add(_EXTENSION_RE.match(term).group(1).lower())
+            else:
+                self.globs.append(lower)
+
+        if not self.extensions and not self.globs:
+            self.match_all_names = True
+
+    def __str__(self):
+        return " ".join(self.terms)
+
+    @property
+    def matches_everything(self):
+        """True quando nenhuma entrada pode ser descartada"""
+        return self.match_all_names and not self.id_ranges and not self.size_bounds
+
+    def accepts_metadata(self, entry_id, size):
+        """Condições que só dependem da tabela (ID e tamanho)"""
+        if self.id_ranges and not any(low <= entry_id <= high for low, high in self.id_ranges):
+            return False
+        return self._accepts_size(size)
+
+    def _accepts_size(self, size):
+        for low, high in self.size_bounds:
+            if size < low or (high is not None and size > high):
+                return False
+        return True
+
+    def accepts_name(self, path):
+        """Condições de nome; `path` é o caminho relativo ("sce_sys/icon0.png")"""
+        if self.match_all_names:
+            return True
+
+        path = path.lower()
+        name = path.rsplit("/", 1)[-1]
+        dot = name.rfind(".")
+        if dot > 0 and name[dot:] in self.extensions:
+            return True
+
+        for pattern in self.globs:
+            if fnmatch.fnmatchcase(path, pattern):
+                return True
+            if "/" not in pattern and fnmatch.fnmatchcase(name, pattern):
+                return True
+        return False
+
+    def accepts(self, entry_id, size, path):
+        return self.accepts_metadata(entry_id, size) and self.accepts_name(path)
+
+    def accepts_file(self, size, path):
+        """Arquivos sem ID (de dentro do PFS): só nome e tamanho; faixas de ID não se aplicam"""
+        return self._accepts_size(size) and self.accepts_name(path)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hashes calculados durante a extração
+Cada bloco copiado também alimenta os hashes da entrada, então o
+arquivo extraído não precisa ser lido de novo para gerar o relatório
+"""
+
+import zlib
+import hashlib
+
+# Checksums rápidos (não criptográficos) do zlib
+FAST_CHECKSUMS = {
+    "crc32": zlib.crc32,
+    "adler32": zlib.adler32,
+}
+_CHECKSUM_START = {"crc32": 0, "adler32": 1}
+
+DEFAULT_ALGORITHMS = ("sha256",)
+
+
+class _Checksum:
+    """Interface de hashlib para crc32/adler32"""
+
+    __slots__ = ('_func', '_value')
+
+    def __init__(self, name):
+        self._func = FAST_CHECKSUMS[name]
+        self._value = _CHECKSUM_START[name]
+
+    def update(self, data):
+        self._value = self._func(data, self._value)
+
+    def hexdigest(self):
+        return f"{self._value:08x}"
+
+
+def new_hash(name):
+    """Cria o hash `name` (algoritmo do hashlib, crc32 ou adler32)"""
+    if name in FAST_CHECKSUMS:
+        return _Checksum(name)
+    return hashlib.new(name)
+
+
+def parse_algorithms(text):
+    """Converte "sha256,crc32" em tupla validada; levanta ValueError se desconhecido"""
+    if isinstance(text, str):
+        names = [name.strip().lower() for name in text.replace(" ", ",").split(",")]
+    else:
+        names = [name.lower() for name in text]
+
+    algorithms = []
+    for name in names:
+        if not name or name in algorithms:
+            continue
+        if name not in FAST_CHECKSUMS and name not in hashlib.algorithms_available:
+            raise ValueError(f"Algoritmo de hash desconhecido: {name}")
+        algorithms.append(name)
+    return tuple(algorithms)
+
+
+class MultiHasher:
+    """Vários hashes alimentados pelos mesmos blocos"""
+
+    def __init__(self, algorithms):
+        self._hashes = [(name, new_hash(name)) for name in algorithms]
+
+    def update(self, data):
+        for name, digest in self._hashes:
+            digest.update(data)
+
+    def hexdigests(self):
+        """Dicionário algoritmo -> hash em hexadecimal"""
+        return {name: digest.hexdigest() for name, digest in self._hashes}
@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rotinas de E/S posicional usadas pelo extrator
+Permitem que várias threads leiam o mesmo PKG sem disputar o ponteiro de seek
+"""
+
+import os
+import sys
+import errno
+import queue
+import threading
+
+try:
+    import ctypes
+except ImportError:  # ctypes só é usado para o fallocate do Linux
+    ctypes = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem ioctl, clone_file sempre recusa
+    fcntl = None
+
+CHUNK_SIZE = 8 * 1024 * 1024  # 8MB por vez
+# Buffers em circulação entre leitura e escrita na cópia em pipeline
+PIPELINE_DEPTH = 4
+# Bytes por chamada de cópia no kernel (limita o intervalo entre atualizações de progresso)
+KERNEL_CHUNK_SIZE = 64 * 1024 * 1024
+
+# Blocos totalmente zerados deste tamanho viram buracos com --sparse
+SPARSE_BLOCK = 64 * 1024
+_ZERO_BLOCK = bytes(SPARSE_BLOCK)
+# fallocate(2): reserva os blocos sem mudar o tamanho visível do arquivo
+FALLOC_FL_KEEP_SIZE = 0x01
+# ioctl FICLONE (Linux): o destino passa a compartilhar os blocos da origem (btrfs, XFS)
+FICLONE = 0x40049409
+
+HAS_COPY_FILE_RANGE = hasattr(os, 'copy_file_range')
+# sendfile só aceita arquivo comum como destino no Linux
+HAS_SENDFILE = hasattr(os, 'sendfile') and sys.platform.startswith('linux')
+
+# Erros que indicam "não suportado aqui" (ex.: entre sistemas de arquivos); descritor
+# inválido ou sem permissão de escrita é bug e continua levantando OSError
+_FALLBACK_ERRNOS = {
+    errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP,
+    getattr(errno, 'ENOTSUP', errno.EOPNOTSUPP),
+}
+
+_seek_lock = threading.Lock()
+
+
+if hasattr(os, 'pread'):
+    def _pread_once(fd, size, offset):
+        return os.pread(fd, size, offset)
+else:
+    # Windows: sem pread, serializa lseek + read no descritor compartilhado
+    def _pread_once(fd, size, offset):
+        with _seek_lock:
+            os.lseek(fd, offset, os.SEEK_SET)
+            return os.read(fd, size)
+
+
+def pread(fd, size, offset):
+    """Lê até `size` bytes em `offset` sem alterar a posição do descritor"""
+    data = _pread_once(fd, size, offset)
+    if len(data) == size or not data:
+        return data
+
+    # Leitura curta: continuar até completar ou chegar ao fim do arquivo
+    parts = [data]
+    got = len(data)
+    while got < size:
+        data = _pread_once(fd, size - got, offset + got)
+        if not data:
+            break
+        parts.append(data)
+        got += len(data)
+    return b''.join(parts)
+
+
+if hasattr(os, 'preadv'):
+    def _preadinto_once(fd, view, offset):
+        return os.preadv(fd, [view], offset)
+else:
+    def _preadinto_once(fd, view, offset):
+        data = _pread_once(fd, len(view), offset)
+        view[:len(data)] = data
+        return len(data)
+
+
+def preadinto(fd, view, offset):
+    """Lê em `view` (buffer gravável) a partir de `offset`; retorna quantos bytes leu"""
+    got = _preadinto_once(fd, view, offset)
+    if got == len(view) or got == 0:
+        return got
+
+    # Leitura curta: continuar até completar ou chegar ao fim do arquivo
+    while got < len(view):
+        n = _preadinto_once(fd, view[got:], offset + got)
+        if n == 0:
+            break
+        got += n
+    return got
+
+
+if hasattr(os, 'pwrite'):
+    def _pwrite_once(fd, data, offset):
+        return os.pwrite(fd, data, offset)
+else:
+    # Windows: sem pwrite, serializa lseek + write
+    def _pwrite_once(fd, data, offset):
+        with _seek_lock:
+            os.lseek(fd, offset, os.SEEK_SET)
+            return os.write(fd, data)
+
+
+def pwrite_all(fd, data, offset):
+    """Escreve todo o buffer em `offset` sem alterar a posição do descritor"""
+    view = memoryview(data)
+    while view:
+        written = _pwrite_once(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+
+def write_all(fd, data):
+    """Escreve todo o buffer no descritor (trata escritas parciais)"""
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+def _is_zero(data, start, end):
+    if end - start == SPARSE_BLOCK:
+        return data.startswith(_ZERO_BLOCK, start)
+    return data.count(0, start, end) == end - start
+
+
+def write_sparse(fd, data, size, offset=None):
+    """Grava data[:size] sem escrever os blocos zerados (viram buracos no arquivo)
+
+    `data` é bytes ou bytearray. Sem `offset`, grava na posição atual e
+    avança o ponteiro; como um trecho zerado no fim não estende o arquivo,
+    o chamador ajusta o tamanho final com ftruncate. Retorna quantos bytes
+    foram pulados.
+    """
+    seek = offset is None
+    if seek:
+        offset = os.lseek(fd, 0, os.SEEK_CUR)
+
+    view = memoryview(data)
+    skipped = 0
+    pending = 0  # início do trecho com dados ainda não gravado
+    pos = 0
+    while pos < size:
+        end = min(pos + SPARSE_BLOCK, size)
+        if _is_zero(data, pos, end):
+            if pending < pos:
+                pwrite_all(fd, view[pending:pos], offset + pending)
+            pending = end
+            skipped += end - pos
+        pos = end
+    if pending < size:
+        pwrite_all(fd, view[pending:size], offset + pending)
+
+    if seek:
+        os.lseek(fd, offset + size, os.SEEK_SET)
+    return skipped
+
+
+_fallocate = None
+
+
+def _libc_fallocate():
+    """fallocate(2) da libc, carregado uma vez (None fora do Linux)"""
+    global _fallocate
+    if _fallocate is None:
+        _fallocate = False
+        if ctypes is not None and sys.platform.startswith('linux'):
+            try:
+                libc = ctypes.CDLL(None, use_errno=True)
+                func = getattr(libc, 'fallocate64', None) or libc.fallocate
+                func.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int64, ctypes.c_int64]
+                func.restype = ctypes.c_int
+                _fallocate = func
+            except (OSError, AttributeError):
+                pass
+    return _fallocate or None
+
+
+def preallocate(fd, size, keep_size=False):
+    """Reserva de uma vez o espaço de `size` bytes (arquivo menos fragmentado)
+
+    Com `keep_size` o tamanho visível não muda (FALLOC_FL_KEEP_SIZE, só no
+    Linux), então um arquivo interrompido continua mostrando quanto já foi
+    escrito. Sem ele usa posix_fallocate, que estende o arquivo até `size`.
+    Retorna False se não houver suporte; falta de espaço levanta OSError.
+    """
+    if size <= 0:
+        return False
+    if keep_size:
+        func = _libc_fallocate()
+        if func is None:
+            return False
+        if func(fd, FALLOC_FL_KEEP_SIZE, 0, size) == 0:
+            return True
+        err = ctypes.get_errno()
+        if err in _FALLBACK_ERRNOS:
+            return False
+        raise OSError(err, os.strerror(err))
+
+    if not hasattr(os, 'posix_fallocate'):
+        return False
+    try:
+        os.posix_fallocate(fd, 0, size)
+    except OSError as e:
+        if e.errno in _FALLBACK_ERRNOS:
+            return False
+        raise
+    return True
+
+
+def clone_file(src_fd, dst_fd):
+    """Reflink: `dst_fd` vira uma cópia da origem sem copiar dados (copy-on-write)
+
+    Retorna False se o sistema de arquivos (ou o sistema operacional) não suportar.
+    """
+    if fcntl is None or not sys.platform.startswith('linux'):
+        return False
+    try:
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+    except OSError as e:
+        if e.errno in _FALLBACK_ERRNOS or e.errno == errno.ENOTTY:
+            return False
+        raise
+    return True
+
+
+def _null_progress(nbytes):
+    pass
+
+
+def _kernel_copy(src_fd, out_fd, offset, size, progress=_null_progress):
+    """Copia dentro do kernel; retorna quantos bytes foram copiados"""
+    copied = 0
+
+    if HAS_COPY_FILE_RANGE:
+        try:
+            while copied < size:
+                count = min(KERNEL_CHUNK_SIZE, size - copied)
+                n = os.copy_file_range(src_fd, out_fd, count, offset + copied)
+                if n == 0:
+                    return copied
+                copied += n
+                progress(n)
+            return copied
+        except OSError as e:
+            if e.errno not in _FALLBACK_ERRNOS:
+                raise
+
+    if HAS_SENDFILE:
+        try:
+            while copied < size:
+                count = min(KERNEL_CHUNK_SIZE, size - copied)
+                n = os.sendfile(out_fd, src_fd, offset + copied, count)
+                if n == 0:
+                    return copied
+                copied += n
+                progress(n)
+        except OSError as e:
+            if e.errno not in _FALLBACK_ERRNOS:
+                raise
+
+    return copied
+
+
+class CopyPipeline:
+    """Cópia em dois estágios: leitura na thread que chama, escrita em uma thread própria
+
+    Os buffers são alocados uma vez (sob demanda, até `depth`) e
+    reaproveitados com readinto/preadv, sem criar um `bytes` por bloco.
+    Enquanto um bloco é gravado o próximo já está sendo lido, então
+    origem e destino trabalham ao mesmo tempo; a memória fica limitada a
+    depth × chunk_size. Cada instância atende uma thread por vez.
+    """
+
+    def __init__(self, chunk_size=CHUNK_SIZE, depth=PIPELINE_DEPTH):
+        self.chunk_size = chunk_size
+        self.depth = max(2, depth)
+        self._free = queue.Queue()
+        self._filled = queue.Queue()
+        self._allocated = 0
+        self._error = None
+        self._thread = None
+
+    def _buffer(self):
+        try:
+            return self._free.get_nowait()
+        except queue.Empty:
+            pass
+        if self._allocated < self.depth:
+            self._allocated += 1
+            return bytearray(self.chunk_size)
+        # Todos em uso: espera o escritor devolver um
+        return self._free.get()
+
+    def _run(self):
+        while True:
+            item = self._filled.get()
+            if item is None:
+                return
+            if isinstance(item, threading.Event):
+                item.set()
+                continue
+
+            out_fd, buf, n, progress, sink, sparse = item
+            try:
+                if self._error is None:
+                    view = memoryview(buf)[:n]
+                    if sparse:
+                        write_sparse(out_fd, buf, n)
+                    else:
+                        write_all(out_fd, view)
+                    # O hash roda aqui, fora do caminho da leitura
+                    if sink is not None:
+                        sink(view)
+                    progress(n)
+            except BaseException as e:
+                self._error = e
+            finally:
+                self._free.put(buf)
+
+    def copy(self, src_fd, out_fd, offset, size, progress=None, sink=None, sparse=False):
+        """Copia `size` bytes de `src_fd` para a posição atual de `out_fd`
+
+        `sink(view)` recebe cada bloco depois de gravado (ex.: hash);
+        com `sparse` os blocos zerados não são escritos (ver write_sparse).
+        Retorna quantos bytes foram copiados.
+        """
+        progress = progress or _null_progress
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+        self._error = None
+        queued = 0
+        try:
+            while queued < size and self._error is None:
+                buf = self._buffer()
+                want = min(self.chunk_size, size - queued)
+                n = preadinto(src_fd, memoryview(buf)[:want], offset + queued)
+                if n == 0:
+                    self._free.put(buf)
+                    break
+                self._filled.put((out_fd, buf, n, progress, sink, sparse))
+                queued += n
+        finally:
+            # Espera o escritor terminar tudo o que foi enfileirado
+            done = threading.Event()
+            self._filled.put(done)
+            done.wait()
+
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+        return queued
+
+    def close(self):
+        """Encerra a thread de escrita"""
+        if self._thread is not None:
+            self._filled.put(None)
+            self._thread.join()
+            self._thread = None
+
+
+def copy_range_at(src_fd, out_fd, src_offset, dst_offset, size, buffer, zero_copy=True,
+                  progress=None, sparse=False):
+    """Copia `size` bytes para uma posição fixa de `out_fd`, sem usar o ponteiro do arquivo
+
+    Várias threads podem copiar faixas diferentes para o mesmo arquivo.
+    Usa copy_file_range com offset de destino quando possível; senão lê
+    em `buffer` (bytearray reaproveitado pelo chamador) e grava com pwrite.
+    Com `sparse` os blocos zerados são pulados (o arquivo já deve ter o
+    tamanho final).
+    """
+    progress = progress or _null_progress
+    copied = 0
+    if zero_copy and HAS_COPY_FILE_RANGE and not sparse:
+        try:
+            while copied < size:
+                count = min(KERNEL_CHUNK_SIZE, size - copied)
+                n = os.copy_file_range(src_fd, out_fd, count, src_offset + copied,
+                                       dst_offset + copied)
+                if n == 0:
+                    return copied
+                copied += n
+                progress(n)
+            return copied
+        except OSError as e:
+            if e.errno not in _FALLBACK_ERRNOS:
+                raise
+
+    view = memoryview(buffer)
+    while copied < size:
+        want = min(len(view), size - copied)
+        n = preadinto(src_fd, view[:want], src_offset + copied)
+        if n == 0:
+            break
+        if sparse:
+            write_sparse(out_fd, buffer, n, dst_offset + copied)
+        else:
+            pwrite_all(out_fd, view[:n], dst_offset + copied)
+        copied += n
+        progress(n)
+    return copied
+
+
+def copy_range(src_fd, out_fd, offset, size, chunk_size=CHUNK_SIZE, zero_copy=True,
+               progress=None, pipeline=None, sink=None, sparse=False):
+    """Copia `size` bytes do PKG (a partir de `offset`) para a posição atual de `out_fd`
+
+    Tenta copy_file_range/sendfile (sem passar pelo Python) e cai para o
+    loop em chunks quando o kernel ou o sistema de arquivos não suportam.
+    Com `pipeline`, o loop lê e grava em paralelo (ver CopyPipeline).
+    `progress(n)` é chamado a cada bloco copiado; `sink(dados)` recebe
+    cada bloco e desativa a cópia pelo kernel, que não passa pelo Python;
+    `sparse` também, pois precisa ver os blocos para pular os zerados.
+    """
+    progress = progress or _null_progress
+    bytes_written = 0
+    if zero_copy and sink is None and not sparse:
+        bytes_written = _kernel_copy(src_fd, out_fd, offset, size, progress)
+
+    remaining = size - bytes_written
+    if pipeline is not None and remaining > pipeline.chunk_size:
+        return bytes_written + pipeline.copy(src_fd, out_fd, offset + bytes_written, remaining,
+                                             progress, sink, sparse)
+
+    while bytes_written < size:
+        chunk_to_read = min(chunk_size, size - bytes_written)
+        chunk = pread(src_fd, chunk_to_read, offset + bytes_written)
+        if not chunk:
+            break
+        if sparse:
+            write_sparse(out_fd, chunk, len(chunk))
+        else:
+            write_all(out_fd, chunk)
+        if sink is not None:
+            sink(chunk)
+        bytes_written += len(chunk)
+        progress(len(chunk))
+    return bytes_written
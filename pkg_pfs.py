@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Leitura da imagem PFS que fica dentro do PKG
+O PFS guarda a árvore de arquivos do jogo: superbloco, tabela de inodes,
+diretórios (dirents) e os blocos de cada arquivo. Normalmente a imagem
+externa tem um único arquivo comprimido (pfs_image.dat, formato PFSC com
+blocos zlib) que contém o PFS interno com os arquivos de verdade. Tudo é
+lido sob demanda direto do PKG, sem gerar a imagem intermediária no disco.
+"""
+
+import zlib
+import struct
+import threading
+
+from pkg_io import CHUNK_SIZE
+
+PFS_VERSION = 1
+PFS_MAGIC = 20130315
+PFSC_MAGIC = b"PFSC"
+
+# Superbloco: version, magic, id, fmode, clean, read_only, rsv, mode, unk,
+# block_size, n_backup, n_block, dinode_count, nd_block, dinode_block_count, superroot_ino
+SUPERBLOCK_STRUCT = struct.Struct('<qqqBBBBHHiiqqqqq')
+MODE_SIGNED = 0x1
+MODE_64BIT = 0x2
+MODE_ENCRYPTED = 0x4
+
+# Inode de 32 bits: mode, nlink, flags, size, size_compressed ... blocks (0x60), ponteiros (0x64)
+INODE_STRUCT = struct.Struct('<HHIqq')
+INODE_BLOCKS_OFFSET = 0x60
+INODE_POINTERS_OFFSET = 0x64
+INODE_SIZE = 0xA8
+# Na versão assinada cada ponteiro vem depois de uma assinatura de 32 bytes
+INODE_SIGNED_SIZE = 0x2C8
+SIGNATURE_SIZE = 32
+DIRECT_BLOCKS = 12
+INDIRECT_BLOCKS = 5
+INODE_COMPRESSED = 0x1
+
+S_IFMT = 0xF000
+S_IFDIR = 0x4000
+
+# ino, type, namelen, entsize; o nome vem logo depois
+DIRENT_STRUCT = struct.Struct('<iiii')
+DIRENT_FILE = 2
+DIRENT_DIR = 3
+
+# magic, unk, unk, block_size, block_size2, block_offsets, data_start, data_length
+PFSC_STRUCT = struct.Struct('<4sIIIqqqq')
+
+ROOT_DIR = "uroot"
+NESTED_IMAGE = "pfs_image.dat"
+
+
+class PfsError(Exception):
+    """Imagem PFS ausente, criptografada ou corrompida"""
+
+
+def _join(views):
+    return b''.join(views)
+
+
+class PkgRegion:
+    """Trecho contíguo do PKG visto como uma imagem"""
+
+    def __init__(self, reader, offset, size):
+        self.reader = reader
+        self.offset = offset
+        self.size = max(0, min(size, reader.file_size - offset))
+
+    def views(self, offset, size):
+        size = max(0, min(size, self.size - offset))
+        return self.reader.iter_views(self.offset + offset, size, CHUNK_SIZE)
+
+    def read(self, offset, size):
+        return _join(self.views(offset, size))
+
+    def locate(self, offset, size):
+        """Posições no PKG dos bytes pedidos (para cópia direta pelo kernel)"""
+        return [(self.offset + offset, max(0, min(size, self.size - offset)))]
+
+
+class ExtentSource:
+    """Arquivo do PFS: lista de extents (offset na imagem, tamanho) em ordem"""
+
+    def __init__(self, parent, extents, size):
+        self.parent = parent
+        self.extents = extents
+        self.size = size
+
+    def _pieces(self, offset, size):
+        end = min(offset + size, self.size)
+        position = 0
+        for start, length in self.extents:
+            if offset >= end:
+                return
+            if offset < position + length:
+                skip = offset - position
+                n = min(length - skip, end - offset)
+                yield start + skip, n
+                offset += n
+            position += length
+
+    def views(self, offset, size):
+        for start, n in self._pieces(offset, size):
+            yield from self.parent.views(start, n)
+
+    def read(self, offset, size):
+        return _join(self.views(offset, size))
+
+    def locate(self, offset, size):
+        located = []
+        for start, n in self._pieces(offset, size):
+            parts = self.parent.locate(start, n)
+            if parts is None:
+                return None
+            for part_offset, part_size in parts:
+                if located and located[-1][0] + located[-1][1] == part_offset:
+                    located[-1] = (located[-1][0], located[-1][1] + part_size)
+                else:
+                    located.append((part_offset, part_size))
+        return located
+
+
+class PfscSource:
+    """Conteúdo de um arquivo PFSC: blocos de tamanho fixo, comprimidos com zlib
+
+    Cada bloco é descomprimido quando lido; a última descompressão de cada
+    thread fica guardada para leituras pequenas seguidas (inodes, dirents).
+    """
+
+    def __init__(self, parent):
+        self.parent = parent
+        header = parent.read(0, PFSC_STRUCT.size)
+        if len(header) < PFSC_STRUCT.size:
+            raise PfsError("Arquivo PFSC truncado")
+        magic, _, _, _, block_size, table_offset, _, data_length = PFSC_STRUCT.unpack(header)
+        if magic != PFSC_MAGIC:
+            raise PfsError("Cabeçalho PFSC inválido")
+        if block_size <= 0 or data_length < 0:
+            raise PfsError("Cabeçalho PFSC com tamanhos inválidos")
+
+        self.block_size = block_size
+        self.size = data_length
+        count = -(-data_length // block_size)
+        table = parent.read(table_offset, 8 * (count + 1))
+        if len(table) < 8 * (count + 1):
+            raise PfsError("Tabela de blocos PFSC truncada")
+        self._table = struct.unpack(f'<{count + 1}Q', table)
+        self._local = threading.local()
+
+    def _block(self, index):
+        cached = getattr(self._local, "block", None)
+        if cached is not None and cached[0] == index:
+            return cached[1]
+
+        start, end = self._table[index], self._table[index + 1]
+        stored = end - start
+        if stored >= self.block_size:
+            data = self.parent.read(start, self.block_size)
+        elif stored == 0:
+            data = bytes(self.block_size)
+        else:
+            try:
+                data = zlib.decompress(self.parent.read(start, stored))
+            except zlib.error as e:
+                raise PfsError(f"Bloco PFSC {index} corrompido: {e}")
+        if len(data) < self.block_size:
+            data += bytes(self.block_size - len(data))
+
+        self._local.block = (index, data)
+        return data
+
+    def views(self, offset, size):
+        end = min(offset + size, self.size)
+        while offset < end:
+            index, skip = divmod(offset, self.block_size)
+            n = min(self.block_size - skip, end - offset)
+            yield memoryview(self._block(index))[skip:skip + n]
+            offset += n
+
+    def read(self, offset, size):
+        return _join(self.views(offset, size))
+
+    def locate(self, offset, size):
+        return None
+
+
+class Inode:
+    """Inode do PFS (campos usados na extração)"""
+
+    __slots__ = ('number', 'mode', 'flags', 'size', 'size_compressed', 'blocks',
+                 'direct', 'indirect')
+
+    def __init__(self, number, mode, flags, size, size_compressed, blocks, direct, indirect):
+        self.number = number
+        self.mode = mode
+        self.flags = flags
+        self.size = size
+        self.size_compressed = size_compressed
+        self.blocks = blocks
+        self.direct = direct
+        self.indirect = indirect
+
+    @property
+    def is_dir(self):
+        return (self.mode & S_IFMT) == S_IFDIR
+
+    @property
+    def is_compressed(self):
+        return bool(self.flags & INODE_COMPRESSED)
+
+    @property
+    def stored_size(self):
+        """Bytes ocupados na imagem (comprimidos, se for o caso)"""
+        return self.size_compressed if self.is_compressed else self.size
+
+
+class PfsFile:
+    """Arquivo regular do PFS com o caminho relativo à raiz"""
+
+    __slots__ = ('path', 'inode', 'size', 'offset')
+
+    def __init__(self, path, inode, offset):
+        self.path = path
+        self.inode = inode
+        self.size = inode.size
+        # Posição do primeiro bloco na imagem (ordena as leituras)
+        self.offset = offset
+
+
+class PfsImage:
+    """Superbloco, inodes e árvore de diretórios de uma imagem PFS"""
+
+    def __init__(self, source):
+        self.source = source
+        raw = source.read(0, SUPERBLOCK_STRUCT.size)
+        if len(raw) < SUPERBLOCK_STRUCT.size:
+            raise PfsError("Imagem PFS truncada")
+        fields = SUPERBLOCK_STRUCT.unpack(raw)
+        version, magic, mode = fields[0], fields[1], fields[7]
+        block_size, n_block, dinode_count = fields[9], fields[11], fields[12]
+        dinode_block_count, superroot = fields[14], fields[15]
+
+        if magic != PFS_MAGIC or version != PFS_VERSION:
+            raise PfsError("Superbloco PFS não reconhecido: a imagem provavelmente está "
+                           "criptografada (PKG oficial) ou não é um PFS")
+        if mode & MODE_ENCRYPTED:
+            raise PfsError("Imagem PFS criptografada: só PKGs com o PFS descriptografado "
+                           "(ex.: fake/debug já convertidos) podem ser lidos")
+        if mode & MODE_64BIT:
+            raise PfsError("PFS com inodes de 64 bits não é suportado")
+        if block_size <= 0 or block_size & (block_size - 1):
+            raise PfsError(f"Tamanho de bloco PFS inválido: {block_size}")
+
+        self.mode = mode
+        self.block_size = block_size
+        self.n_block = n_block
+        self.signed = bool(mode & MODE_SIGNED)
+        if self.signed:
+            self._inode_size, self._stride, self._pointer_skip = INODE_SIGNED_SIZE, 36, SIGNATURE_SIZE
+        else:
+            self._inode_size, self._stride, self._pointer_skip = INODE_SIZE, 4, 0
+        self.inodes = self._read_inodes(dinode_count, dinode_block_count)
+        if not 0 <= superroot < len(self.inodes):
+            raise PfsError("Inode raiz do PFS fora da tabela")
+        self.superroot = superroot
+
+    @property
+    def compressed(self):
+        """True quando a imagem vem de um arquivo PFSC (PFS interno)"""
+        return isinstance(self.source, PfscSource)
+
+    def _pointers(self, data, offset, count):
+        stride, skip = self._stride, self._pointer_skip
+        return [struct.unpack_from('<I', data, offset + i * stride + skip)[0] for i in range(count)]
+
+    def _read_inodes(self, count, block_count):
+        """Tabela de inodes: começa no bloco 1; um inode nunca cruza blocos"""
+        per_block = self.block_size // self._inode_size
+        inodes = []
+        for block in range(1, block_count + 1):
+            data = self.source.read(block * self.block_size, self.block_size)
+            for i in range(per_block):
+                if len(inodes) == count:
+                    return inodes
+                pos = i * self._inode_size
+                if pos + self._inode_size > len(data):
+                    raise PfsError("Tabela de inodes truncada")
+                mode, _, flags, size, size_compressed = INODE_STRUCT.unpack_from(data, pos)
+                blocks = struct.unpack_from('<I', data, pos + INODE_BLOCKS_OFFSET)[0]
+                pointers = self._pointers(data, pos + INODE_POINTERS_OFFSET,
+                                          DIRECT_BLOCKS + INDIRECT_BLOCKS)
+                inodes.append(Inode(len(inodes), mode, flags, size, size_compressed, blocks,
+                                    pointers[:DIRECT_BLOCKS], pointers[DIRECT_BLOCKS:]))
+        return inodes
+
+    def _check_block(self, inode, block, length):
+        """Ponteiro fora da imagem: ler dali daria um arquivo cortado sem aviso"""
+        if block >= self.n_block or block * self.block_size + length > self.source.size:
+            raise PfsError(f"Inode {inode.number} aponta para o bloco {block}, fora da imagem "
+                           f"({self.n_block} blocos)")
+
+    def _indirect(self, inode, block, depth, limit):
+        """Até `limit` blocos de dados a partir de um bloco indireto de nível `depth`"""
+        self._check_block(inode, block, self.block_size)
+        data = self.source.read(block * self.block_size, self.block_size)
+        pointers = self._pointers(data, 0, len(data) // self._stride)
+        if depth == 1:
+            return pointers[:limit]
+        blocks = []
+        for pointer in pointers:
+            if pointer == 0 or len(blocks) >= limit:
+                break
+            blocks += self._indirect(inode, pointer, depth - 1, limit - len(blocks))
+        return blocks
+
+    def _block_map(self, inode):
+        """Números dos blocos de dados do inode, em ordem"""
+        count = -(-inode.stored_size // self.block_size)
+        if count == 0:
+            return []
+        blocks = inode.direct[:min(count, DIRECT_BLOCKS)]
+        # ib[0] é indireto simples, ib[1] duplo, e assim por diante
+        for depth, pointer in enumerate(inode.indirect, 1):
+            if len(blocks) >= count or pointer == 0:
+                break
+            blocks += self._indirect(inode, pointer, depth, count - len(blocks))
+        if len(blocks) == count and 0 not in blocks:
+            return blocks
+        # Layout contíguo: só o primeiro ponteiro preenchido, dados em sequência a partir dele
+        if inode.direct[0] and not any(inode.direct[1:]) and not any(inode.indirect):
+            return list(range(inode.direct[0], inode.direct[0] + count))
+        # Mapa parcial: adivinhar os blocos extrairia dados errados sem aviso
+        raise PfsError(f"Mapa de blocos incompleto no inode {inode.number} "
+                       f"({sum(1 for block in blocks if block)} de {count} blocos)")
+
+    def _extents(self, inode):
+        extents = []
+        remaining = inode.stored_size
+        for block in self._block_map(inode):
+            n = min(self.block_size, remaining)
+            self._check_block(inode, block, n)
+            start = block * self.block_size
+            if extents and extents[-1][0] + extents[-1][1] == start:
+                extents[-1] = (extents[-1][0], extents[-1][1] + n)
+            else:
+                extents.append((start, n))
+            remaining -= n
+        return extents
+
+    def open_inode(self, inode):
+        """Conteúdo do inode como imagem legível (descomprimido, se preciso)"""
+        source = ExtentSource(self.source, self._extents(inode), inode.stored_size)
+        if inode.is_compressed:
+            source = PfscSource(source)
+        return source
+
+    def open(self, pfs_file):
+        return self.open_inode(pfs_file.inode)
+
+    def _inode(self, number):
+        if not 0 <= number < len(self.inodes):
+            raise PfsError(f"Dirent aponta para inode inexistente: {number}")
+        return self.inodes[number]
+
+    def listdir(self, inode):
+        """(nome, inode) de cada entrada do diretório, sem "." e ".." """
+        data = self.open_inode(inode).read(0, inode.size)
+        block_size = self.block_size
+        pos = 0
+        while pos + DIRENT_STRUCT.size <= len(data):
+            number, kind, name_len, entry_size = DIRENT_STRUCT.unpack_from(data, pos)
+            if entry_size <= 0:
+                # Resto do bloco sem entradas
+                pos = (pos // block_size + 1) * block_size
+                continue
+            if kind in (DIRENT_FILE, DIRENT_DIR):
+                start = pos + DIRENT_STRUCT.size
+                name = data[start:start + name_len].decode('utf-8', 'replace')
+                if name not in ("", ".", "..") and "/" not in name and "\\" not in name:
+                    yield name, self._inode(number)
+            pos += entry_size
+
+    def root(self):
+        """Diretório raiz dos arquivos (uroot, se existir)"""
+        superroot = self.inodes[self.superroot]
+        for name, inode in self.listdir(superroot):
+            if name == ROOT_DIR and inode.is_dir:
+                return inode
+        return superroot
+
+    def files(self):
+        """Todos os arquivos regulares, com caminhos relativos à raiz"""
+        files = []
+        visited = set()
+        pending = [("", self.root())]
+        while pending:
+            prefix, directory = pending.pop()
+            if directory.number in visited:
+                continue
+            visited.add(directory.number)
+            for name, inode in self.listdir(directory):
+                path = f"{prefix}{name}"
+                if inode.is_dir:
+                    pending.append((path + "/", inode))
+                else:
+                    first = inode.direct[0] * self.block_size if inode.stored_size else 0
+                    files.append(PfsFile(path, inode, first))
+        files.sort(key=lambda f: f.path)
+        return files
+
+    def nested_image(self):
+        """PFS interno guardado em pfs_image.dat (PFSC), ou None"""
+        for name, inode in self.listdir(self.root()):
+            if name == NESTED_IMAGE and not inode.is_dir:
+                return PfsImage(self.open_inode(inode))
+        return None
+
+
+def _looks_like_pfs(data):
+    return len(data) >= 16 and struct.unpack_from('<qq', data) == (PFS_VERSION, PFS_MAGIC)
+
+
+def locate_image(reader, entries=()):
+    """Região do PKG com a imagem PFS e a entrada que a contém (ou None)
+
+    Usa pfs_image_offset/size do header; em PKGs sem esses campos procura
+    uma entrada da tabela que comece com o superbloco.
+    """
+    header = reader.header
+    offset, size = header.pfs_image_offset, header.pfs_image_size
+    if size and offset + PFSC_STRUCT.size <= reader.file_size:
+        for entry in entries:
+            if entry.offset == offset:
+                return PkgRegion(reader, offset, size), entry
+        return PkgRegion(reader, offset, size), None
+
+    for entry in entries:
+        if _looks_like_pfs(reader.read_at(entry.offset, min(16, entry.size))):
+            return PkgRegion(reader, entry.offset, entry.size), entry
+    raise PfsError("Nenhuma imagem PFS encontrada no PKG")
+
+
+def open_pfs(reader, entries=()):
+    """Abre o PFS do PKG; retorna (imagem com os arquivos do jogo, entrada da imagem)"""
+    region, entry = locate_image(reader, entries)
+    image = PfsImage(region)
+    return image.nested_image() or image, entry
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Planejamento das leituras da extração
+Ordena as entradas pelo offset no PKG e agrupa entradas pequenas e vizinhas
+(a maior parte de sce_sys) em uma única leitura grande, que depois é dividida
+entre os arquivos de saída. Em HD e compartilhamentos de rede isso troca
+centenas de seeks por leituras sequenciais.
+"""
+
+# Entradas até este tamanho podem ser agrupadas
+COALESCE_MAX_ENTRY = 1024 * 1024
+# Maior buraco entre duas entradas que ainda vale ler junto (em vez de um seek)
+COALESCE_MAX_GAP = 64 * 1024
+# Tamanho máximo de uma leitura agrupada (limita a memória por thread)
+COALESCE_MAX_READ = 8 * 1024 * 1024
+
+
+class ReadBatch:
+    """Uma leitura do PKG e as entradas (índice, entrada) servidas por ela"""
+
+    __slots__ = ('offset', 'end', 'items', 'coalesced')
+
+    def __init__(self, index, entry, coalesced):
+        self.offset = entry.offset
+        self.end = entry.offset + entry.size
+        self.items = [(index, entry)]
+        self.coalesced = coalesced
+
+    @property
+    def size(self):
+        return self.end - self.offset
+
+    def add(self, index, entry):
+        self.items.append((index, entry))
+        self.end = max(self.end, entry.offset + entry.size)
+
+    def __repr__(self):
+        return f"ReadBatch(offset=0x{self.offset:X}, size={self.size}, entries={len(self.items)})"
+
+
+def plan_reads(entries, coalesce=True, max_entry=COALESCE_MAX_ENTRY, max_gap=COALESCE_MAX_GAP,
+               max_read=COALESCE_MAX_READ):
+    """Divide as entradas em leituras, em ordem crescente de offset
+
+    Entradas maiores que `max_entry` (ou todas, com `coalesce=False`)
+    ficam sozinhas e são copiadas pelo caminho normal; as pequenas são
+    agrupadas enquanto o buraco entre elas for até `max_gap` e a
+    leitura não passar de `max_read`.
+    """
+    order = sorted(range(len(entries)), key=lambda i: (entries[i].offset, entries[i].size))
+
+    batches = []
+    current = None
+    for i in order:
+        entry = entries[i]
+        if not coalesce or entry.size > max_entry:
+            batches.append(ReadBatch(i, entry, coalesced=False))
+            current = None
+            continue
+
+        end = entry.offset + entry.size
+        if (current is not None and entry.offset - current.end <= max_gap
+                and max(end, current.end) - current.offset <= max_read):
+            current.add(i, entry)
+        else:
+            current = ReadBatch(i, entry, coalesced=True)
+            batches.append(current)
+
+    return batches
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Servidor HTTP somente leitura das entradas de um PKG
+Cada entrada fica disponível em /<caminho> (ex.: /sce_sys/param.sfo) e em
+/_id/0x1000, com suporte a Range. Os bytes saem direto do PKG
+(sendfile ou fatias do mapeamento), sem extrair nada para o disco.
+"""
+
+import os
+import json
+import mimetypes
+from email.utils import formatdate
+from urllib.parse import unquote, urlsplit
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from pkg_core import CHUNK_SIZE, entry_path
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+ID_PREFIX = "/_id/"
+
+HAS_SENDFILE = hasattr(os, "sendfile")
+
+# Tipos que o mimetypes não conhece
+EXTRA_TYPES = {
+    ".sfo": "application/octet-stream",
+    ".at9": "audio/x-at9",
+    ".prx": "application/x-elf",
+    ".elf": "application/x-elf",
+    ".bin": "application/octet-stream",
+    ".dat": "application/octet-stream",
+}
+
+
+def content_type(path):
+    """Content-Type pela extensão do caminho"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in EXTRA_TYPES:
+        return EXTRA_TYPES[ext]
+    return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+def parse_range(header, size):
+    """Interpreta um cabeçalho Range de um único intervalo
+
+    Retorna (início, fim inclusivo), None se o cabeçalho deve ser
+    ignorado (resposta completa) ou levanta ValueError se o intervalo
+    não puder ser atendido (416).
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    spec = header[len("bytes="):].strip()
+    if "," in spec:
+        # Vários intervalos: responde o arquivo inteiro (permitido pela RFC 9110)
+        return None
+
+    first, sep, last = spec.partition("-")
+    # Sintaxe inválida (sem "-", sinais, espaços, texto) é ignorada
+    numbers = [part for part in (first, last) if part]
+    if not sep or not numbers or not all(part.isascii() and part.isdigit() for part in numbers):
+        return None
+
+    if first == "":
+        # Sufixo: últimos N bytes; "-0" ou arquivo vazio não têm o que atender
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError("Intervalo de sufixo vazio")
+        return max(0, size - length), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if last and end < start:
+        # "5-2" não é um intervalo válido: ignorado, não insatisfazível
+        return None
+    if start >= size:
+        raise ValueError("Intervalo fora do arquivo")
+    return start, min(end, size - 1)
+
+
+def build_routes(reader, recovery=False):
+    """Mapa caminho -> entrada, com os mesmos nomes usados na extração"""
+    entries = reader.entries(recovery=recovery)
+    reader.sniff_names(entries)
+
+    routes = {}
+    for entry in entries:
+        path = "/" + entry_path(*reader.entry_name(entry))
+        # Nomes repetidos continuam acessíveis por /_id/
+        routes.setdefault(path, entry)
+        routes.setdefault(f"{ID_PREFIX}0x{entry.id:X}", entry)
+    return routes
+
+
+class PkgHTTPServer(ThreadingHTTPServer):
+    """Servidor com uma thread por conexão, todas lendo o mesmo PKG"""
+
+    daemon_threads = True
+
+    def __init__(self, reader, address=(DEFAULT_HOST, DEFAULT_PORT), recovery=False, log=None):
+        self.reader = reader
+        self.log = log
+        self.routes = build_routes(reader, recovery)
+        self.last_modified = formatdate(os.stat(reader.path).st_mtime, usegmt=True)
+        super().__init__(address, EntryRequestHandler)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def index(self):
+        """Lista das entradas servidas (JSON de /)"""
+        header = self.reader.header
+        entries = [
+            {"path": path, "size": entry.size, "id": entry.id, "offset": entry.offset}
+            for path, entry in sorted(self.routes.items())
+            if not path.startswith(ID_PREFIX)
+        ]
+        return {
+            "pkg_file": os.path.basename(self.reader.path),
+            "content_id": header.content_id,
+            "entries": entries,
+        }
+
+
+class EntryRequestHandler(BaseHTTPRequestHandler):
+    """GET/HEAD de entradas do PKG, com Range de um intervalo"""
+
+    server_version = "PkgServer/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def log_message(self, format, *args):
+        if self.server.log is not None:
+            self.server.log(f"{self.address_string()} - {format % args}", "info")
+
+    def _serve(self, send_body):
+        path = unquote(urlsplit(self.path).path)
+        if path == "/":
+            self._send_index(send_body)
+            return
+
+        entry = self.server.routes.get(path)
+        if entry is None:
+            self.send_error(404)
+            return
+
+        size = entry.size
+        etag = f'"{entry.id:x}-{entry.offset:x}-{size:x}"'
+        try:
+            byte_range = parse_range(self.headers.get("Range"), size)
+            if byte_range is not None and self.headers.get("If-Range") not in (None, etag):
+                byte_range = None
+        except ValueError:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if byte_range is None:
+            start, end = 0, size - 1
+            self.send_response(200)
+        else:
+            start, end = byte_range
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+
+        length = end - start + 1 if size else 0
+        self.send_header("Content-Type", content_type(path))
+        self.send_header("Content-Length", str(length))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", self.server.last_modified)
+        self.end_headers()
+
+        if send_body and length:
+            try:
+                self._send_bytes(entry.offset + start, length)
+            except (BrokenPipeError, ConnectionResetError):
+                # Cliente fechou a conexão no meio (ex.: player que só queria o início)
+                self.close_connection = True
+
+    def _send_index(self, send_body):
+        body = json.dumps(self.server.index(), indent=2, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def _send_bytes(self, offset, length):
+        """Envia `length` bytes do PKG a partir de `offset`, sem copiar para o Python"""
+        reader = self.server.reader
+        sock = self.connection
+
+        if HAS_SENDFILE and sock.gettimeout() is None:
+            sent = 0
+            try:
+                while sent < length:
+                    n = os.sendfile(sock.fileno(), reader.fd, offset + sent, length - sent)
+                    if n == 0:
+                        raise BrokenPipeError
+                    sent += n
+                return
+            except OSError as e:
+                if isinstance(e, (BrokenPipeError, ConnectionResetError)) or sent:
+                    raise
+                # sendfile não suportado para este socket: continua pelo mapeamento
+
+        for chunk in reader.iter_views(offset, length, CHUNK_SIZE):
+            self.wfile.write(chunk)
+
+
+def serve(reader, host=DEFAULT_HOST, port=DEFAULT_PORT, recovery=False, log=None):
+    """Serve as entradas do PKG até Ctrl+C"""
+    with PkgHTTPServer(reader, (host, port), recovery=recovery, log=log) as server:
+        entries = sum(1 for path in server.routes if not path.startswith(ID_PREFIX))
+        print(f"Servindo {entries} entradas de {os.path.basename(reader.path)} em {server.url} "
+              f"(Ctrl+C para parar)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
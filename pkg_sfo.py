@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Leitura do param.sfo (formato PSF)
+Header little-endian com a tabela de chaves e a de dados, seguido de um
+índice de 16 bytes por parâmetro. Valores são texto UTF-8 ou inteiros de
+32 bits (ex.: TITLE_ID, CONTENT_ID, APP_VER, CATEGORY).
+"""
+
+import struct
+
+SFO_MAGIC = b'\x00PSF'
+# magic, versão, início da tabela de chaves, início da tabela de dados, quantidade
+SFO_HEADER_STRUCT = struct.Struct('<4sIIII')
+# offset da chave, formato, tamanho usado, tamanho reservado, offset do dado
+SFO_INDEX_STRUCT = struct.Struct('<HHIII')
+
+SFO_FORMAT_UTF8_SPECIAL = 0x0004
+SFO_FORMAT_UTF8 = 0x0204
+SFO_FORMAT_INT32 = 0x0404
+
+MAX_SFO_SIZE = 1024 * 1024
+MAX_SFO_ENTRIES = 4096
+
+# ID da entrada do PKG com o param.sfo (sce_sys/param.sfo)
+PARAM_SFO_ID = 0x1000
+
+
+class SfoError(Exception):
+    """param.sfo inválido ou corrompido"""
+
+
+def _text(data):
+    return bytes(data).split(b'\x00', 1)[0].decode('utf-8', 'replace')
+
+
+def parse_header(data):
+    """(início da tabela de chaves, início da tabela de dados, quantidade) do header
+
+    Levanta SfoError se a assinatura ou as posições das tabelas forem
+    inválidas; `data` só precisa ter os bytes do header.
+    """
+    if len(data) < SFO_HEADER_STRUCT.size:
+        raise SfoError("param.sfo muito curto")
+    magic, version, key_table, data_table, count = SFO_HEADER_STRUCT.unpack_from(data, 0)
+    if magic != SFO_MAGIC:
+        raise SfoError("param.sfo sem a assinatura PSF")
+    index_end = SFO_HEADER_STRUCT.size + count * SFO_INDEX_STRUCT.size
+    if count > MAX_SFO_ENTRIES or key_table < index_end or data_table < key_table:
+        raise SfoError("Índice do param.sfo fora dos limites")
+    return key_table, data_table, count
+
+
+def parse_sfo(data):
+    """Converte o conteúdo de um param.sfo em dicionário chave -> valor"""
+    key_table, data_table, count = parse_header(data)
+    if key_table > len(data):
+        raise SfoError("Índice do param.sfo fora dos limites")
+
+    values = {}
+    for i in range(count):
+        key_offset, fmt, length, max_length, data_offset = SFO_INDEX_STRUCT.unpack_from(
+            data, SFO_HEADER_STRUCT.size + i * SFO_INDEX_STRUCT.size)
+        key = _text(data[key_table + key_offset:key_table + key_offset + 256])
+        start = data_table + data_offset
+        if not key or start + length > len(data):
+            raise SfoError(f"Parâmetro {i} do param.sfo fora dos limites")
+        if fmt == SFO_FORMAT_INT32 and length >= 4:
+            values[key] = struct.unpack_from('<I', data, start)[0]
+        else:
+            values[key] = _text(data[start:start + length])
+    return values
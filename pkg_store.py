@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Repositório de conteúdo deduplicado entre extrações
+Cada arquivo extraído é guardado uma única vez, pelo SHA-256, em
+<store>/objects/ab/cdef...; a pasta <pkg>_extracted só tem links para
+os objetos (reflink, hardlink ou, em último caso, cópia). O hash é
+calculado antes da cópia, então conteúdo repetido não é gravado de novo.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+
+from pkg_io import clone_file
+
+STORE_ALGORITHM = "sha256"
+OBJECTS_DIR = "objects"
+TMP_DIR = "tmp"
+
+# Ordem de tentativa de cada modo; "auto" prefere reflink (cópia independente)
+LINK_MODES = {
+    "auto": ("reflink", "hardlink", "copy"),
+    "reflink": ("reflink", "copy"),
+    "hardlink": ("hardlink", "copy"),
+    "copy": ("copy",),
+}
+
+
+class ContentStore:
+    """Objetos endereçados pelo hash, compartilhados entre extrações
+
+    Com hardlink, o arquivo extraído é o próprio objeto: o extrator
+    (`open_output`) desfaz o link antes de gravar por cima, e o modo
+    somente leitura só avisa editores comuns (root o ignora).
+    """
+
+    def __init__(self, root, link="auto"):
+        if link not in LINK_MODES:
+            raise ValueError(f"Modo de link desconhecido: {link}")
+        self.root = os.path.abspath(root)
+        self.link = link
+        self.objects_dir = os.path.join(self.root, OBJECTS_DIR)
+        self.tmp_dir = os.path.join(self.root, TMP_DIR)
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # Métodos que falharam uma vez (ex.: sem reflink) não são tentados de novo
+        self._unsupported = set()
+        self.new_objects = 0
+        self.new_bytes = 0
+        self.reused_objects = 0
+        self.reused_bytes = 0
+        self.links = {}
+
+    def object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest[2:])
+
+    def add(self, digest, size, write):
+        """Garante o objeto `digest`; `write(fd)` só é chamado se ele ainda não existir
+
+        Retorna True se o objeto foi gravado agora. O conteúdo vai para um
+        arquivo temporário e só recebe o nome final completo, então um
+        objeto interrompido nunca é reaproveitado.
+        """
+        path = self.object_path(digest)
+        if os.path.exists(path):
+            with self._lock:
+                self.reused_objects += 1
+                self.reused_bytes += size
+            return False
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            try:
+                write(fd)
+            finally:
+                os.close(fd)
+            os.chmod(tmp_path, 0o444)
+            # Duas threads com o mesmo conteúdo: a última troca por um objeto idêntico
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        with self._lock:
+            self.new_objects += 1
+            self.new_bytes += size
+        return True
+
+    def materialize(self, digest, dest):
+        """Cria `dest` a partir do objeto; retorna o método usado (reflink/hardlink/copy)"""
+        source = self.object_path(digest)
+        if os.path.exists(dest):
+            try:
+                if os.path.samefile(source, dest):
+                    return self._count("hardlink")
+            except OSError:
+                pass
+
+        part = dest + ".part"
+        for method in LINK_MODES[self.link]:
+            if method in self._unsupported:
+                continue
+            try:
+                os.remove(part)
+            except FileNotFoundError:
+                pass
+            if getattr(self, "_" + method)(source, part):
+                os.replace(part, dest)
+                return self._count(method)
+            with self._lock:
+                self._unsupported.add(method)
+        raise OSError(f"Não foi possível criar {dest} a partir do repositório")
+
+    def _count(self, method):
+        with self._lock:
+            self.links[method] = self.links.get(method, 0) + 1
+        return method
+
+    @staticmethod
+    def _reflink(source, dest):
+        with open(source, 'rb') as src, open(dest, 'wb') as dst:
+            if clone_file(src.fileno(), dst.fileno()):
+                return True
+        os.remove(dest)
+        return False
+
+    @staticmethod
+    def _hardlink(source, dest):
+        try:
+            os.link(source, dest)
+        except OSError:
+            # Outro sistema de arquivos, FAT/exFAT, limite de links...
+            return False
+        return True
+
+    @staticmethod
+    def _copy(source, dest):
+        shutil.copyfile(source, dest)
+        return True
+
+    def stats(self):
+        """Resumo para o extraction_info.json"""
+        with self._lock:
+            return {
+                "path": self.root,
+                "algorithm": STORE_ALGORITHM,
+                "link": self.link,
+                "new_objects": self.new_objects,
+                "new_bytes": self.new_bytes,
+                "reused_objects": self.reused_objects,
+                "reused_bytes": self.reused_bytes,
+                "links": dict(self.links),
+            }
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Termos id: e size: do filtro de entradas
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from pkg_core import PkgReader, PkgExtractor
+from pkg_filter import EntryFilter, parse_size
+from synthetic_pkg import generate_pkg
+
+
+class ParseTest(unittest.TestCase):
+
+    def test_parse_size(self):
+        self.assertEqual(parse_size("512"), 512)
+        self.assertEqual(parse_size("4k"), 4096)
+        self.assertEqual(parse_size("1.5M"), 1536 * 1024)
+        self.assertEqual(parse_size(" 2G "), 2 * 1024**3)
+
+    def test_id_ranges(self):
+        entry_filter = EntryFilter("id:0x1000-0x12FF ID:0x1")
+        self.assertEqual(entry_filter.id_ranges, [(0x1000, 0x12FF), (1, 1)])
+        self.assertTrue(entry_filter.accepts_metadata(0x1200, 10))
+        self.assertTrue(entry_filter.accepts_metadata(1, 10))
+        self.assertFalse(entry_filter.accepts_metadata(0x1300, 10))
+        self.assertEqual(EntryFilter("id:4096").id_ranges, [(4096, 4096)])
+
+    def test_size_bounds(self):
+        cases = {
+            "size:>1K": (1025, None),
+            "size:>=1K": (1024, None),
+            "size:<1K": (0, 1023),
+            "size:<=1K": (0, 1024),
+            "size:4K-64K": (4096, 65536),
+            "size:100": (100, 100),
+        }
+        for term, bound in cases.items():
+            self.assertEqual(EntryFilter(term).size_bounds, [bound], term)
+
+        entry_filter = EntryFilter("size:>1K size:<=4K")
+        self.assertEqual([entry_filter.accepts_metadata(0, size) for size in (1024, 1025, 4096, 4097)],
+                         [False, True, True, False])
+
+    def test_invalid_terms(self):
+        for term in ("id:", "id:0x20-0x10", "id:abc", "size:", "size:>1K-2K", "size:1X",
+                     "size:-5"):
+            with self.assertRaises(ValueError, msg=term):
+                EntryFilter(term)
+
+    def test_metadata_terms_keep_names_open(self):
+        entry_filter = EntryFilter("id:0x1000-0x12FF")
+        self.assertTrue(entry_filter.match_all_names)
+        self.assertFalse(entry_filter.matches_everything)
+        self.assertTrue(EntryFilter("*.*").matches_everything)
+
+
+class SelectionTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+        self.pkg_path = os.path.join(self.tmp, "jogo.pkg")
+        self.layout = generate_pkg(self.pkg_path, entries=80, total_size=2 * 1024 * 1024, seed=6)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _selected(self, format_filter):
+        with PkgReader(self.pkg_path) as reader:
+            info = PkgExtractor(reader, output_base=self.tmp, format_filter=format_filter).extract()
+        return sorted(record["id"] for record in info["files"])
+
+    def test_id_and_size_select_from_the_table(self):
+        expected = sorted(entry_id for entry_id, _, size, _ in self.layout
+                          if 0x1000 <= entry_id <= 0x12FF and size > 16 * 1024)
+        self.assertTrue(expected)
+        self.assertEqual(self._selected("id:0x1000-0x12FF size:>16K"), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Imagem PFS com ponteiros de bloco inválidos: o arquivo falha em vez de
+sair cortado
+"""
+
+import os
+import sys
+import struct
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from pkg_core import PkgReader, PkgExtractor, PFS_SUBDIR
+from pkg_pfs import PfsError, DIRECT_BLOCKS, INODE_SIZE, INODE_POINTERS_OFFSET, open_pfs
+from synthetic_pkg import generate_pkg
+
+MB = 1024 * 1024
+
+
+class PfsBlockPointerTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+        self.pkg_path = os.path.join(self.tmp, "jogo.pkg")
+        # Sem PFSC: os ponteiros dos inodes ficam direto no PKG. Perfil "large":
+        # arquivos de 512 KB, com vários blocos diretos
+        generate_pkg(self.pkg_path, entries=8, profile="large", total_size=4 * MB,
+                     pfs_files=8, pfs_compressed=False, seed=4)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _multi_block_file(self):
+        """Maior arquivo só com ponteiros diretos (sem bloco indireto)"""
+        with PkgReader(self.pkg_path) as reader:
+            image, _ = open_pfs(reader, reader.entries())
+            limit = DIRECT_BLOCKS * image.block_size
+            pfs_file = max((f for f in image.files() if f.size <= limit), key=lambda f: f.size)
+            self.assertGreater(pfs_file.size, image.block_size)
+            return image, pfs_file
+
+    def _set_pointer(self, image, inode, index, value):
+        """Troca o ponteiro direto `index` do inode no próprio PKG"""
+        per_block = image.block_size // INODE_SIZE
+        block, slot = divmod(inode.number, per_block)
+        position = (image.source.offset + (1 + block) * image.block_size + slot * INODE_SIZE
+                    + INODE_POINTERS_OFFSET + 4 * index)
+        with open(self.pkg_path, 'r+b') as f:
+            f.seek(position)
+            f.write(struct.pack('<I', value))
+
+    def _extract(self):
+        warnings = []
+        with PkgReader(self.pkg_path) as reader:
+            extractor = PkgExtractor(reader, output_base=self.tmp, pfs=True,
+                                     log=lambda message, log_type="info":
+                                     log_type == "warning" and warnings.append(message))
+            info = extractor.extract()
+        return info, warnings
+
+    def test_pointer_past_n_block_is_rejected(self):
+        image, pfs_file = self._multi_block_file()
+        self._set_pointer(image, pfs_file.inode, 1, image.n_block + 16)
+
+        with PkgReader(self.pkg_path) as reader:
+            image, _ = open_pfs(reader, reader.entries())
+            broken = next(f for f in image.files() if f.path == pfs_file.path)
+            with self.assertRaises(PfsError):
+                image.open(broken)
+
+        info, warnings = self._extract()
+        paths = [record["path"] for record in info["files"]]
+        self.assertNotIn(f"{PFS_SUBDIR}/{pfs_file.path}", paths)
+        self.assertTrue(any(pfs_file.path in message for message in warnings))
+
+    def test_block_past_truncated_image_is_rejected(self):
+        image, pfs_file = self._multi_block_file()
+        last_block = max(pfs_file.inode.direct)
+        # Corta o PKG no meio do último bloco do arquivo
+        os.truncate(self.pkg_path, image.source.offset + last_block * image.block_size + 16)
+
+        info, warnings = self._extract()
+        paths = [record["path"] for record in info["files"]]
+        self.assertNotIn(f"{PFS_SUBDIR}/{pfs_file.path}", paths)
+        self.assertTrue(any(pfs_file.path in message for message in warnings))
+
+
+if __name__ == "__main__":
+    unittest.main()
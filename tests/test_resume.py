@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+--resume sobre a saída de outro PKG: arquivos parciais só continuam se os
+bytes já gravados forem da entrada atual
+"""
+
+import os
+import sys
+import hashlib
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from pkg_core import PkgReader, PkgExtractor, INFO_FILENAME, JOURNAL_FILENAME
+from synthetic_pkg import generate_pkg
+
+MB = 1024 * 1024
+
+
+def _extracted_files(extract_dir):
+    for root, _, names in os.walk(extract_dir):
+        for name in names:
+            if name not in (INFO_FILENAME, JOURNAL_FILENAME):
+                yield os.path.join(root, name)
+
+
+def _truncate_half(extract_dir):
+    """Simula uma extração interrompida: todo arquivo fica com metade do tamanho"""
+    for path in _extracted_files(extract_dir):
+        os.truncate(path, os.path.getsize(path) // 2)
+
+
+def _tree(extract_dir):
+    """SHA-256 dos arquivos extraídos, sem os relatórios"""
+    files = {}
+    for path in _extracted_files(extract_dir):
+        with open(path, 'rb') as f:
+            files[os.path.relpath(path, extract_dir)] = hashlib.sha256(f.read()).hexdigest()
+    return files
+
+
+class ResumeOtherPkgTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+        self.output = os.path.join(self.tmp, "saida")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _generate(self, name, total_size, seed):
+        # Perfil "large" com o mesmo número de entradas: mesmos IDs e a primeira
+        # entrada no mesmo offset; só tamanhos e conteúdo mudam
+        path = os.path.join(self.tmp, name, "x.pkg")
+        os.makedirs(os.path.dirname(path))
+        generate_pkg(path, entries=8, profile="large", total_size=total_size,
+                     types=("raw",), seed=seed)
+        return path
+
+    def _extract(self, path, output=None, **options):
+        with PkgReader(path) as reader:
+            extractor = PkgExtractor(reader, output_base=output or self.output, **options)
+            extractor.extract()
+            return extractor.extract_dir
+
+    def _assert_matches_clean(self, path, extract_dir):
+        clean_dir = self._extract(path, output=os.path.join(self.tmp, "limpa"))
+        self.assertEqual(_tree(extract_dir), _tree(clean_dir))
+
+    def test_record_with_other_size_does_not_resume(self):
+        first = self._generate("v1", 2 * MB, seed=1)
+        second = self._generate("v2", 4 * MB, seed=2)
+        self._extract(first)
+
+        # Registro de v1 tem o mesmo ID e offset, mas o arquivo é menor que a entrada de v2
+        extract_dir = self._extract(second, resume=True)
+        self._assert_matches_clean(second, extract_dir)
+
+    def test_partial_with_other_prefix_does_not_resume(self):
+        first = self._generate("v1", 2 * MB, seed=1)
+        second = self._generate("v2", 2 * MB, seed=2)
+        extract_dir = self._extract(first)
+
+        # Registros de v1 batem com v2 (ID, offset e tamanho); o conteúdo não
+        _truncate_half(extract_dir)
+
+        extract_dir = self._extract(second, resume=True)
+        self._assert_matches_clean(second, extract_dir)
+
+    def test_partial_of_same_entry_resumes(self):
+        path = self._generate("v1", 2 * MB, seed=1)
+        extract_dir = self._extract(path)
+        _truncate_half(extract_dir)
+
+        messages = []
+        self._extract(path, resume=True, log=lambda message, log_type="info": messages.append(message))
+        self.assertTrue(any("continuando de" in message for message in messages))
+        self._assert_matches_clean(path, extract_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()
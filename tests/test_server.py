@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cabeçalho Range do servidor HTTP: intervalos inválidos são ignorados (200)
+e os insatisfazíveis recebem 416
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import unittest
+import http.client
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from pkg_core import PkgReader
+from pkg_server import PkgHTTPServer, parse_range
+from synthetic_pkg import generate_pkg
+
+
+class ParseRangeTest(unittest.TestCase):
+
+    def test_ranges(self):
+        self.assertEqual(parse_range("bytes=0-9", 100), (0, 9))
+        self.assertEqual(parse_range("bytes=90-", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=90-500", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=5-5", 100), (5, 5))
+
+    def test_suffix(self):
+        self.assertEqual(parse_range("bytes=-10", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=-500", 100), (0, 99))
+
+    def test_ignored(self):
+        for header in (None, "", "items=0-9", "bytes=0-9,20-29", "bytes=5-2", "bytes=abc",
+                       "bytes=-", "bytes=--5", "bytes=+1-5", "bytes=1-+5", "bytes= 1-5x"):
+            self.assertIsNone(parse_range(header, 100), header)
+
+    def test_unsatisfiable(self):
+        for header, size in (("bytes=-0", 100), ("bytes=100-", 100), ("bytes=150-200", 100),
+                             ("bytes=0-", 0), ("bytes=-5", 0)):
+            with self.assertRaises(ValueError, msg=header):
+                parse_range(header, size)
+
+
+class RangeRequestTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls._tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(cls._tmp.name, "jogo.pkg")
+        generate_pkg(path, entries=10, total_size=1024 * 1024, seed=5)
+        cls.reader = PkgReader(path)
+        cls.server = PkgHTTPServer(cls.reader, address=("127.0.0.1", 0))
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.path = next(path for path in cls.server.routes if not path.startswith("/_id/"))
+        cls.size = cls.server.routes[cls.path].size
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.reader.close()
+        cls._tmp.cleanup()
+
+    def _get(self, byte_range):
+        connection = http.client.HTTPConnection(*self.server.server_address[:2])
+        try:
+            connection.request("GET", self.path, headers={"Range": byte_range})
+            response = connection.getresponse()
+            return response.status, response.read()
+        finally:
+            connection.close()
+
+    def test_status(self):
+        status, body = self._get("bytes=0-3")
+        self.assertEqual((status, len(body)), (206, 4))
+        status, body = self._get("bytes=5-2")
+        self.assertEqual((status, len(body)), (200, self.size))
+        status, body = self._get("bytes=-0")
+        self.assertEqual((status, body), (416, b""))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Repositório --store: extrações posteriores na mesma pasta não podem
+alterar os objetos guardados, e os arquivos do PFS também são deduplicados
+"""
+
+import os
+import sys
+import hashlib
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from pkg_core import PkgReader, PkgExtractor, PFS_SUBDIR
+from pkg_store import OBJECTS_DIR
+from synthetic_pkg import generate_pkg
+
+
+def _corrupted_objects(store_dir):
+    corrupted = []
+    objects_dir = os.path.join(store_dir, OBJECTS_DIR)
+    for prefix in os.listdir(objects_dir):
+        for name in os.listdir(os.path.join(objects_dir, prefix)):
+            digest = hashlib.sha256()
+            with open(os.path.join(objects_dir, prefix, name), 'rb') as f:
+                digest.update(f.read())
+            if digest.hexdigest() != prefix + name:
+                corrupted.append(prefix + name)
+    return corrupted
+
+
+class HardlinkStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+        self.store = os.path.join(self.tmp, "store")
+        self.output = os.path.join(self.tmp, "saida")
+        # Mesmo nome de arquivo, conteúdo diferente: mesma pasta a_extracted
+        self.first = os.path.join(self.tmp, "v1", "a.pkg")
+        self.second = os.path.join(self.tmp, "v2", "a.pkg")
+        for path, seed in ((self.first, 1), (self.second, 2)):
+            os.makedirs(os.path.dirname(path))
+            generate_pkg(path, entries=60, total_size=4 * 1024 * 1024, seed=seed)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _extract(self, path, **options):
+        with PkgReader(path) as reader:
+            return PkgExtractor(reader, output_base=self.output, **options).extract()
+
+    def test_plain_extraction_over_hardlinks_keeps_objects(self):
+        info = self._extract(self.first, store=self.store, store_link="hardlink")
+        self.assertTrue(all(record["link"] == "hardlink" for record in info["files"]))
+
+        self._extract(self.second)
+        self.assertEqual(_corrupted_objects(self.store), [])
+
+    def test_resume_over_hardlinks_keeps_objects(self):
+        self._extract(self.first, store=self.store, store_link="hardlink")
+
+        self._extract(self.second, resume=True, verify=True, jobs=4, split_threshold=1024 * 1024)
+        self.assertEqual(_corrupted_objects(self.store), [])
+
+
+class PfsStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+        self.store = os.path.join(self.tmp, "store")
+        # Mesmo jogo em dois PKGs: os arquivos do PFS são os mesmos
+        self.paths = [os.path.join(self.tmp, f"{name}.pkg") for name in ("a", "b")]
+        for path in self.paths:
+            generate_pkg(path, entries=10, total_size=2 * 1024 * 1024, pfs_files=8, seed=3)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _pfs_records(self, path):
+        with PkgReader(path) as reader:
+            info = PkgExtractor(reader, output_base=self.tmp, pfs=True, store=self.store).extract()
+        return [record for record in info["files"] if record["path"].startswith(PFS_SUBDIR + "/")]
+
+    def test_pfs_files_go_through_the_store(self):
+        first = self._pfs_records(self.paths[0])
+        self.assertTrue(first)
+        self.assertEqual({record["stored"] for record in first}, {"new"})
+
+        second = self._pfs_records(self.paths[1])
+        self.assertEqual({record["stored"] for record in second}, {"reused"})
+        self.assertEqual(_corrupted_objects(self.store), [])
+
+
+if __name__ == "__main__":
+    unittest.main()